@@ -0,0 +1,100 @@
+import glob
+import numpy as np
+
+import core
+from plugins.bvh import BVH
+from plugins.animator import Animator
+from core.glwrapper import GLWrapper as glw
+from .harness import Suite
+
+#####################################
+# BVH LOADING & POSING
+#####################################
+
+ASSETS = sorted(glob.glob("assets/*.bvh"))
+CLIP = "assets/a_001_1_1.bvh"
+
+def _loader():
+    # BVH is a plugin, keep benchmark instances out of the queue
+    loader = BVH()
+    core.PluginQueue.unregister(loader)
+    return loader
+
+# text parsing of every file in assets/ (sidecars ignored)
+@Suite.register("bvh.load_from_path.parse_all", repeat=5)
+def bench_load_parse():
+    loader = _loader()
+    def run():
+        for path in ASSETS:
+            loader.load_from_path(path, use_cache=False)
+    return run, loader.release
+
+# same files through their binary sidecars (written on the first call)
+@Suite.register("bvh.load_from_path.cached_all", repeat=10)
+def bench_load_cached():
+    loader = _loader()
+    def run():
+        for path in ASSETS:
+            loader.load_from_path(path)
+    return run, loader.release
+
+# one whole skeleton posed through the scene-graph Joints, per frame
+@Suite.register("joint.set_pose_from_frame.skeleton", number=10)
+def bench_set_pose_from_frame():
+    loader = _loader()
+    loader.load_from_path(CLIP)
+    loader.create_joints()
+    frames = np.asarray(loader.frames)
+    nodes = [node['object'] for node in loader.animated_nodes]
+    state = {'frame': 0}
+
+    def run():
+        frame = frames[state['frame'] % len(frames)]
+        state['frame'] += 1
+        data_ptr = 0
+        for joint in nodes:
+            data_ptr = joint.set_pose_from_frame(frame, data_ptr)
+        loader.root_object.get_world_matrix()
+    return run, loader.release
+
+def _animator(interpolate, joint_objects=False):
+    animator = Animator()
+    core.PluginQueue.unregister(animator)
+    animator.async_load = False
+    animator.interpolate = interpolate
+    animator.use_joint_objects = joint_objects
+    core.PluginQueue.unregister(animator.loader)
+    animator.init()
+    return animator
+
+# FK of one frame at a fractional position (slerp between two frames), no drawing
+@Suite.register("animator.sample_world_matrices", number=50)
+def bench_sample_world_matrices():
+    animator = _animator(True)
+    state = {'frame': 0.0}
+
+    def run():
+        state['frame'] = (state['frame'] + 0.37) % (len(animator.loader.frames) - 1)
+        animator.sample_world_matrices(state['frame'])
+    return run, animator.release
+
+# full per-frame update: time step, FK, palette upload and the two instanced draws
+@Suite.register("animator.update", number=20, gl=True)
+def bench_animator_update():
+    animator = _animator(True)
+
+    def run():
+        animator.fixed_update(1.0 / 60.0)
+        animator.update()
+    return run, animator.release
+
+# same with one scene-graph Joint per joint (set_world_matrices + instanced draw through GLWrapper)
+@Suite.register("animator.update.joint_objects", number=20, gl=True)
+def bench_animator_update_joint_objects():
+    animator = _animator(True, joint_objects=True)
+
+    def run():
+        animator.fixed_update(1.0 / 60.0)
+        animator.update()
+        glw.update()
+    return run, animator.release
@@ -0,0 +1,41 @@
+import numpy as np
+from OpenGL.GL import glFinish
+
+import core
+from core.glwrapper import GLWrapper as glw
+from core.mesh import Sphere
+from .harness import Suite
+
+#####################################
+# DRAW SUBMISSION
+#####################################
+
+# GLWrapper.update with N sphere instances registered on their own std program
+# (uniform change checks + per-instance staging + instanced draw)
+# static instances are only compared against the last upload, not uploaded again
+def _instances(count, moving=True):
+    shader = core.Shader("shaders/std/std.vert", "shaders/std/std.frag")
+    program = shader.program
+    sphere = Sphere(16, 16)
+
+    rng = np.random.default_rng(count)
+    matrices = np.tile(np.eye(4, dtype=np.float32), (count, 1, 1))
+    matrices[:, :3, 3] = rng.uniform(-50.0, 50.0, (count, 3))
+    for matrix in matrices:
+        glw.set_instance_uniform(program, sphere.vao, matrix, len(sphere.indices), "model_matrix")
+
+    def run():
+        if moving:
+            matrices[:, 0, 3] += 0.01 # every instance moves each frame
+        glw.update()
+        glFinish() # include the GPU side, llvmpipe renders on the CPU
+
+    def teardown():
+        # drop this benchmark's registrations so later runs start clean
+        glw.unregister(program)
+        sphere.release()
+    return run, teardown
+
+for _count in (100, 1000):
+    Suite.register(f"glwrapper.update.instances_{_count}", number=10, gl=True)(lambda count=_count: _instances(count))
+Suite.register("glwrapper.update.instances_1000_static", number=10, gl=True)(lambda: _instances(1000, moving=False))
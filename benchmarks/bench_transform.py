@@ -0,0 +1,56 @@
+import numpy as np
+import quaternion as qt
+
+import core
+from core.util import get_model_matrix
+from core.scenegraph import SceneGraph
+from core.mesh import Sphere
+from core.curve import Curve
+from .harness import Suite
+
+#####################################
+# TRANSFORM MATH & GEOMETRY
+#####################################
+
+@Suite.register("util.get_model_matrix", number=1000)
+def bench_get_model_matrix():
+    position = np.array([1.0, 2.0, 3.0], dtype=np.float32)
+    rotation = qt.from_euler_angles(0.3, 0.2, 0.1)
+    scale = np.array([1.0, 2.0, 1.0], dtype=np.float32)
+    return lambda: get_model_matrix(position, rotation, scale)
+
+# leaf world matrix of a chain of `depth` objects after the root moved (full chain recompute)
+def _chain(depth):
+    graph = SceneGraph()
+    objects = [core.Object(f"node_{i}", position=(0.0, 1.0, 0.0), rotation=(0.0, 5.0, 0.0), graph=graph) for i in range(depth)]
+    for parent, child in zip(objects, objects[1:]):
+        parent.add_child(child)
+    root, leaf = objects[0], objects[-1]
+    state = {'x': 0.0}
+
+    def run():
+        state['x'] += 0.01
+        root.set_position((state['x'], 0.0, 0.0))
+        return leaf.get_world_matrix()
+    return run
+
+for _depth in (16, 256):
+    Suite.register(f"object.get_world_matrix.depth_{_depth}", number=100)(lambda depth=_depth: _chain(depth))
+
+# geometry generation only (numpy), the GL upload is not included
+@Suite.register("sphere.create_buffers.64x64", number=20)
+def bench_sphere_create_buffers():
+    sphere = Sphere(64, 64)
+    return sphere.create_buffers
+
+@Suite.register("curve.sample_curve.cubic_100", number=200, gl=True)
+def bench_sample_curve():
+    curve = Curve((0.0, 0.0, 0.0), (10.0, 0.0, 0.0), degree=3, samples=100)
+    curve.control_points = [np.array([3.0, 5.0, 0.0], dtype=np.float32), np.array([7.0, -5.0, 0.0], dtype=np.float32)]
+    return curve.sample_curve
+
+@Suite.register("curve.sample_curve.cubic_adaptive", number=200, gl=True)
+def bench_sample_curve_adaptive():
+    curve = Curve((0.0, 0.0, 0.0), (10.0, 0.0, 0.0), degree=3, tolerance=0.01)
+    curve.control_points = [np.array([3.0, 5.0, 0.0], dtype=np.float32), np.array([7.0, -5.0, 0.0], dtype=np.float32)]
+    return curve.sample_curve
@@ -0,0 +1,148 @@
+import contextlib
+import io
+import json
+import platform
+import time
+import numpy as np
+
+#####################################
+# BENCHMARK REGISTRY
+#####################################
+
+class Benchmark:
+    def __init__(self, name, setup, number=1, repeat=None, gl=False):
+        self.name = name
+        self.setup = setup   # returns the timed callable, or (callable, teardown)
+        self.number = number # calls per sample, results are per call
+        self.repeat = repeat # samples, None = the suite default
+        self.gl = gl         # needs a current GL context
+
+class Suite:
+    _benchmarks = [] # in registration order
+
+    # @Suite.register("name", number=100)
+    # def bench_name(): ... return callable
+    @classmethod
+    def register(cls, name, number=1, repeat=None, gl=False):
+        def decorator(setup):
+            cls._benchmarks.append(Benchmark(name, setup, number, repeat, gl))
+            return setup
+        return decorator
+
+    @classmethod
+    def select(cls, pattern=None, gl_available=True):
+        selected = []
+        for bench in cls._benchmarks:
+            if pattern and pattern not in bench.name:
+                continue
+            if bench.gl and not gl_available:
+                print(f"skip {bench.name} (no GL context)")
+                continue
+            selected.append(bench)
+        return selected
+
+#####################################
+# MEASUREMENT
+#####################################
+
+def summarize(samples):
+    # per call times in milliseconds
+    ms = np.asarray(samples, dtype=np.float64) * 1e3
+    return {
+        'mean_ms': float(ms.mean()),
+        'median_ms': float(np.median(ms)),
+        'stdev_ms': float(ms.std(ddof=1)) if len(ms) > 1 else 0.0,
+        'min_ms': float(ms.min()),
+        'max_ms': float(ms.max()),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'samples': len(ms),
+    }
+
+def measure(bench, repeat=20, warmup=2, quiet=True):
+    repeat = bench.repeat or repeat
+
+    # library code prints on load, keep it out of the timings and the report
+    output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+    with output:
+        result = bench.setup()
+    fn, teardown = result if isinstance(result, tuple) else (result, None)
+
+    samples = []
+    try:
+        with output:
+            for _ in range(warmup):
+                fn()
+            clock = time.perf_counter
+            for _ in range(repeat):
+                start = clock()
+                for _ in range(bench.number):
+                    fn()
+                samples.append((clock() - start) / bench.number)
+    finally:
+        if teardown is not None:
+            with output:
+                teardown()
+
+    stats = summarize(samples)
+    stats['number'] = bench.number
+    return stats
+
+def run(benchmarks, repeat=20, warmup=2):
+    results = {}
+    for bench in benchmarks:
+        stats = measure(bench, repeat, warmup)
+        results[bench.name] = stats
+        print(f"{bench.name:<44}{stats['median_ms']:>12.4f} ms  (p95 {stats['p95_ms']:.4f}, stdev {stats['stdev_ms']:.4f})")
+    return results
+
+#####################################
+# RESULTS & BASELINE
+#####################################
+
+def environment(renderer=None):
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'system': platform.system(),
+        'renderer': renderer,
+    }
+
+def save(path, results, env):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'environment': env, 'results': results}, f, indent=2, sort_keys=True)
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def compare(results, baseline, threshold=0.15):
+    """
+    Median of every benchmark against the baseline median.
+    Returns [(name, baseline_ms, current_ms, ratio, status)], status is "regression" when the
+    ratio exceeds 1 + threshold, "improvement" below 1 - threshold, "ok" or "new" otherwise.
+    """
+    rows = []
+    base = baseline.get('results', {})
+    for name, stats in results.items():
+        if name not in base:
+            rows.append((name, None, stats['median_ms'], None, "new"))
+            continue
+        before = base[name]['median_ms']
+        ratio = stats['median_ms'] / before if before > 0 else float('inf')
+        if ratio > 1.0 + threshold:
+            status = "regression"
+        elif ratio < 1.0 - threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append((name, before, stats['median_ms'], ratio, status))
+    return rows
+
+def print_comparison(rows):
+    print(f"{'benchmark':<44}{'baseline':>12}{'current':>12}{'ratio':>9}  status")
+    for name, before, now, ratio, status in rows:
+        before_text = f"{before:.4f}" if before is not None else "-"
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else "-"
+        print(f"{name:<44}{before_text:>12}{now:>12.4f}{ratio_text:>9}  {status}")
@@ -0,0 +1,100 @@
+#####################################
+# Benchmark runner
+#####################################
+# python -m benchmarks.run                            run everything, write benchmarks/results.json
+# python -m benchmarks.run --save-baseline            ... and store it as benchmarks/baseline.json
+# python -m benchmarks.run --compare                  fail (exit 1) on regressions against the baseline
+# python -m benchmarks.run -k bvh --repeat 50         only benchmarks whose name contains "bvh"
+#
+# GL benchmarks run in an offscreen context (EGL surfaceless or OSMesa, e.g. Mesa llvmpipe)
+# and are skipped with --backend none or when no context can be created.
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+
+parser = argparse.ArgumentParser(description="Motion viewer benchmarks.")
+parser.add_argument("-k", "--filter", default=None, help="run benchmarks whose name contains this")
+parser.add_argument("--repeat", type=int, default=20, help="samples per benchmark")
+parser.add_argument("--warmup", type=int, default=2)
+parser.add_argument("--backend", default="egl", choices=("egl", "osmesa", "none"))
+parser.add_argument("--out", default=os.path.join(BENCH_DIR, "results.json"))
+parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"))
+parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+parser.add_argument("--compare", action="store_true", help="compare against the baseline, exit 1 on regressions")
+parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown of the median (0.15 = 15%%)")
+args = parser.parse_args()
+
+# the PyOpenGL platform is fixed on the first OpenGL import
+if args.backend != "none":
+    os.environ["PYOPENGL_PLATFORM"] = args.backend
+    os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+# asset and shader paths are relative to the repository root
+os.chdir(ROOT)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks import harness
+
+def create_context():
+    if args.backend == "none":
+        return None, None
+    import core
+    import core.window as _window
+    from core.glwrapper import GLWrapper as glw
+    from OpenGL.GL import glGetString, GL_RENDERER
+    try:
+        window = _window.HeadlessWindow(args.backend, 256, 256)
+    except Exception as e:
+        print(f"Benchmark Warning: no {args.backend} context, GL benchmarks are skipped. {e}")
+        return None, None
+    core.PluginQueue.unregister(window)
+
+    # camera/light blocks so the draw benchmarks run real shaders with valid inputs
+    window.blocks = [core.UniformBuffer(core.CAMERA_BLOCK), core.UniformBuffer(core.LIGHT_BLOCK)]
+    for block in window.blocks:
+        block.upload()
+    glw.init()
+    window.update()
+    return window, glGetString(GL_RENDERER).decode()
+
+if __name__ == "__main__":
+    window, renderer = create_context()
+
+    # registration happens on import (after the context, some setups compile shaders)
+    from benchmarks import bench_bvh, bench_transform, bench_gl
+
+    benchmarks = harness.Suite.select(args.filter, gl_available=window is not None)
+    if not benchmarks:
+        sys.exit("benchmarks: nothing selected")
+
+    results = harness.run(benchmarks, args.repeat, args.warmup)
+    env = harness.environment(renderer)
+    harness.save(args.out, results, env)
+    print(f"results written to {args.out}")
+
+    if args.save_baseline:
+        harness.save(args.baseline, results, env)
+        print(f"baseline written to {args.baseline}")
+
+    failed = False
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"benchmarks: no baseline at {args.baseline}, run with --save-baseline first")
+        baseline = harness.load(args.baseline)
+        if baseline.get('environment', {}).get('machine') != env['machine']:
+            print("Benchmark Warning: baseline was recorded on a different machine type.")
+        rows = harness.compare(results, baseline, args.threshold)
+        harness.print_comparison(rows)
+        regressions = [row for row in rows if row[4] == "regression"]
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            failed = True
+
+    if window is not None:
+        window.release()
+    sys.exit(1 if failed else 0)
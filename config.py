@@ -0,0 +1,8 @@
+import os
+
+#####################################
+# CONFIGURATIONS
+#####################################
+
+# window backend: "glfw" (on screen), "egl" (surfaceless) or "osmesa" (software), headless ones render into an FBO
+BACKEND = os.environ.get("MV_BACKEND", "glfw")
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import time
 from OpenGL.GL import glViewport, glGetUniformLocation, glUniformMatrix4fv, GL_FALSE
 import glfw
 import numpy as np
@@ -7,7 +8,12 @@ import quaternion as qt
 from .util import *
 from .mesh import *
 from .shader import *
+from .uniformbuffer import *
 from .glwrapper import GLWrapper as glw
+from .scenegraph import SceneGraph
+from .scheduler import Scheduler
+from .profiler import Profiler
+from .glqueue import GLCommandQueue
 
 #####################################
 # PLUGIN
@@ -27,7 +33,12 @@ class Plugin(ABC):
     def init(self):
         pass
 
+    # executed at a fixed timestep (zero or more times per frame), see core.Scheduler
+    def fixed_update(self, dt):
+        pass
+
     # executed every frame
+    # Scheduler.alpha is the fraction of a fixed step elapsed since the last fixed_update
     @abstractmethod
     def update(self):
         pass
@@ -54,11 +65,29 @@ class PluginQueue:
             raise TypeError(f"Expected a Plugin instance")
         cls._plugin_queue.append(plugin)
         return
+
+    @classmethod
+    def unregister(cls, plugin):
+        if plugin in cls._plugin_queue:
+            cls._plugin_queue.remove(plugin)
     
     @classmethod
-    def call_plugins(cls, method_name):
+    def call_plugins(cls, method_name, *args):
+        if Profiler.enabled:
+            return cls._call_plugins_profiled(method_name, *args)
+        for plugin in cls._plugin_queue:
+            getattr(plugin, method_name)(*args)
+
+    # same as call_plugins, timing every plugin call and the whole phase
+    @classmethod
+    def _call_plugins_profiled(cls, method_name, *args):
+        clock = time.perf_counter_ns
+        phase_start = clock()
         for plugin in cls._plugin_queue:
-            getattr(plugin, method_name)()
+            start = clock()
+            getattr(plugin, method_name)(*args)
+            Profiler.record(type(plugin).__name__, method_name, start, clock())
+        Profiler.record("total", method_name, phase_start, clock())
 
 class SharedData:
     _data = {}
@@ -127,18 +156,15 @@ class Transform:
         # scale of transform
         self.scale = np.array(scale, dtype=np.float32)
         
-        # cached local matrix
-        self._local_matrix = None
+        # cached local matrix (preallocated, recomposed in place when dirty)
+        self._local_matrix = np.eye(4, dtype=np.float32)
         self._dirty = True
 
     def update(self):
         # update local transformation matrix
         if self._dirty:
-            self._local_matrix = get_model_matrix(self.position, self.rotation, self.scale)
+            compose_trs(self.position, self.rotation, self.scale, out=self._local_matrix)
             self._dirty = False
-
-        # update uniforms
-        glw.update()
     
     # get local transformation matrix (T * R * S)
     def get_local_matrix(self):
@@ -193,30 +219,98 @@ class Transform:
         self.euler = qt.to_euler_angles(self.rotation)
         self._dirty = True
 
+# Transform whose data lives in a row of a SceneGraph (used by Object)
+class NodeTransform(Transform):
+    def __init__(self, graph, node, position=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0), scale=(1.0, 1.0, 1.0)):
+        self._graph = graph
+        self._node = node
+        super().__init__(position, rotation, scale)
+
+    # position, rotation and scale are views/copies of the node's row
+    @property
+    def position(self):
+        return self._graph.positions[self._node]
+
+    @position.setter
+    def position(self, value):
+        self._graph.positions[self._node] = value
+        self._graph.mark_local_dirty(self._node)
+
+    # the row is always (x, y, z, w); like Transform, the getter returns the type that was assigned
+    # (np.quaternion from euler angles, a float32 (x, y, z, w) array from set_rotation_quaternion)
+    @property
+    def rotation(self):
+        if self._quaternion_type:
+            x, y, z, w = self._graph.rotations[self._node]
+            return np.quaternion(w, x, y, z)
+        return self._graph.rotations[self._node]
+
+    @rotation.setter
+    def rotation(self, value):
+        self._quaternion_type = isinstance(value, np.quaternion)
+        if self._quaternion_type:
+            self._graph.rotations[self._node] = (value.x, value.y, value.z, value.w)
+        else:
+            self._graph.rotations[self._node] = value # (x, y, z, w)
+        self._graph.mark_local_dirty(self._node)
+
+    @property
+    def scale(self):
+        return self._graph.scales[self._node]
+
+    @scale.setter
+    def scale(self, value):
+        self._graph.scales[self._node] = value
+        self._graph.mark_local_dirty(self._node)
+
+    @property
+    def _dirty(self):
+        return bool(self._graph.local_dirty[self._node])
+
+    @_dirty.setter
+    def _dirty(self, value):
+        if value:
+            self._graph.mark_local_dirty(self._node)
+
+    @property
+    def _local_matrix(self):
+        return self._graph.local[self._node]
+
+    @_local_matrix.setter
+    def _local_matrix(self, value):
+        self._graph.local[self._node] = value
+
+    def update(self):
+        # local matrices are recomposed in one batch by the graph
+        # uniforms are uploaded once per frame by the main loop (glw.update)
+        self._graph.update()
+
 class Object:
-    def __init__(self, name, position=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0), scale=(1.0, 1.0, 1.0)):
+    def __init__(self, name, position=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0), scale=(1.0, 1.0, 1.0), graph=None):
         self.name = name
         self.parent = None    # parent Object
         self.children = []    # child Objects
+
+        # this object is a handle into a row of the scene graph
+        self._graph = graph if graph is not None else SceneGraph.default()
+        self._node = self._graph.add_node()
         
         # default components
-        self.transform = Transform(position, rotation, scale)
+        self.transform = NodeTransform(self._graph, self._node, position, rotation, scale)
         self.mesh = Cube()
         self.shader = None
+        self._instance = None # (program, vao, matrix) registered with GLWrapper by init()
         
         # list of other components and plugins
         self.components = {}  # non-plugin components (meshes, etc.)
         self.plugins = {}     # plugin components
 
-        # cached world matrix
-        self._world_matrix = None
-        self._world_dirty = True
-
     # call in init() callbacks
     def init(self):
-        self.transform._local_matrix = self.transform.get_local_matrix() # init transform's local matrix
-        glw.set_instance_uniform(self.shader.program, self.mesh.vao, self.transform.get_local_matrix(), len(self.mesh.indices), "model_matrix")
-        glw.update() # initial update
+        # the world matrix is a view into the scene graph, so the registered uniform follows the object
+        matrix = self.get_world_matrix()
+        glw.set_instance_uniform(self.shader.program, self.mesh.vao, matrix, len(self.mesh.indices), "model_matrix")
+        self._instance = (self.shader.program, self.mesh.vao, matrix) # kept to unregister in release()
 
     # add a component to this object
     def add_component(self, name, comp):
@@ -271,7 +365,7 @@ class Object:
         # set new parent relationship
         obj.parent = self
         self.children.append(obj)
-        obj._mark_world_dirty()
+        self._graph.set_parent(obj._node, self._node)
         
         return obj
     
@@ -280,7 +374,7 @@ class Object:
         if obj in self.children:
             self.children.remove(obj)
             obj.parent = None
-            obj._mark_world_dirty()
+            self._graph.set_parent(obj._node, -1)
     
     # set parent object (inverse of add_child)
     def set_parent(self, obj):
@@ -293,11 +387,9 @@ class Object:
             obj.add_child(self)
     
     # mark world matrix as dirty (needs recalculation)
+    # children are picked up by the graph's level-order update
     def _mark_world_dirty(self):
-        self._world_dirty = True
-        # Propagate to children
-        for child in self.children:
-            child._mark_world_dirty()
+        self._graph.mark_world_dirty(self._node)
     
     # get local transformation matrix
     def get_local_matrix(self):
@@ -305,18 +397,8 @@ class Object:
     
     # get world transformation matrix (includes parent transforms)
     def get_world_matrix(self):
-        if self._world_dirty:
-            local = self.get_local_matrix()
-            
-            if self.parent is not None: # world = parent's world * local
-                parent_world = self.parent.get_world_matrix()
-                self._world_matrix = parent_world @ local
-            else: # no parent = world matrix is local matrix
-                self._world_matrix = local
-            
-            self._world_dirty = False
-        
-        return self._world_matrix
+        self._graph.update()
+        return self._graph.world[self._node]
     
     # get position in world space
     def get_world_position(self):
@@ -335,7 +417,7 @@ class Object:
 
     # set local rotation from quaternion             
     def set_rotation_quaternion(self, quaternion):
-        self.transform.set_rotation_quat(quaternion)
+        self.transform.set_rotation_quaternion(quaternion)
         self._mark_world_dirty()
     
     # set local scale
@@ -372,6 +454,27 @@ class Object:
         for child in self.children:
             child.update()
     
+    # free the scene graph rows and mesh references of this object and its subtree (iterative, hierarchies can be deep)
+    def release(self):
+        if self.parent is not None:
+            self.parent.remove_child(self)
+
+        stack = [self]
+        while stack:
+            obj = stack.pop()
+            stack.extend(obj.children)
+            obj.children = []
+            obj.parent = None
+            # stop drawing first: the registered matrix views the node row, the batch uses the mesh VAO
+            if obj._instance is not None:
+                glw.remove_instance(*obj._instance)
+                obj._instance = None
+            if obj._node >= 0:
+                obj._graph.remove_node(obj._node)
+                obj._node = -1
+            if obj.mesh is not None:
+                obj.mesh.release() # shared geometry, buffers go with the last reference
+
     def draw(self):
         if self.mesh:
             self.mesh.draw(self.shader.program)
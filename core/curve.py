@@ -1,11 +1,134 @@
 from OpenGL.GL import *
 import numpy as np
 from ctypes import c_void_p
+import math
 
 import core
 
+#####################################
+# BEZIER EVALUATION
+#####################################
+# control points are (..., degree + 1, 3) arrays, so one call can evaluate many curves of the same degree
+
+def bernstein_basis(degree, t):
+    # (S,) parameters -> (S, degree + 1) Bernstein weights
+    t = np.asarray(t, dtype=np.float64)[:, None]
+    k = np.arange(degree + 1)
+    binomial = np.array([math.comb(degree, i) for i in range(degree + 1)], dtype=np.float64)
+    return binomial * t ** k * (1.0 - t) ** (degree - k)
+
+def evaluate_bezier(control_points, t):
+    # (..., n + 1, 3) control points, (S,) parameters -> (..., S, 3) curve points
+    control_points = np.asarray(control_points, dtype=np.float32)
+    basis = bernstein_basis(control_points.shape[-2] - 1, t).astype(np.float32)
+    return np.einsum('sk,...kd->...sd', basis, control_points)
+
+def subdivide_bezier(control_points, t=0.5):
+    # vectorized De Casteljau split of (..., n + 1, 3) curves into left and right halves at t
+    points = np.array(control_points, dtype=np.float32)
+    n = points.shape[-2]
+    left = np.empty_like(points)
+    right = np.empty_like(points)
+    left[..., 0, :] = points[..., 0, :]
+    right[..., n - 1, :] = points[..., n - 1, :]
+    for r in range(1, n):
+        points[..., :n - r, :] = (1 - t) * points[..., :n - r, :] + t * points[..., 1:n - r + 1, :]
+        left[..., r, :] = points[..., 0, :]
+        right[..., n - 1 - r, :] = points[..., n - 1 - r, :]
+    return left, right
+
+def bezier_flatness(control_points):
+    # (..., n + 1, 3) -> (...,) max distance of the inner control points from the chord
+    control_points = np.asarray(control_points, dtype=np.float32)
+    start = control_points[..., :1, :]
+    chord = control_points[..., -1:, :] - start
+    offsets = control_points[..., 1:-1, :] - start
+    length2 = np.maximum(np.sum(chord * chord, axis=-1, keepdims=True), 1e-12)
+    projected = np.sum(offsets * chord, axis=-1, keepdims=True) / length2
+    distance = np.linalg.norm(offsets - projected * chord, axis=-1)
+    return distance.max(axis=-1, initial=0.0)
+
+def sample_bezier_adaptive(control_points, tolerance=1e-3, max_depth=10):
+    """
+    Flatness-based subdivision of (C, n + 1, 3) curves (or a single (n + 1, 3) curve).
+    All pending segments of all curves are split together, one depth level at a time.
+    Returns a list of (S_c, 3) polylines, one per curve (a single array for a single curve).
+    """
+    control_points = np.asarray(control_points, dtype=np.float32)
+    single = control_points.ndim == 2
+    if single:
+        control_points = control_points[None]
+
+    num_curves = len(control_points)
+    pending = control_points
+    curve_ids = np.arange(num_curves)
+    t0 = np.zeros(num_curves)
+    span = np.ones(num_curves)
+    done_ids, done_t0, done_start = [], [], []
+
+    for depth in range(max_depth + 1):
+        flat = bezier_flatness(pending) <= tolerance
+        if depth == max_depth:
+            flat[:] = True
+
+        # flat segments contribute their start point
+        done_ids.append(curve_ids[flat])
+        done_t0.append(t0[flat])
+        done_start.append(pending[flat, 0])
+
+        if flat.all():
+            break
+        split = ~flat
+        left, right = subdivide_bezier(pending[split])
+        half = span[split] * 0.5
+        pending = np.concatenate([left, right])
+        curve_ids = np.concatenate([curve_ids[split], curve_ids[split]])
+        t0 = np.concatenate([t0[split], t0[split] + half])
+        span = np.concatenate([half, half])
+
+    ids = np.concatenate(done_ids)
+    starts = np.concatenate(done_start)
+    order = np.lexsort((np.concatenate(done_t0), ids))
+    ids = ids[order]
+    starts = starts[order]
+
+    # split per curve and close each polyline with its end point
+    bounds = np.searchsorted(ids, np.arange(num_curves + 1))
+    polylines = [
+        np.concatenate([starts[bounds[c]:bounds[c + 1]], control_points[c, -1:]]).astype(np.float32)
+        for c in range(num_curves)
+    ]
+    return polylines[0] if single else polylines
+
+def sample_curves(curves):
+    """
+    Samples many Curve objects at once, one evaluation per (degree, samples) group.
+    Returns a list of vertex arrays in the order of `curves`.
+    """
+    results = [None] * len(curves)
+    groups = {}
+    for i, curve in enumerate(curves):
+        if curve.degree <= 1 or curve.tolerance is not None:
+            results[i] = curve.sample_curve()
+        else:
+            groups.setdefault((curve.degree, curve.samples), []).append(i)
+
+    for (degree, samples), indices in groups.items():
+        control_points = np.stack([curves[i].get_control_polygon() for i in indices])
+        points = evaluate_bezier(control_points, np.linspace(0.0, 1.0, samples + 1))
+        for i, curve_points in zip(indices, points):
+            results[i] = curve_points
+
+    return results
+
+#####################################
+# CURVES
+#####################################
+
 class Curve:
-    def __init__(self, start_pos=(0.0, 0.0, 0.0), end_pos=(1.0, 0.0, 0.0), degree=1, color=(1,1,1), samples=100):
+    _shader_program = None # built-in program, compiled once and shared by every Curve
+
+    def __init__(self, start_pos=(0.0, 0.0, 0.0), end_pos=(1.0, 0.0, 0.0), degree=1, color=(1,1,1), samples=100, tolerance=None):
         # basic curve properties
         self.start_pos = np.array(start_pos, dtype=np.float32)
         self.end_pos = np.array(end_pos, dtype=np.float32)
@@ -24,6 +147,7 @@ class Curve:
         self.vao = None
         self.vbo = None
         self.samples = samples
+        self.tolerance = tolerance # flatness tolerance, adaptive sampling if set
         self.vertex_count = 2
         
         # built-in shader properties
@@ -45,20 +169,23 @@ class Curve:
             
         return points
     
-    def find_curve_point(self, t): # bezier curve point by default (De Casteljau's Algorithm)
-        pts = [self.start_pos] + self.control_points + [self.end_pos] # build the entire curve with all points
-        points = np.array(pts, dtype=np.float32) # create a copy to prevent mutation
-        n = len(points)
-        for r in range(1, n): # De Casteljau's Algorithm
-            points[:n-r] = (1-t) * points[:n-r] + t * points[1:n-r+1]
-        return points[0]
+    # (degree + 1, 3) start, control and end points
+    def get_control_polygon(self):
+        return np.array([self.start_pos] + self.control_points + [self.end_pos], dtype=np.float32)
+
+    def find_curve_point(self, t): # bezier curve point by default (Bernstein form)
+        return evaluate_bezier(self.get_control_polygon(), [t])[0]
 
     def sample_curve(self):
         if self.degree == 1: # degree = 1, simple line
             return np.array([self.start_pos, self.end_pos], dtype=np.float32)
+
+        # straight sections get few vertices
+        if self.tolerance is not None:
+            return sample_bezier_adaptive(self.get_control_polygon(), self.tolerance)
         
-        vertices = [self.find_curve_point(i / self.samples) for i in range(self.samples + 1)] # get each segment of curve point
-        return np.array(vertices, dtype=np.float32)
+        # all samples in one evaluation
+        return evaluate_bezier(self.get_control_polygon(), np.linspace(0.0, 1.0, self.samples + 1))
     
     def init_curve(self):                        
         vertices = self.sample_curve() # curve segmentation with `self.samples`
@@ -93,6 +220,9 @@ class Curve:
         glDrawArrays(GL_LINE_STRIP, 0, self.vertex_count)
         
     def create_shader(self):
+        if Curve._shader_program is not None:
+            return Curve._shader_program
+
         # built in shader for curves
         vertex_src = """
         #version 330 core
@@ -132,9 +262,181 @@ class Curve:
         glDeleteShader(vertex_shader)
         glDeleteShader(fragment_shader)
         
+        Curve._shader_program = program
         return program
 
         
 class Line(Curve):
-    def __init__(self, start_pos=(0,0,0), end_pos=(1,0,0), samples=1):
-        super().__init__(start_pos=start_pos, end_pos=end_pos, degree=1, samples=samples)
\ No newline at end of file
+    def __init__(self, start_pos=(0,0,0), end_pos=(1,0,0), color=(1,1,1), samples=1):
+        super().__init__(start_pos=start_pos, end_pos=end_pos, degree=1, color=color, samples=samples)
+
+#####################################
+# BATCHED LINE RENDERER
+#####################################
+
+class LineBatch:
+    """
+    Packs many line segments (bones, sampled curves) into one dynamic vertex buffer
+    with per-vertex color, drawn with a single GL_LINES call and one shared shader.
+    Segments are addressed by integer handles; only the changed range is re-uploaded.
+    """
+    _shared = None
+
+    VERTEX_SIZE = 6 # x, y, z, r, g, b
+
+    def __init__(self, capacity=1024):
+        # two vertices per segment
+        self.vertices = np.zeros((capacity * 2, self.VERTEX_SIZE), dtype=np.float32)
+        self.count = 0 # segments in use (including freed ones below the last used handle)
+        self._free = set()
+
+        # changed segment range [lo, hi) since the last upload
+        self._dirty_lo = 0
+        self._dirty_hi = 0
+
+        # gl related variables, created on first draw
+        self.shader = None
+        self.vao = None
+        self.vbo = None
+        self._gpu_capacity = 0
+
+    # batch shared by joints and curves
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            cls._shared = LineBatch()
+        return cls._shared
+
+    @property
+    def capacity(self):
+        return len(self.vertices) // 2
+
+    #####################################
+    # SEGMENTS
+    #####################################
+
+    # add N segments at once, returns their handles (freed handles are reused first)
+    def add_segments(self, starts, ends, color=(1, 1, 1)):
+        starts = np.asarray(starts, dtype=np.float32).reshape(-1, 3)
+        ends = np.asarray(ends, dtype=np.float32).reshape(-1, 3)
+        n = len(starts)
+
+        reused = [self._free.pop() for _ in range(min(n, len(self._free)))]
+        appended = n - len(reused)
+        if self.count + appended > self.capacity:
+            self._grow(max(self.count + appended, 2 * self.capacity))
+
+        handles = np.concatenate([np.array(reused, dtype=np.int64), np.arange(self.count, self.count + appended)])
+        self.count += appended
+        self.set_segments(handles, starts, ends, color)
+        return handles
+
+    def add_segment(self, start, end, color=(1, 1, 1)):
+        return int(self.add_segments(start, end, color)[0])
+
+    # consecutive points of a polyline as segments
+    def add_polyline(self, points, color=(1, 1, 1)):
+        points = np.asarray(points, dtype=np.float32)
+        return self.add_segments(points[:-1], points[1:], color)
+
+    def add_curve(self, curve):
+        return self.add_polyline(curve.sample_curve(), curve.color)
+
+    # update positions (and optionally colors) of many segments in one call
+    def set_segments(self, handles, starts, ends, color=None):
+        handles = np.asarray(handles, dtype=np.int64)
+        if len(handles) == 0:
+            return
+        view = self.vertices.reshape(-1, 2, self.VERTEX_SIZE)
+        view[handles, 0, :3] = np.asarray(starts, dtype=np.float32).reshape(-1, 3)
+        view[handles, 1, :3] = np.asarray(ends, dtype=np.float32).reshape(-1, 3)
+        if color is not None:
+            view[handles, :, 3:] = np.asarray(color, dtype=np.float32).reshape(-1, 1, 3)
+        self._mark_dirty(int(handles.min()), int(handles.max()) + 1)
+
+    # freed segments collapse to a point until reused, freed ones at the end are dropped from the draw
+    def remove_segments(self, handles):
+        handles = [int(h) for h in handles]
+        if not handles:
+            return
+        view = self.vertices.reshape(-1, 2, self.VERTEX_SIZE)
+        view[handles, :, :3] = 0.0
+        self._free.update(handles)
+        self._mark_dirty(min(handles), max(handles) + 1)
+
+        while self.count > 0 and (self.count - 1) in self._free:
+            self.count -= 1
+            self._free.discard(self.count)
+
+    def remove_segment(self, handle):
+        self.remove_segments([handle])
+
+    def clear(self):
+        self.count = 0
+        self._free = set()
+        self._dirty_lo = self._dirty_hi = 0
+
+    def _mark_dirty(self, lo, hi):
+        if self._dirty_hi <= self._dirty_lo:
+            self._dirty_lo, self._dirty_hi = lo, hi
+        else:
+            self._dirty_lo = min(self._dirty_lo, lo)
+            self._dirty_hi = max(self._dirty_hi, hi)
+
+    def _grow(self, capacity):
+        vertices = np.zeros((capacity * 2, self.VERTEX_SIZE), dtype=np.float32)
+        vertices[:len(self.vertices)] = self.vertices
+        self.vertices = vertices
+
+    #####################################
+    # GL
+    #####################################
+
+    def init(self):
+        self.shader = core.Shader("shaders/line/line.vert", "shaders/line/line.frag")
+
+        self.vao = glGenVertexArrays(1)
+        self.vbo = glGenBuffers(1)
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+
+        stride = self.VERTEX_SIZE * 4
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, c_void_p(0))  # position
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, stride, c_void_p(12)) # color
+        glEnableVertexAttribArray(1)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(0)
+
+    def upload(self):
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        if self._gpu_capacity != self.capacity:
+            # (re)allocate the whole buffer
+            glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_DYNAMIC_DRAW)
+            self._gpu_capacity = self.capacity
+        elif self._dirty_hi > self._dirty_lo:
+            # only the changed range
+            changed = self.vertices[2 * self._dirty_lo:2 * self._dirty_hi]
+            glBufferSubData(GL_ARRAY_BUFFER, changed.strides[0] * 2 * self._dirty_lo, changed.nbytes, changed)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self._dirty_lo = self._dirty_hi = 0
+
+    def draw(self, view_matrix=None, projection_matrix=None):
+        if self.count == 0:
+            return
+        if self.vao is None:
+            self.init()
+        self.upload()
+
+        # the line shader reads the camera from the shared Camera block,
+        # explicit matrices are only needed for shaders without it
+        glUseProgram(self.shader.program)
+        if view_matrix is not None:
+            self.shader.set_uniform_matrix4fv("view_matrix", view_matrix)
+        if projection_matrix is not None:
+            self.shader.set_uniform_matrix4fv("projection_matrix", projection_matrix)
+
+        glBindVertexArray(self.vao)
+        glDrawArrays(GL_LINES, 0, 2 * self.count)
+        glBindVertexArray(0)
\ No newline at end of file
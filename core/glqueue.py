@@ -0,0 +1,59 @@
+import threading
+import time
+from collections import deque
+
+#####################################
+# MAIN THREAD COMMAND QUEUE
+#####################################
+
+class GLCommandQueue:
+    """
+    GL calls are only valid on the thread owning the context (the main loop).
+    Worker threads submit() callables here; the main loop runs them in flush(),
+    once per frame before the plugin updates, so their results appear at a frame boundary.
+    """
+    budget_ms = None # time limit per flush, None = run everything queued
+
+    _commands = deque()
+    _lock = threading.Lock()
+    _main_thread = threading.main_thread()
+
+    @classmethod
+    def submit(cls, command, *args):
+        with cls._lock:
+            cls._commands.append((command, args))
+
+    # run the command now if already on the main thread, queue it otherwise
+    @classmethod
+    def call(cls, command, *args):
+        if threading.current_thread() is cls._main_thread:
+            command(*args)
+        else:
+            cls.submit(command, *args)
+
+    @classmethod
+    def flush(cls, budget_ms=None):
+        budget_ms = cls.budget_ms if budget_ms is None else budget_ms
+        deadline = None if budget_ms is None else time.perf_counter() + budget_ms * 1e-3
+
+        executed = 0
+        while True:
+            with cls._lock:
+                if not cls._commands:
+                    break
+                command, args = cls._commands.popleft()
+            command(*args)
+            executed += 1
+            if deadline is not None and time.perf_counter() >= deadline:
+                break # the rest waits for the next frame
+        return executed
+
+    @classmethod
+    def pending(cls):
+        with cls._lock:
+            return len(cls._commands)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._commands.clear()
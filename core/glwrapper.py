@@ -1,18 +1,100 @@
 from OpenGL.GL import *
 import numpy as np
 import inspect
+from ctypes import c_void_p
+
+from .shader import Shader
+from .scenegraph import SceneGraph
+
+# per-instance model matrix attribute (mat4 = 4 consecutive locations), see shaders/std/std.vert
+INSTANCE_MATRIX_LOCATION = 2
+INSTANCE_MATRIX_NAME = "instance_matrix"
+INSTANCED_FLAG_NAME = "instanced"
+
+# instances sharing a VAO, drawn with a single glDrawElementsInstanced
+class InstanceBatch:
+    def __init__(self, vao, idx_count):
+        self.vao = vao
+        self.idx_count = idx_count
+        self.matrices = [] # model matrices (row-major 4x4 arrays, read at draw time)
+
+        # staging buffers, (capacity, 4, 4)
+        # rows holds the matrices of the last upload, new ones are gathered into _gathered and compared
+        self.rows = np.zeros((0, 4, 4), dtype=np.float32)
+        self._gathered = np.zeros((0, 4, 4), dtype=np.float32)
+        self.columns = np.zeros((0, 4, 4), dtype=np.float32) # column-major for the mat4 attribute
+        self.count = 0 # instances in the buffer
+
+        self.vbo = None # per-instance attribute buffer, created on first draw
+        self.buffer_capacity = 0 # instances allocated in vbo
+
+    def release(self):
+        if self.vbo is not None:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = None
+            self.buffer_capacity = 0
+
+    # gather the model matrices, returns True if they differ from the last staged ones
+    def stage(self):
+        count = len(self.matrices)
+        if count > len(self.rows):
+            capacity = max(count, 2 * len(self.rows))
+            self.rows = np.zeros((capacity, 4, 4), dtype=np.float32)
+            self._gathered = np.zeros((capacity, 4, 4), dtype=np.float32)
+            self.columns = np.zeros((capacity, 4, 4), dtype=np.float32)
+            self.count = 0
+
+        gathered = self._gathered[:count]
+        np.stack(self.matrices, out=gathered)
+        if count == self.count and np.array_equal(gathered, self.rows[:count]):
+            return False
+
+        self.rows, self._gathered = self._gathered, self.rows
+        self.columns[:count] = self.rows[:count].transpose(0, 2, 1)
+        self.count = count
+        return True
+
+    # stage and upload into the bound vbo: reallocated when the capacity grew, sub-data when changed
+    def upload(self):
+        changed = self.stage()
+        if self.buffer_capacity < len(self.columns):
+            glBufferData(GL_ARRAY_BUFFER, self.columns.nbytes, self.columns, GL_DYNAMIC_DRAW)
+            self.buffer_capacity = len(self.columns)
+        elif changed:
+            glBufferSubData(GL_ARRAY_BUFFER, 0, self.count * 64, self.columns[:self.count])
+        return self.count
+
+    # binds the VAO with its instance attributes pointing at this batch's vbo
+    # the VAO is shared (GeometryCache) by every program drawing the mesh, and each program has its
+    # own batch, so the attribute pointers are re-issued on every bind instead of once at setup
+    def bind(self):
+        if self.vbo is None:
+            self.vbo = glGenBuffers(1)
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        for i in range(4): # one vec4 column per location
+            location = INSTANCE_MATRIX_LOCATION + i
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, 4, GL_FLOAT, GL_FALSE, 64, c_void_p(16 * i))
+            glVertexAttribDivisor(location, 1)
 
 # an OpenGL wrapper class that is always at the end of the plugin queue.
 class GLWrapper:
-    _uniforms = {} # dictionary of { PROGRAM : { ULOC_1 : (UNIFORM_NAME_1, UNIFORM_1), ULOC_2 : (UNIFORM_NAME_2, UNIFORM_2), ... } }
-    _instance_uniforms = {} # { PROGRAM : [ (ULOC_1, VAO_1, UNIFORM_1, IDX_COUNT_1), (ULOC_2, VAO_2, UNIFORM_2, IDX_COUNT_2) ... ] }
+    _uniforms = {} # dictionary of { PROGRAM : { ULOC_1 : (UNIFORM_NAME_1, UNIFORM_1, UPLOAD_1, SNAPSHOT_1), ULOC_2 : (UNIFORM_NAME_2, UNIFORM_2, UPLOAD_2, SNAPSHOT_2), ... } }
+    _instance_uniforms = {} # { PROGRAM : [ (ULOC_1, VAO_1, UNIFORM_1, IDX_COUNT_1, UPLOAD_1), (ULOC_2, VAO_2, UNIFORM_2, IDX_COUNT_2, UPLOAD_2) ... ] }
+    _instance_batches = {} # { PROGRAM : { VAO : InstanceBatch } }
+    _instancing = {} # { PROGRAM : ULOC of the 'instanced' flag, or None if the program has no instance attribute }
+
+    # upload counters of update_uniforms, see get_upload_stats()
+    _uploaded = 0
+    _skipped = 0
     
     #####################################
     # WRAPPER FUNCTIONS
     #####################################
     
     @classmethod
-    def _save_uniform(cls, program, uloc, name, uniform):
+    def _save_uniform(cls, program, uloc, name, uniform, upload):
         # print a warning if called directly
         caller = inspect.stack()[1].function
         if caller != "set_uniform":
@@ -24,10 +106,12 @@ class GLWrapper:
             cls._uniforms[program] = {}
         
         # add to dictionary
-        cls._uniforms[program][uloc] = (name, uniform)
+        # the snapshot holds the last uploaded value, compared against the live value every frame
+        snapshot = np.array(uniform, dtype=np.float64)
+        cls._uniforms[program][uloc] = (name, uniform, upload, snapshot)
         
     @classmethod
-    def _save_instance_uniform(cls, program, uloc, vao, uniform, idx_count):
+    def _save_instance_uniform(cls, program, uloc, vao, uniform, idx_count, upload):
         # print a warning if called directly
         caller = inspect.stack()[1].function
         if caller != "set_instance_uniform":
@@ -37,12 +121,37 @@ class GLWrapper:
         # check if key does not exist
         if program not in cls._instance_uniforms:
             cls._instance_uniforms[program] = []
+            cls._instance_batches[program] = {}
             
-        cls._instance_uniforms[program].append((uloc, vao, uniform, idx_count))
+        cls._instance_uniforms[program].append((uloc, vao, uniform, idx_count, upload))
+
+        # group instances by mesh (VAO) for instanced drawing
+        batches = cls._instance_batches[program]
+        if vao not in batches:
+            batches[vao] = InstanceBatch(vao, idx_count)
+        batches[vao].matrices.append(uniform)
+
+    @classmethod
+    def get_uploader(cls, program, name):
+        # (location, upload(value)) from the shader's cached uniform table
+        # programs not created through core.Shader fall back to a location query and the generic update_uniform
+        # a missing uniform gets location -1, which GL ignores on upload
+        shader = Shader.from_program(program)
+        if shader is not None:
+            info = shader.get_uniform(name)
+            if info is not None and info.setter is not None:
+                return info.location, info.upload
+            uloc = info.location if info is not None else -1
+        else:
+            uloc = glGetUniformLocation(program, name)
+
+        def upload(uniform):
+            return cls.update_uniform(uloc, uniform)
+        return uloc, upload
 
     @classmethod
     def set_uniform(cls, program, uniform, name="name"):
-        uloc = glGetUniformLocation( program, name )
+        uloc, upload = cls.get_uploader(program, name)
         if uloc < 0:
             print(f"{inspect.currentframe().f_code.co_name}: Unable to locate uniform {name}")
             return
@@ -51,12 +160,12 @@ class GLWrapper:
         glUseProgram(program)
         
         # init update uniform
-        if cls.update_uniform(uloc, uniform):
-            cls._save_uniform(program, uloc, name, uniform) # append to _uniforms
+        if upload(uniform) is not False:
+            cls._save_uniform(program, uloc, name, uniform, upload) # append to _uniforms
             
     @classmethod
     def set_instance_uniform(cls, program, vao, uniform, idx_count, name="name"):
-        uloc = glGetUniformLocation( program, name )
+        uloc, upload = cls.get_uploader(program, name)
         if uloc < 0:
             print(f"{inspect.currentframe().f_code.co_name}: Unable to locate uniform {name}")
             
@@ -64,11 +173,53 @@ class GLWrapper:
         glUseProgram(program)
         
         # init update instance uniform
-        if cls.update_uniform(uloc, uniform):
-            cls._save_instance_uniform(program, uloc, vao, uniform, idx_count) # append to _instance_uniforms
+        if upload(uniform) is not False:
+            cls._save_instance_uniform(program, uloc, vao, uniform, idx_count, upload) # append to _instance_uniforms
     
+    # stop drawing one instance registered with set_instance_uniform (matched by identity of `uniform`)
+    @classmethod
+    def remove_instance(cls, program, vao, uniform):
+        entries = cls._instance_uniforms.get(program, [])
+        for i, entry in enumerate(entries):
+            if entry[1] == vao and entry[2] is uniform:
+                del entries[i]
+                break
+        else:
+            return False
+
+        batches = cls._instance_batches[program]
+        batch = batches[vao]
+        del batch.matrices[next(i for i, matrix in enumerate(batch.matrices) if matrix is uniform)]
+        if not batch.matrices:
+            batch.release()
+            del batches[vao]
+        if not entries:
+            del cls._instance_uniforms[program]
+            del cls._instance_batches[program]
+        return True
+
+    # stop tracking a uniform registered with set_uniform
+    @classmethod
+    def remove_uniform(cls, program, name):
+        uniforms = cls._uniforms.get(program, {})
+        for uloc, entry in list(uniforms.items()):
+            if entry[0] == name:
+                del uniforms[uloc]
+        if program in cls._uniforms and not uniforms:
+            del cls._uniforms[program]
+
+    # drop every uniform and instance registered for `program` (e.g. before deleting it)
+    @classmethod
+    def unregister(cls, program):
+        for batch in cls._instance_batches.pop(program, {}).values():
+            batch.release()
+        cls._instance_uniforms.pop(program, None)
+        cls._uniforms.pop(program, None)
+        cls._instancing.pop(program, None)
+
     @classmethod
     def update_uniform(cls, uloc, uniform):
+        # generic upload by value type, used when the uniform type is unknown
         # scalars
         if isinstance(uniform, bool):
             glUniform1i(uloc, int(uniform))
@@ -84,7 +235,7 @@ class GLWrapper:
         
         # sequences
         if isinstance(uniform, (tuple, list, np.ndarray)):
-            arr = np.array(uniform)
+            arr = np.asarray(uniform, dtype=np.float32) # no copy for float32 arrays
 
             # VECTOR uniforms
             if arr.ndim == 1:  
@@ -125,33 +276,85 @@ class GLWrapper:
             print(f"No uniforms found for program {program}")
             uniforms = {}
             
-        # update all uniforms in 'program'
+        # upload only the uniforms whose value changed since the last upload
+        # GL keeps uniform values per program, so skipped ones stay valid
         glUseProgram(program)
-        for uloc, uniform_pair in uniforms.items():
-            cls.update_uniform(uloc, uniform_pair[1])
+        for name, uniform, upload, snapshot in uniforms.values():
+            if np.array_equal(snapshot, uniform):
+                cls._skipped += 1
+                continue
+            upload(uniform)
+            snapshot[...] = uniform
+            cls._uploaded += 1
+
+    @classmethod
+    def invalidate_uniforms(cls, program=None):
+        # force a re-upload on the next update (e.g. after writing a location directly)
+        # NaN never compares equal, so every snapshot counts as changed
+        programs = cls._uniforms.keys() if program is None else [program]
+        for p in programs:
+            for uniform_entry in cls._uniforms.get(p, {}).values():
+                uniform_entry[3][...] = np.nan
+
+    @classmethod
+    def get_upload_stats(cls):
+        total = cls._uploaded + cls._skipped
+        return {
+            'uploaded': cls._uploaded,
+            'skipped': cls._skipped,
+            'skip_rate': cls._skipped / total if total else 0.0,
+        }
+
+    @classmethod
+    def reset_upload_stats(cls):
+        cls._uploaded = 0
+        cls._skipped = 0
+            
+    @classmethod
+    def get_instancing(cls, program):
+        # 'instanced' flag location if the program reads its model matrix from the instance attribute
+        if program not in cls._instancing:
+            uloc, _ = cls.get_uploader(program, INSTANCED_FLAG_NAME)
+            has_attribute = glGetAttribLocation(program, INSTANCE_MATRIX_NAME) == INSTANCE_MATRIX_LOCATION
+            cls._instancing[program] = uloc if (uloc >= 0 and has_attribute) else None
+        return cls._instancing[program]
             
     @classmethod
     def draw_instances(cls, program):
         # notify which program (safety check)  
         glUseProgram(program)
         
-        # loop over each instance registered for this program
-        instance_dicts = cls._instance_uniforms.get(program)
-        if instance_dicts is None:
+        # loop over each mesh registered for this program
+        batches = cls._instance_batches.get(program)
+        if batches is None:
             # nothing to draw
             glBindVertexArray(0)
             return
+
+        flag_loc = cls.get_instancing(program)
+        if flag_loc is None:
+            # program without instance attribute, one draw per instance
+            for i_uloc, i_vao, i_uniform, i_idx_count, i_upload in cls._instance_uniforms[program]:
+                glBindVertexArray(i_vao)
+                i_upload(i_uniform)
+            
+                # draw elements using bound VAO and previously stored index count
+                # assumes the VAO has its index buffer set up
+                glDrawElements(GL_TRIANGLES, i_idx_count, GL_UNSIGNED_INT, None)
+            glBindVertexArray(0)
+            return
         
-        # update per instance uniforms
-        for i_uloc, i_vao, i_uniform, i_idx_count in cls._instance_uniforms[program]:
-            glBindVertexArray(i_vao)
-            cls.update_uniform(i_uloc, i_uniform)
-        
-            # draw elements using bound VAO and previously stored index count
-            # assumes the VAO has its index buffer set up
-            glDrawElements(GL_TRIANGLES, i_idx_count, GL_UNSIGNED_INT, None)
+        # one instanced draw per mesh
+        glUniform1i(flag_loc, 1)
+        for batch in batches.values():
+            # gather all model matrices of this mesh into the per-instance buffer (uploaded only if they moved)
+            batch.bind()
+            count = batch.upload()
+            glDrawElementsInstanced(GL_TRIANGLES, batch.idx_count, GL_UNSIGNED_INT, None, count)
+        glUniform1i(flag_loc, 0)
             
         # unbind VAO for safety
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
         glBindVertexArray(0)
         return
     
@@ -187,9 +390,15 @@ class GLWrapper:
     @classmethod
     # executed every frame
     def update(self):
-        # update uniforms every frame
-        for program in GLWrapper._uniforms.keys():
-            GLWrapper.update_uniforms(program)
+        # registered model matrices are views of scene graph rows, recompose the ones moved this frame first
+        SceneGraph.update_all()
+
+        # upload changed uniforms once per frame per program, then draw
+        # programs may only have instances (camera/light data comes from uniform blocks)
+        programs = dict.fromkeys([*GLWrapper._uniforms, *GLWrapper._instance_batches])
+        for program in programs:
+            if program in GLWrapper._uniforms:
+                GLWrapper.update_uniforms(program)
             GLWrapper.draw_instances(program)
 
     # # executed at end of frame, after all plugin updates have looped
@@ -2,7 +2,7 @@ import core
 import numpy as np
 import quaternion as qt
 from core.mesh import Sphere
-from core.curve import Line
+from core.curve import LineBatch
 
 class Joint(core.Object):
     def __init__(self, name, position=(0.0, 0.0, 0.0)):
@@ -16,29 +16,40 @@ class Joint(core.Object):
         # Channel parsing data
         self.channels = []       # e.g., ['Xposition', 'Zrotation', ...]
         self.channel_order = ""  # e.g., "ZXY"
+
+        # LineBatch handle -> child offset of each bone created by create_bone_connection
+        self.bone_segments = {}
         
         # 3. Default Visualization
-        # Automatically add a Sphere component so we can see the joint
-        self.add_component("joint_viz", Sphere(scale=(0.2, 0.2, 0.2)))
+        # Sphere mesh so we can see the joint (meshes are not components)
+        self.mesh = Sphere(lat=16, lon=16)
 
     def create_bone_connection(self, child_offset):
         """
         Creates a visual line connecting this joint to its child.
+        The line is a segment of the shared LineBatch (one buffer, one draw call for all bones).
         """
-        # Create a line from local (0,0,0) to the child's local offset
-        # We assume child_offset is the relative position of the child
-        bone_visual = Line(
-            start_pos=(0, 0, 0), 
-            end_pos=child_offset, 
-            color=(0.7, 0.7, 0.7)
-        )
-        
-        # Initialize the curve buffers (required by your curve.py)
-        bone_visual.init_curve()
+        batch = LineBatch.shared()
+        start, end = self.get_bone_endpoints(child_offset)
+        handle = batch.add_segment(start, end, color=(0.7, 0.7, 0.7))
         
-        # Add as a component. unique name based on offset to avoid conflicts
-        comp_name = f"bone_to_{child_offset[0]:.2f}_{child_offset[1]:.2f}"
-        self.add_component(comp_name, bone_visual)
+        # remember the offset so the segment can follow the joint
+        self.bone_segments[handle] = np.array(child_offset, dtype=np.float32)
+        return handle
+
+    # world space endpoints of a bone from this joint to child_offset (in local space)
+    def get_bone_endpoints(self, child_offset):
+        world = self.get_world_matrix()
+        start = world[:3, 3]
+        end = world[:3, :3] @ np.asarray(child_offset, dtype=np.float32) + start
+        return start, end
+
+    # move this joint's bone segments to its current world pose
+    def update_bone_connections(self):
+        batch = LineBatch.shared()
+        for handle, child_offset in self.bone_segments.items():
+            start, end = self.get_bone_endpoints(child_offset)
+            batch.set_segments([handle], start, end)
 
     def set_pose_from_frame(self, frame_data, data_ptr):
         """
@@ -83,7 +94,15 @@ class Joint(core.Object):
                 q = qt.from_euler_angles(0, 0, angle_rad)
             final_quat = final_quat * q
             
-        # Update Core Transform
-        self.transform.set_rotation_quat(qt.as_float_array(final_quat))
+        # Update Core Transform (as x, y, z, w, marks the world matrix dirty)
+        w, x, y, z = qt.as_float_array(final_quat)
+        self.set_rotation_quaternion((x, y, z, w))
         
         return data_ptr
+
+    def set_world_matrix(self, matrix):
+        """
+        Poses the joint directly with a world matrix (e.g. from batched FK or the pose cache),
+        bypassing the local transform chain. The matrix is copied into the scene graph.
+        """
+        self._graph.set_world_matrices(self._node, matrix)
@@ -0,0 +1,223 @@
+import numpy as np
+
+from .skeleton import ROTATION_ORDERS
+
+#####################################
+# BATCHED FORWARD KINEMATICS
+#####################################
+# all functions work on whole (frames, joints) blocks at once.
+# matrices are row-major (column vectors), same convention as core.util.get_model_matrix.
+
+def axis_rotation(axis, angles):
+    # (...,) angles in radians -> (..., 3, 3) rotation about "X", "Y" or "Z"
+    c = np.cos(angles)
+    s = np.sin(angles)
+    R = np.zeros(angles.shape + (3, 3), dtype=np.float32)
+    if axis == "X":
+        R[..., 0, 0] = 1
+        R[..., 1, 1] = c; R[..., 1, 2] = -s
+        R[..., 2, 1] = s; R[..., 2, 2] = c
+    elif axis == "Y":
+        R[..., 0, 0] = c; R[..., 0, 2] = s
+        R[..., 1, 1] = 1
+        R[..., 2, 0] = -s; R[..., 2, 2] = c
+    else:
+        R[..., 0, 0] = c; R[..., 0, 1] = -s
+        R[..., 1, 0] = s; R[..., 1, 1] = c
+        R[..., 2, 2] = 1
+    return R
+
+def euler_to_matrix(angles, order):
+    """
+    (..., 3) euler angles in degrees, listed in rotation `order` (e.g. "ZXY") -> (..., 3, 3).
+    Follows the BVH convention R = R_order[0] @ R_order[1] @ R_order[2].
+    """
+    radians = np.radians(np.asarray(angles, dtype=np.float32))
+    R = axis_rotation(order[0], radians[..., 0])
+    R = R @ axis_rotation(order[1], radians[..., 1])
+    R = R @ axis_rotation(order[2], radians[..., 2])
+    return R
+
+def pad_frames(skeleton, frames):
+    # (F, C) motion rows with a zero column appended, so channel index -1 (no channel) reads 0
+    frames = np.asarray(frames, dtype=np.float32).reshape(-1, skeleton.num_channels)
+    padded = np.zeros((len(frames), skeleton.num_channels + 1), dtype=np.float32)
+    padded[:, :-1] = frames
+    return padded
+
+def local_translations(skeleton, padded, offsets=None):
+    # (F, J, 3) local translations: rest offsets, replaced by position channels where present
+    if offsets is None:
+        offsets = skeleton.offsets
+    translations = np.broadcast_to(offsets, (len(padded), skeleton.num_joints, 3)).astype(np.float32)
+    has_position = skeleton.position_channels >= 0
+    if has_position.any():
+        translations[:, has_position] = padded[:, skeleton.position_channels[has_position]]
+    return translations
+
+def local_transforms(skeleton, frames, offsets=None):
+    """
+    (F, C) motion rows -> local rotations (F, J, 3, 3) and translations (F, J, 3).
+    Joints without position channels use their rest offset, missing rotation channels are 0.
+    `offsets` overrides the skeleton's rest offsets, (J, 3) or per row (F, J, 3), so clips
+    with the same topology but different bone lengths can share one call.
+    """
+    padded = pad_frames(skeleton, frames)
+    num_frames = len(padded)
+    translations = local_translations(skeleton, padded, offsets)
+
+    # rotations, one batch per rotation order present in the skeleton
+    rotations = np.empty((num_frames, skeleton.num_joints, 3, 3), dtype=np.float32)
+    angles = padded[:, skeleton.rotation_channels] # (F, J, 3)
+    for code in np.unique(skeleton.rotation_order):
+        joints = np.flatnonzero(skeleton.rotation_order == code)
+        rotations[:, joints] = euler_to_matrix(angles[:, joints], ROTATION_ORDERS[code])
+
+    return rotations, translations
+
+def accumulate(skeleton, local_rotations, local_translations):
+    """
+    Walks the hierarchy level by level (topological order) and returns
+    world rotations (F, J, 3, 3) and world positions (F, J, 3).
+    """
+    world_rotations = np.empty_like(local_rotations)
+    world_positions = np.empty_like(local_translations)
+
+    for joints in skeleton.levels():
+        parents = skeleton.parent_index[joints]
+        roots = parents < 0
+        if roots.all():
+            world_rotations[:, joints] = local_rotations[:, joints]
+            world_positions[:, joints] = local_translations[:, joints]
+            continue
+
+        # child = parent_world * local
+        parent_rotations = world_rotations[:, parents]
+        world_rotations[:, joints] = parent_rotations @ local_rotations[:, joints]
+        world_positions[:, joints] = world_positions[:, parents] + np.einsum(
+            '...ab,...b->...a', parent_rotations, local_translations[:, joints]
+        )
+
+    return world_rotations, world_positions
+
+def forward_kinematics(skeleton, frames, start=0, stop=None, offsets=None):
+    """
+    World-space joint positions (F, J, 3) and rotation matrices (F, J, 3, 3)
+    for motion rows frames[start:stop], in one vectorized pass.
+    """
+    local_rotations, local_translations = local_transforms(skeleton, frames[start:stop], offsets)
+    world_rotations, world_positions = accumulate(skeleton, local_rotations, local_translations)
+    return world_positions, world_rotations
+
+#####################################
+# QUATERNION POSES (sub-frame interpolation)
+#####################################
+# quaternions are (..., 4) float arrays in (x, y, z, w) order, same as core.scenegraph.
+
+def axis_quaternion(axis, angles):
+    # (...,) angles in radians -> (..., 4) rotation about "X", "Y" or "Z"
+    q = np.zeros(angles.shape + (4,), dtype=np.float32)
+    q[..., "XYZ".index(axis)] = np.sin(angles * 0.5)
+    q[..., 3] = np.cos(angles * 0.5)
+    return q
+
+def quaternion_multiply(a, b):
+    ax, ay, az, aw = np.moveaxis(a, -1, 0)
+    bx, by, bz, bw = np.moveaxis(b, -1, 0)
+    return np.stack([
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    ], axis=-1)
+
+def euler_to_quaternion(angles, order):
+    # quaternion version of euler_to_matrix (q = q_order[0] * q_order[1] * q_order[2])
+    radians = np.radians(np.asarray(angles, dtype=np.float32))
+    q = axis_quaternion(order[0], radians[..., 0])
+    q = quaternion_multiply(q, axis_quaternion(order[1], radians[..., 1]))
+    q = quaternion_multiply(q, axis_quaternion(order[2], radians[..., 2]))
+    return q
+
+def quaternion_to_matrix(q):
+    # (..., 4) unit quaternions -> (..., 3, 3)
+    x, y, z, w = np.moveaxis(np.asarray(q, dtype=np.float32), -1, 0)
+    R = np.empty(x.shape + (3, 3), dtype=np.float32)
+    R[..., 0, 0] = 1 - 2 * (y * y + z * z)
+    R[..., 0, 1] = 2 * (x * y - z * w)
+    R[..., 0, 2] = 2 * (x * z + y * w)
+    R[..., 1, 0] = 2 * (x * y + z * w)
+    R[..., 1, 1] = 1 - 2 * (x * x + z * z)
+    R[..., 1, 2] = 2 * (y * z - x * w)
+    R[..., 2, 0] = 2 * (x * z - y * w)
+    R[..., 2, 1] = 2 * (y * z + x * w)
+    R[..., 2, 2] = 1 - 2 * (x * x + y * y)
+    return R
+
+def nlerp(q0, q1, t):
+    # normalized linear blend along the shortest arc, t broadcasts against q0[..., 0]
+    t = np.asarray(t, dtype=np.float32)[..., None]
+    sign = np.where(np.sum(q0 * q1, axis=-1, keepdims=True) < 0, -1.0, 1.0).astype(np.float32)
+    q = (1 - t) * q0 + t * sign * q1
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+def slerp(q0, q1, t):
+    # spherical blend along the shortest arc, falls back to nlerp for nearly equal rotations
+    t = np.asarray(t, dtype=np.float32)[..., None]
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    q1 = np.where(dot < 0, -q1, q1)
+    dot = np.minimum(np.abs(dot), 1.0)
+
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+    small = sin_theta < 1e-4
+    safe = np.where(small, 1.0, sin_theta)
+    w0 = np.where(small, 1 - t, np.sin((1 - t) * theta) / safe)
+    w1 = np.where(small, t, np.sin(t * theta) / safe)
+
+    q = w0 * q0 + w1 * q1
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+def local_quaternions(skeleton, frames, offsets=None):
+    """
+    (F, C) motion rows -> local rotations as quaternions (F, J, 4) and translations (F, J, 3).
+    Computed once per clip so playback only blends two rows per frame.
+    """
+    padded = pad_frames(skeleton, frames)
+    num_frames = len(padded)
+    translations = local_translations(skeleton, padded, offsets)
+
+    rotations = np.empty((num_frames, skeleton.num_joints, 4), dtype=np.float32)
+    angles = padded[:, skeleton.rotation_channels]
+    for code in np.unique(skeleton.rotation_order):
+        joints = np.flatnonzero(skeleton.rotation_order == code)
+        rotations[:, joints] = euler_to_quaternion(angles[:, joints], ROTATION_ORDERS[code])
+
+    return rotations, translations
+
+def blend_local(rotations, translations, rows0, rows1, alpha, method="slerp"):
+    """
+    Blends precomputed local poses between rows0 and rows1 (arrays of row indices) by alpha in [0, 1]:
+    translations linearly, rotations with slerp or nlerp. Returns (N, J, 4) and (N, J, 3).
+    """
+    alpha = np.asarray(alpha, dtype=np.float32)
+    blend = slerp if method == "slerp" else nlerp
+    blended_rotations = blend(rotations[rows0], rotations[rows1], alpha[..., None])
+    a = alpha[..., None, None]
+    blended_translations = (1 - a) * translations[rows0] + a * translations[rows1]
+    return blended_rotations, blended_translations
+
+def forward_kinematics_quaternions(skeleton, local_rotations, local_translations):
+    # world positions (F, J, 3) and rotations (F, J, 3, 3) from local quaternion poses
+    world_rotations, world_positions = accumulate(skeleton, quaternion_to_matrix(local_rotations), local_translations)
+    return world_positions, world_rotations
+
+def pack_matrices(rotations, positions, out=None):
+    # (..., 3, 3) rotations and (..., 3) positions -> (..., 4, 4) homogeneous matrices
+    if out is None:
+        out = np.empty(positions.shape[:-1] + (4, 4), dtype=np.float32)
+    out[..., :3, :3] = rotations
+    out[..., :3, 3] = positions
+    out[..., 3, :3] = 0
+    out[..., 3, 3] = 1
+    return out
@@ -1,3 +1,4 @@
+from abc import ABC, abstractmethod
 import numpy as np
 from OpenGL.GL import *
 import quaternion as qt
@@ -5,21 +6,32 @@ import quaternion as qt
 import core
 from core.glwrapper import GLWrapper as glw
 
-class Mesh:
-    def __init__(self, size=1.0):
-        # vertices & indices
-        self.vertices = np.zeros((0, 3), dtype=np.float32)
-        self.indices = np.zeros((0,), dtype=np.uint32)
-        self.normals = np.zeros((0, 3), dtype=np.float32)
-        
-        # buffers
-        self.vao = None # vertex array
+#####################################
+# SHARED GEOMETRY
+#####################################
+
+# CPU arrays + GPU buffers of one tessellation, shared by every Mesh with the same key
+class Geometry:
+    def __init__(self, key, vertices, normals, indices):
+        self.key = key
+        self.vertices = vertices
+        self.normals = normals
+        self.indices = indices
+        self.ref_count = 0
+
+        # buffers, created on first use of vao
+        self._vao = None # vertex array
         self.vbo = None # vertex buffer
+        self.nbo = None # normal buffer
         self.ebo = None # index buffer
 
-        print("WARNING: This class should not be instantiated. Use a child class or define a child class of this class.")
+    @property
+    def vao(self):
+        if self._vao is None:
+            self.upload()
+        return self._vao
 
-    def update_buffers(self):
+    def upload(self):
         # safety check
         if not isinstance(self.vertices, np.ndarray):
             raise TypeError("vertices must be a numpy array")
@@ -27,8 +39,8 @@ class Mesh:
             raise TypeError("indices must be a numpy array")
     
         # build VAO (bind later)
-        self.vao = glGenVertexArrays(1)
-        glBindVertexArray(self.vao)
+        self._vao = glGenVertexArrays(1)
+        glBindVertexArray(self._vao)
 
         # vertex VBO
         self.vbo = glGenBuffers(1)
@@ -53,84 +65,169 @@ class Mesh:
         # unbind vao at end
         glBindVertexArray(0)
 
-class Sphere(Mesh):
-    def __init__(self, lat=64, lon=64):
-        # self.position = np.array(position, dtype=np.float32)
-        # self.rotation = np.array(rotation, dtype=np.float32)
-        # self.scale = np.array(scale, dtype=np.float32)
+    def delete_buffers(self):
+        if self._vao is None:
+            return
+        glDeleteBuffers(3, [self.vbo, self.nbo, self.ebo])
+        glDeleteVertexArrays(1, [self._vao])
+        self._vao = self.vbo = self.nbo = self.ebo = None
+
+class GeometryCache:
+    _geometries = {} # { (PRIMITIVE, PARAMS...) : Geometry }
+
+    # shared geometry for `key`, build() -> (vertices, normals, indices) only runs on a miss
+    @classmethod
+    def acquire(cls, key, build):
+        geometry = cls._geometries.get(key)
+        if geometry is None:
+            vertices, normals, indices = build()
+            geometry = Geometry(key, vertices, normals, indices)
+            cls._geometries[key] = geometry
+
+        geometry.ref_count += 1
+        return geometry
+
+    # drop one reference, GPU buffers are deleted with the last one
+    @classmethod
+    def release(cls, geometry):
+        geometry.ref_count -= 1
+        if geometry.ref_count > 0:
+            return
+
+        geometry.delete_buffers()
+        if cls._geometries.get(geometry.key) is geometry:
+            del cls._geometries[geometry.key]
+
+    @classmethod # for debugging
+    def list_geometries(cls):
+        for key, geometry in cls._geometries.items():
+            print(f"{key}: {geometry.ref_count} refs, {'uploaded' if geometry._vao is not None else 'not uploaded'}")
+
+#####################################
+# GEOMETRY GENERATORS
+#####################################
+
+DEFAULT_SPHERE_LODS = ((64, 64), (32, 32), (16, 16), (8, 8))
+
+def sphere_geometry(lat, lon):
+    """
+    Unit UV sphere as (vertices, normals, indices), built from broadcasted
+    theta x phi grids: (lat + 1) * (lon + 1) vertices and 6 * lat * lon indices.
+    """
+    # vertex & normals
+    theta = np.arange(lat + 1) * (np.pi / lat)     # rings, pole to pole
+    phi = np.arange(lon + 1) * (2 * np.pi / lon)   # segments, seam duplicated
+    sin_theta = np.sin(theta)[:, None]
+    cos_theta = np.cos(theta)[:, None]
+
+    vertices = np.empty((lat + 1, lon + 1, 3), dtype=np.float32)
+    vertices[..., 0] = np.cos(phi)[None, :] * sin_theta
+    vertices[..., 1] = cos_theta
+    vertices[..., 2] = np.sin(phi)[None, :] * sin_theta
+    vertices = vertices.reshape(-1, 3)
+    normals = vertices.copy()
+
+    # indices, two triangles per grid cell
+    first = (np.arange(lat, dtype=np.uint32)[:, None] * (lon + 1) + np.arange(lon, dtype=np.uint32)[None, :])
+    second = first + (lon + 1)
+    indices = np.stack([first, second, first + 1, second, second + 1, first + 1], axis=-1)
+
+    return vertices, normals, indices.reshape(-1)
+
+def sphere_lod_geometry(levels=DEFAULT_SPHERE_LODS):
+    # [(vertices, normals, indices), ...] for each (lat, lon) level
+    return [sphere_geometry(lat, lon) for lat, lon in levels]
+
+#####################################
+# MESHES
+#####################################
+
+class Mesh(ABC):
+    # shared geometry, acquired on first access (so unused default meshes never build anything)
+    _geometry = None
+
+    # geometry: an already acquired Geometry (GeometryCache.acquire), its reference passes to this mesh
+    def __init__(self, geometry=None):
+        self._geometry = geometry
+
+    # key identifying this tessellation in the GeometryCache
+    @abstractmethod
+    def geometry_key(self):
+        pass
+
+    # returns (vertices, normals, indices)
+    @abstractmethod
+    def create_buffers(self):
+        pass
+
+    @property
+    def geometry(self):
+        if self._geometry is None:
+            self._geometry = GeometryCache.acquire(self.geometry_key(), self.create_buffers)
+        return self._geometry
+
+    # vertices & indices
+    @property
+    def vertices(self):
+        return self.geometry.vertices
+
+    @property
+    def normals(self):
+        return self.geometry.normals
 
-        # self.quaternion = qt.from_euler_angles(
-        #     np.radians(self.rotation[0]),
-        #     np.radians(self.rotation[1]),
-        #     np.radians(self.rotation[2]),
-        # )
+    @property
+    def indices(self):
+        return self.geometry.indices
 
-        # # model matrix
-        # self.model = core.get_model_matrix(self.position, self.quaternion, self.scale)
+    # buffers
+    @property
+    def vao(self):
+        return self.geometry.vao
 
-        # tesselation
+    # re-upload the shared buffers (only when vertex info changes)
+    def update_buffers(self):
+        self.geometry.delete_buffers()
+        self.geometry.upload()
+
+    # give up this mesh's reference to the shared geometry
+    def release(self):
+        if self._geometry is not None:
+            GeometryCache.release(self._geometry)
+            self._geometry = None
+
+class Sphere(Mesh):
+    def __init__(self, lat=64, lon=64, geometry=None):
+        # tesselation, geometry is shared and built on first use (see Mesh.geometry)
+        super().__init__(geometry)
         self.lat = lat
         self.lon = lon
 
-        # buffers
-        self.vertices = None
-        self.normals = None
-        self.indices = None
+    @staticmethod
+    def key(lat, lon):
+        return ("sphere", lat, lon)
 
-        # init buffers
-        self.create_buffers()
-        self.update_buffers()
+    def geometry_key(self):
+        return Sphere.key(self.lat, self.lon)
         
-    # called with object instantiation
+    # called when the geometry is first needed
     def create_buffers(self):
-        vertices = []
-        normals = []
-        indices = []
-        
-        # vertex & normals
-        for i in range(self.lat + 1):
-            theta = i * np.pi / self.lat
-            sin_theta = np.sin(theta)
-            cos_theta = np.cos(theta)
-            
-            for j in range(self.lon + 1):
-                phi = j * 2 * np.pi / self.lon
-                sin_phi = np.sin(phi)
-                cos_phi = np.cos(phi)
-
-                x = cos_phi * sin_theta
-                y = cos_theta
-                z = sin_phi * sin_theta
-
-                vertices.append([x, y, z])
-                normals.append([x, y, z])
-                
-        # indices
-        for i in range(self.lat):
-            for j in range(self.lon):
-                first = i * (self.lon + 1) + j
-                second = first + self.lon + 1
-
-                indices.extend([first, second, first + 1])
-                indices.extend([second, second + 1, first + 1])
-                
-        self.vertices = np.array(vertices, dtype=np.float32)
-        self.normals = np.array(normals, dtype=np.float32)
-        self.indices = np.array(indices, dtype=np.uint32)
-        return
-    
-    # only when vertex info changes, shouldn't be called
-    def update_buffers(self):
-        super().update_buffers()
+        return sphere_geometry(self.lat, self.lon)
+
+    # level-of-detail variants, e.g. Sphere.create_lods(((64, 64), (16, 16), (8, 8)))
+    # every level is acquired from the GeometryCache right away, only missing levels are generated
+    @classmethod
+    def create_lods(cls, levels=DEFAULT_SPHERE_LODS):
+        lods = []
+        for lat, lon in levels:
+            geometry = GeometryCache.acquire(cls.key(lat, lon), lambda lat=lat, lon=lon: sphere_geometry(lat, lon))
+            lods.append(cls(lat, lon, geometry))
+        return lods
 
     # call when updating tesselation
     def update_tesselation(self, lat, lon):
+        self.release()
         self.lat = lat
         self.lon = lon
-
-        self.create_buffers()
-        self.update_buffers()
-
         return
 
     # inject into update loop
@@ -150,30 +247,14 @@ class Sphere(Mesh):
         return
         
 class Cube(Mesh):
-    def __init__(self):
-        # self.position = np.array(position, dtype=np.float32)
-        # self.rotation = np.array(rotation, dtype=np.float32)
-        # self.scale = np.array(scale, dtype=np.float32)
-
-        # self.quaternion = qt.from_euler_angles(
-        #     np.radians(self.rotation[0]),
-        #     np.radians(self.rotation[1]),
-        #     np.radians(self.rotation[2]),
-        # )
-
-        # # model matrix
-        # self.model = core.get_model_matrix(self.position, self.quaternion, self.scale)
-
-        # buffers
-        self.vertices = None
-        self.normals = None
-        self.indices = None     
-
-        # init buffers
-        self.create_buffers()
-        self.update_buffers()   
-
-    # called with object instantiation
+    def __init__(self, geometry=None):
+        # geometry is shared and built on first use (see Mesh.geometry)
+        super().__init__(geometry)
+
+    def geometry_key(self):
+        return ("cube",)
+
+    # called when the geometry is first needed
     def create_buffers(self):
         vertices = np.array([
             [-1, -1,  1], [ 1, -1,  1], [ 1,  1,  1], [-1,  1,  1], # Front face (+Z)
@@ -204,14 +285,7 @@ class Cube(Mesh):
             20,21,22, 20,22,23, # Bottom
         ], dtype=np.uint32)
 
-        self.vertices = vertices
-        self.normals = normals
-        self.indices = indices
-        return
-
-    # only when vertex info changes, shouldn't be called
-    def update_buffers(self):
-        super().update_buffers()
+        return vertices, normals, indices
 
     # inject into update loop
     def draw(self, program=None):
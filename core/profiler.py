@@ -0,0 +1,151 @@
+import json
+import os
+import time
+from collections import deque
+import numpy as np
+
+#####################################
+# FRAME PROFILER
+#####################################
+
+class RingBuffer:
+    # last `capacity` durations (ns) of one (name, phase) pair
+    def __init__(self, capacity):
+        self.samples = np.zeros(capacity, dtype=np.int64)
+        self.index = 0
+        self.count = 0
+        self.total = 0 # number of samples ever recorded
+
+    def push(self, value):
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % len(self.samples)
+        self.count = min(self.count + 1, len(self.samples))
+        self.total += 1
+
+    def values(self):
+        return self.samples[:self.count]
+
+class _Section:
+    __slots__ = ("name", "phase", "start")
+
+    def __init__(self, name, phase):
+        self.name = name
+        self.phase = phase
+        self.start = 0
+
+    def __enter__(self):
+        if Profiler.enabled:
+            self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        if Profiler.enabled and self.start:
+            Profiler.record(self.name, self.phase, self.start, time.perf_counter_ns())
+        return False
+
+class Profiler:
+    """
+    Opt-in wall time profiler. PluginQueue.call_plugins records every plugin call per phase
+    (assemble, init, fixed_update, update, ...), other code can be wrapped in section().
+    Durations go to fixed-size ring buffers, so stats are rolling over the last `capacity` calls.
+    """
+    enabled = False
+    capacity = 600          # samples per (name, phase), 10 s at 60 fps
+    trace_capacity = 100000 # events kept for the Chrome trace
+    report_interval = None  # seconds between periodic reports, None = only on demand
+
+    _buffers = {} # { (NAME, PHASE) : RingBuffer }
+    _events = deque(maxlen=trace_capacity) # (NAME, PHASE, START_NS, END_NS)
+    _origin = time.perf_counter_ns()
+    _last_report = 0.0
+
+    @classmethod
+    def enable(cls, capacity=None, report_interval=None):
+        if capacity is not None:
+            cls.capacity = capacity
+        cls.report_interval = report_interval
+        cls.enabled = True
+        cls._last_report = time.perf_counter()
+
+    @classmethod
+    def disable(cls):
+        cls.enabled = False
+
+    @classmethod
+    def reset(cls):
+        cls._buffers = {}
+        cls._events = deque(maxlen=cls.trace_capacity)
+        cls._origin = time.perf_counter_ns()
+
+    @classmethod
+    def record(cls, name, phase, start_ns, end_ns):
+        key = (name, phase)
+        buffer = cls._buffers.get(key)
+        if buffer is None:
+            buffer = cls._buffers[key] = RingBuffer(cls.capacity)
+        buffer.push(end_ns - start_ns)
+        cls._events.append((name, phase, start_ns, end_ns))
+
+    # with Profiler.section("GLWrapper", "update"): ...
+    @classmethod
+    def section(cls, name, phase):
+        return _Section(name, phase)
+
+    #####################################
+    # REPORTS
+    #####################################
+
+    # { PHASE : { NAME : {mean_ms, p95_ms, max_ms, samples, calls} } }
+    @classmethod
+    def stats(cls):
+        result = {}
+        for (name, phase), buffer in cls._buffers.items():
+            values = buffer.values() * 1e-6
+            result.setdefault(phase, {})[name] = {
+                'mean_ms': float(values.mean()),
+                'p95_ms': float(np.percentile(values, 95)),
+                'max_ms': float(values.max()),
+                'samples': int(buffer.count),
+                'calls': int(buffer.total),
+            }
+        return result
+
+    @classmethod
+    def report(cls):
+        print(f"{'phase':<14}{'name':<24}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for phase, entries in cls.stats().items():
+            # slowest first
+            for name, s in sorted(entries.items(), key=lambda item: -item[1]['mean_ms']):
+                print(f"{phase:<14}{name:<24}{s['mean_ms']:>10.3f}{s['p95_ms']:>10.3f}{s['max_ms']:>10.3f}")
+
+    # call once per frame, prints every report_interval seconds
+    @classmethod
+    def maybe_report(cls):
+        if not cls.enabled or cls.report_interval is None:
+            return
+        now = time.perf_counter()
+        if now - cls._last_report >= cls.report_interval:
+            cls._last_report = now
+            cls.report()
+
+    @classmethod
+    def dump_json(cls, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(cls.stats(), f, indent=2)
+
+    # chrome://tracing / Perfetto "complete" events, one row per phase
+    @classmethod
+    def dump_chrome_trace(cls, path):
+        phases = {}
+        events = []
+        for name, phase, start, end in cls._events:
+            tid = phases.setdefault(phase, len(phases))
+            events.append({
+                'name': name, 'cat': phase, 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+                'ts': (start - cls._origin) / 1000.0, 'dur': (end - start) / 1000.0,
+            })
+        for phase, tid in phases.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': phase}})
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,233 @@
+import weakref
+import numpy as np
+
+from .util import compose_trs_batch
+
+#####################################
+# SCENE GRAPH
+#####################################
+
+class SceneGraph:
+    """
+    Structure-of-arrays transform store. Every node owns one row of
+    positions (N,3), rotations (N,4) as (x, y, z, w), scales (N,3),
+    local matrices (N,4,4) and world matrices (N,4,4).
+
+    update() recomposes dirty local matrices in one batch, then walks the
+    hierarchy level by level (topological order), touching only dirty nodes.
+
+    Rows are views into preallocated storage, so matrices handed out (e.g. to
+    GLWrapper) stay valid; the capacity is fixed and add_node() raises when it is full.
+    """
+    _default = None
+    _graphs = weakref.WeakSet() # every live graph, see update_all()
+
+    def __init__(self, capacity=65536):
+        self.count = 0
+        self.capacity = 0
+        self._free = []
+
+        # hierarchy
+        self.parent = np.zeros(0, dtype=np.int32)
+        self.depth = np.zeros(0, dtype=np.int32)
+        self.active = np.zeros(0, dtype=bool)
+        self._order = None  # node indices sorted by depth (topological order)
+        self._levels = None # slices of _order, one per depth level
+        self._hierarchy_dirty = True
+
+        # transforms
+        self.positions = np.zeros((0, 3), dtype=np.float32)
+        self.rotations = np.zeros((0, 4), dtype=np.float32)
+        self.scales = np.zeros((0, 3), dtype=np.float32)
+        self.local = np.zeros((0, 4, 4), dtype=np.float32)
+        self.world = np.zeros((0, 4, 4), dtype=np.float32)
+
+        # dirty tracking
+        self.local_dirty = np.zeros(0, dtype=bool)
+        self.world_dirty = np.zeros(0, dtype=bool)
+        self._dirty = False
+
+        self._grow(capacity)
+        SceneGraph._graphs.add(self)
+
+    # shared graph used by core.Object
+    @classmethod
+    def default(cls):
+        if cls._default is None:
+            cls._default = SceneGraph()
+        return cls._default
+
+    # update every graph (the default one and those passed as Object(graph=...)), clean graphs return right away
+    @classmethod
+    def update_all(cls):
+        for graph in list(cls._graphs):
+            graph.update()
+
+    #####################################
+    # NODES
+    #####################################
+
+    def add_node(self, parent=-1):
+        if self._free:
+            idx = self._free.pop()
+        else:
+            if self.count == self.capacity:
+                # growing would reallocate the rows behind every matrix view handed out so far
+                # (GLWrapper registrations, Object.get_world_matrix results), which then silently go stale
+                raise ValueError(f"SceneGraph capacity {self.capacity} exceeded, "
+                                 "create the graph with a larger capacity or release unused nodes")
+            idx = self.count
+            self.count += 1
+
+        self.parent[idx] = parent
+        self.active[idx] = True
+        self.positions[idx] = 0.0
+        self.rotations[idx] = (0.0, 0.0, 0.0, 1.0)
+        self.scales[idx] = 1.0
+        self.local[idx] = np.eye(4, dtype=np.float32)
+        self.world[idx] = np.eye(4, dtype=np.float32)
+        self.local_dirty[idx] = True
+        self.world_dirty[idx] = True
+        self._dirty = True
+        self._hierarchy_dirty = True
+        return idx
+
+    def remove_node(self, idx):
+        # children are detached to the root level
+        children = np.flatnonzero(self.parent[:self.count] == idx)
+        self.parent[children] = -1
+        self.world_dirty[children] = True
+        self._dirty = True
+
+        self.parent[idx] = -1
+        self.active[idx] = False
+        self.local_dirty[idx] = False
+        self.world_dirty[idx] = False
+        self._free.append(idx)
+        self._hierarchy_dirty = True
+
+    def set_parent(self, idx, parent=-1):
+        # reject cycles
+        p = parent
+        while p >= 0:
+            if p == idx:
+                raise ValueError("A node cannot be parented to itself or its descendants")
+            p = self.parent[p]
+
+        self.parent[idx] = parent
+        self.world_dirty[idx] = True
+        self._dirty = True
+        self._hierarchy_dirty = True
+
+    def mark_local_dirty(self, idx):
+        self.local_dirty[idx] = True
+        self._dirty = True
+
+    def mark_world_dirty(self, idx):
+        self.world_dirty[idx] = True
+        self._dirty = True
+
+    # write world matrices directly (e.g. skeleton poses from batched FK)
+    # the written rows are left clean, so update() keeps them until they or an ancestor change;
+    # children that were not written are marked dirty and follow their new parent on the next update()
+    def set_world_matrices(self, nodes, matrices):
+        self.update() # pending changes first, they would otherwise overwrite the written rows
+        nodes = np.asarray(nodes)
+        self.world[nodes] = matrices
+
+        n = self.count
+        written = np.zeros(n, dtype=bool)
+        written[nodes] = True
+        parent = self.parent[:n]
+        children = np.flatnonzero((parent >= 0) & written[np.maximum(parent, 0)] & ~written & self.active[:n])
+        if len(children):
+            self.world_dirty[children] = True
+            self._dirty = True
+
+    #####################################
+    # UPDATE
+    #####################################
+
+    def update(self):
+        if not self._dirty:
+            return
+        n = self.count
+
+        if self._hierarchy_dirty:
+            self._rebuild_levels()
+
+        # 1. local matrices, one batch for all dirty nodes
+        local_dirty = np.flatnonzero(self.local_dirty[:n])
+        if len(local_dirty):
+            self.local[local_dirty] = compose_trs_batch(
+                self.positions[local_dirty], self.rotations[local_dirty], self.scales[local_dirty]
+            )
+            self.local_dirty[local_dirty] = False
+            self.world_dirty[local_dirty] = True
+
+        # 2. world matrices, one batch per depth level
+        # a node is recomputed if it or its parent was dirty; the flag then propagates to its children
+        for level, nodes in enumerate(self._levels):
+            if level == 0:
+                dirty = nodes[self.world_dirty[nodes]]
+                self.world[dirty] = self.local[dirty]
+                continue
+
+            parents = self.parent[nodes]
+            mask = self.world_dirty[nodes] | self.world_dirty[parents]
+            dirty = nodes[mask]
+            if len(dirty) == 0:
+                continue
+            self.world[dirty] = self.world[parents[mask]] @ self.local[dirty]
+            self.world_dirty[dirty] = True
+
+        self.world_dirty[:n] = False
+        self._dirty = False
+
+    def _rebuild_levels(self):
+        n = self.count
+        nodes = np.flatnonzero(self.active[:n])
+        parent = self.parent[:n]
+
+        # depth by hopping up one parent per step for all nodes at once
+        depth = np.zeros(n, dtype=np.int32)
+        cur = parent[nodes].copy()
+        while True:
+            alive = cur >= 0
+            if not alive.any():
+                break
+            depth[nodes[alive]] += 1
+            cur[alive] = parent[cur[alive]]
+        self.depth[:n] = depth
+
+        self._order = nodes[np.argsort(depth[nodes], kind='stable')]
+        bounds = np.searchsorted(depth[self._order], np.arange(int(depth.max(initial=0)) + 2))
+        self._levels = [self._order[bounds[d]:bounds[d + 1]] for d in range(len(bounds) - 1)]
+        self._hierarchy_dirty = False
+
+    # topological order of active nodes (parents before children)
+    def get_order(self):
+        if self._hierarchy_dirty:
+            self._rebuild_levels()
+        return self._order
+
+    def _grow(self, capacity):
+        def grow(arr, fill=0):
+            # np.zeros maps untouched pages lazily, so a large reserve is cheap
+            new = np.zeros((capacity,) + arr.shape[1:], dtype=arr.dtype)
+            if fill:
+                new[:] = fill
+            new[:len(arr)] = arr
+            return new
+
+        self.parent = grow(self.parent, -1)
+        self.depth = grow(self.depth)
+        self.active = grow(self.active, False)
+        self.positions = grow(self.positions)
+        self.rotations = grow(self.rotations)
+        self.scales = grow(self.scales)
+        self.local = grow(self.local)
+        self.world = grow(self.world)
+        self.local_dirty = grow(self.local_dirty, False)
+        self.world_dirty = grow(self.world_dirty, False)
+        self.capacity = capacity
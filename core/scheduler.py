@@ -0,0 +1,132 @@
+import time
+import glfw
+
+#####################################
+# FRAME SCHEDULER
+#####################################
+
+class Scheduler:
+    """
+    Owns the frame clock (time.perf_counter) of the main loop.
+
+    Simulation runs at a fixed timestep: every frame adds the real elapsed time to an
+    accumulator and fixed_steps() yields one `fixed_dt` per whole step it holds
+    (plugins receive it in fixed_update(dt)). The leftover fraction is exposed as `alpha`
+    in [0, 1) so update() can render between the last step and the next one.
+
+    end_frame() paces the loop: optional FPS cap, and a low idle rate while the window
+    is unfocused or minimized.
+    """
+    fixed_dt = 1.0 / 60.0  # simulation step (seconds)
+    max_steps = 5          # catch-up limit per frame, the rest of a long stall is dropped
+    max_frame_time = 0.25  # clamp of a single frame delta (debugger pauses, window drags)
+    max_fps = None         # render cap, None = uncapped (or vsync)
+    idle_fps = 10          # render rate while the window is unfocused, None = no throttling
+    vsync = True
+
+    # state of the current frame
+    time = 0.0        # simulated time (sum of fixed steps)
+    frame_dt = 0.0    # real time since the previous frame
+    alpha = 0.0       # accumulator / fixed_dt after the fixed steps
+    frame_count = 0
+
+    _window = None
+    _accumulator = 0.0
+    _frame_start = None
+    _last_time = None
+
+    @classmethod
+    def configure(cls, fixed_dt=None, max_fps=None, idle_fps=None, vsync=None, max_steps=None):
+        if fixed_dt is not None:
+            if fixed_dt <= 0:
+                raise ValueError("fixed_dt must be positive")
+            cls.fixed_dt = fixed_dt
+        if max_fps is not None:
+            cls.max_fps = max_fps if max_fps > 0 else None
+        if idle_fps is not None:
+            cls.idle_fps = idle_fps if idle_fps > 0 else None
+        if max_steps is not None:
+            cls.max_steps = max_steps
+        if vsync is not None:
+            cls.set_vsync(vsync)
+
+    # window used for vsync and focus queries (its context must be current)
+    @classmethod
+    def set_window(cls, glfw_window):
+        cls._window = glfw_window
+        cls.set_vsync(cls.vsync)
+
+    @classmethod
+    def set_vsync(cls, enabled):
+        cls.vsync = bool(enabled)
+        if cls._window is not None:
+            glfw.swap_interval(1 if cls.vsync else 0)
+
+    @classmethod
+    def start(cls):
+        cls.time = 0.0
+        cls.frame_dt = 0.0
+        cls.alpha = 0.0
+        cls.frame_count = 0
+        cls._accumulator = 0.0
+        cls._last_time = time.perf_counter()
+
+    #####################################
+    # FRAME
+    #####################################
+
+    # advance the clock, call once at the start of every frame
+    @classmethod
+    def begin_frame(cls):
+        now = time.perf_counter()
+        if cls._last_time is None:
+            cls._last_time = now
+        cls._frame_start = now
+        cls.frame_dt = min(now - cls._last_time, cls.max_frame_time)
+        cls._last_time = now
+        cls._accumulator += cls.frame_dt
+        cls.frame_count += 1
+
+    # yields fixed_dt once per whole step in the accumulator, then updates alpha
+    @classmethod
+    def fixed_steps(cls):
+        steps = 0
+        while cls._accumulator >= cls.fixed_dt and steps < cls.max_steps:
+            cls._accumulator -= cls.fixed_dt
+            cls.time += cls.fixed_dt
+            steps += 1
+            yield cls.fixed_dt
+
+        # too far behind: drop the backlog instead of spiraling
+        if cls._accumulator >= cls.fixed_dt:
+            cls._accumulator %= cls.fixed_dt
+        cls.alpha = cls._accumulator / cls.fixed_dt
+
+    # time to render at: last simulated step + the leftover fraction
+    @classmethod
+    def render_time(cls):
+        return cls.time + cls.alpha * cls.fixed_dt
+
+    # sleep for the rest of the frame budget, call once after swapping buffers
+    @classmethod
+    def end_frame(cls):
+        fps = cls.max_fps
+        if cls.idle_fps is not None and cls.is_idle():
+            fps = cls.idle_fps if fps is None else min(fps, cls.idle_fps)
+        if fps is None or cls._frame_start is None:
+            return
+
+        deadline = cls._frame_start + 1.0 / fps
+        remaining = deadline - time.perf_counter()
+        if remaining > 0.002:
+            time.sleep(remaining - 0.001) # coarse sleep, the OS may oversleep by ~1 ms
+        while time.perf_counter() < deadline:
+            pass
+
+    @classmethod
+    def is_idle(cls):
+        if cls._window is None:
+            return False
+        focused = glfw.get_window_attrib(cls._window, glfw.FOCUSED)
+        iconified = glfw.get_window_attrib(cls._window, glfw.ICONIFIED)
+        return not focused or bool(iconified)
@@ -1,9 +1,80 @@
 from OpenGL.GL import *
+import numpy as np
 import os
 
+from .uniformbuffer import bind_uniform_blocks
+
+#####################################
+# TYPED UNIFORM SETTERS
+#####################################
+# setter(location, count, value), picked once per uniform from its GL type.
+# array values are passed straight to GL, so a contiguous float32 buffer is uploaded without a copy.
+# matrices are row-major (GL_TRUE transpose), same as the rest of the engine.
+
+def _scalar_setter(scalar, vector):
+    def setter(loc, count, value):
+        if isinstance(value, (int, float, np.generic)): # python / numpy scalars (bool is an int)
+            scalar(loc, value)
+        else:
+            vector(loc, count, value)
+    return setter
+
+def _vector_setter(vector):
+    def setter(loc, count, value):
+        vector(loc, count, value)
+    return setter
+
+def _matrix_setter(matrix):
+    def setter(loc, count, value):
+        matrix(loc, count, GL_TRUE, value)
+    return setter
+
+_SAMPLER_TYPES = (
+    GL_SAMPLER_1D, GL_SAMPLER_2D, GL_SAMPLER_3D, GL_SAMPLER_CUBE, GL_SAMPLER_2D_SHADOW,
+    GL_SAMPLER_2D_ARRAY, GL_SAMPLER_BUFFER, GL_INT_SAMPLER_BUFFER, GL_UNSIGNED_INT_SAMPLER_BUFFER,
+)
+
+_UNIFORM_SETTERS = {
+    GL_FLOAT: _scalar_setter(glUniform1f, glUniform1fv),
+    GL_FLOAT_VEC2: _vector_setter(glUniform2fv),
+    GL_FLOAT_VEC3: _vector_setter(glUniform3fv),
+    GL_FLOAT_VEC4: _vector_setter(glUniform4fv),
+    GL_INT: _scalar_setter(glUniform1i, glUniform1iv),
+    GL_INT_VEC2: _vector_setter(glUniform2iv),
+    GL_INT_VEC3: _vector_setter(glUniform3iv),
+    GL_INT_VEC4: _vector_setter(glUniform4iv),
+    GL_BOOL: _scalar_setter(glUniform1i, glUniform1iv),
+    GL_FLOAT_MAT2: _matrix_setter(glUniformMatrix2fv),
+    GL_FLOAT_MAT3: _matrix_setter(glUniformMatrix3fv),
+    GL_FLOAT_MAT4: _matrix_setter(glUniformMatrix4fv),
+}
+for _sampler in _SAMPLER_TYPES:
+    _UNIFORM_SETTERS[_sampler] = _UNIFORM_SETTERS[GL_INT] # samplers take a texture unit
+
+# active uniform of a linked program
+class UniformInfo:
+    __slots__ = ("name", "location", "type", "size", "setter")
+
+    def __init__(self, name, location, gl_type, size):
+        self.name = name
+        self.location = location
+        self.type = gl_type
+        self.size = size # array length, 1 for non-arrays
+        self.setter = _UNIFORM_SETTERS.get(gl_type)
+
+    def upload(self, value):
+        self.setter(self.location, self.size, value)
+
+#####################################
+# SHADER
+#####################################
+
 class Shader:
+    _programs = {} # { PROGRAM : Shader }
+
     def __init__(self, vertex_path, fragment_path):
         self.program = None
+        self.uniforms = {} # { UNIFORM_NAME : UniformInfo }, filled once after linking
         self.vertex_src = self.load_shader_source(vertex_path)
         self.fragment_src = self.load_shader_source(fragment_path)
         self.compile_and_link()
@@ -51,17 +122,63 @@ class Shader:
         glDeleteShader(vert)
         glDeleteShader(frag)
 
+        # connect shared uniform blocks (camera, light) to their binding points
+        bind_uniform_blocks(self.program)
+
+        # cache uniform locations and types
+        self.introspect_uniforms()
+        Shader._programs[self.program] = self
+
         # use program
-        glUseProgram(self.program)        
+        glUseProgram(self.program)
+
+    def introspect_uniforms(self):
+        self.uniforms = {}
+        count = glGetProgramiv(self.program, GL_ACTIVE_UNIFORMS)
+        for index in range(count):
+            name, size, gl_type = glGetActiveUniform(self.program, index)
+            if isinstance(name, bytes):
+                name = name.decode()
+            name = name.rstrip('\x00')
+
+            # uniforms inside blocks have no location
+            location = glGetUniformLocation(self.program, name)
+            if location < 0:
+                continue
+
+            # arrays are reported as "name[0]", register them under both names
+            info = UniformInfo(name, location, int(gl_type), int(size))
+            self.uniforms[name] = info
+            if name.endswith("[0]"):
+                self.uniforms[name[:-3]] = info
+
+    # shader object that owns a program, None if it was not created through Shader
+    @classmethod
+    def from_program(cls, program):
+        return cls._programs.get(program)
+
+    def get_uniform(self, name):
+        return self.uniforms.get(name)
+
+    def get_uniform_location(self, name):
+        info = self.uniforms.get(name)
+        return info.location if info is not None else -1
 
-    # WILL DELETE
+    # upload a value through the cached location and typed setter
+    # expects the program to be in use
+    def set_uniform(self, name, value):
+        info = self.uniforms.get(name)
+        if info is None or info.setter is None:
+            return False
+        info.upload(value)
+        return True
 
     def set_uniform_matrix4fv(self, name, mat):
-        loc = glGetUniformLocation(self.program, name)
-        if loc != -1:
-            glUniformMatrix4fv(loc, 1, GL_TRUE, mat)
+        info = self.uniforms.get(name)
+        if info is not None:
+            glUniformMatrix4fv(info.location, 1, GL_TRUE, mat)
 
     def set_uniform_vec4(self, name, vec):
-        loc = glGetUniformLocation(self.program, name)
-        if loc != -1:
-            glUniform4fv(loc, 1, vec)
+        info = self.uniforms.get(name)
+        if info is not None:
+            glUniform4fv(info.location, 1, vec)
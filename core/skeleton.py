@@ -0,0 +1,98 @@
+import hashlib
+import json
+import numpy as np
+
+#####################################
+# SKELETON
+#####################################
+
+# rotation order codes, index = code
+ROTATION_ORDERS = ("XYZ", "XZY", "YXZ", "YZX", "ZXY", "ZYX")
+AXES = "XYZ"
+
+class Skeleton:
+    """
+    Flat, array-backed joint hierarchy (no GL resources).
+    Joints are stored in topological (file pre-)order, so a parent always precedes its children
+    and channel_offset increases with the joint index.
+    """
+    def __init__(self, names, parents, offsets, channels):
+        self.names = list(names)
+        self.channels = [list(c) for c in channels] # per joint channel names, empty for End Sites
+
+        num_joints = len(self.names)
+        self.parent_index = np.array(parents, dtype=np.int32).reshape(num_joints)
+        self.offsets = np.array(offsets, dtype=np.float32).reshape(num_joints, 3)
+        self.channel_count = np.array([len(c) for c in self.channels], dtype=np.int32)
+        self.channel_offset = np.zeros(num_joints, dtype=np.int32)
+        self.channel_offset[1:] = np.cumsum(self.channel_count)[:-1]
+        self.rotation_order = np.array([ROTATION_ORDERS.index(get_rotation_order(c)) for c in self.channels], dtype=np.int8)
+        self.is_end_site = np.array([name == "EndSite" for name in self.names], dtype=bool)
+
+        # column of each channel inside a frame row, -1 if the joint has no such channel
+        # position_channels is ordered X, Y, Z; rotation_channels follows the rotation order
+        self.position_channels = np.full((num_joints, 3), -1, dtype=np.int32)
+        self.rotation_channels = np.full((num_joints, 3), -1, dtype=np.int32)
+        for j, joint_channels in enumerate(self.channels):
+            order = ROTATION_ORDERS[self.rotation_order[j]]
+            for k, channel in enumerate(joint_channels):
+                column = self.channel_offset[j] + k
+                if channel.endswith("position"):
+                    self.position_channels[j, AXES.index(channel[0])] = column
+                elif channel.endswith("rotation"):
+                    self.rotation_channels[j, order.index(channel[0])] = column
+
+        # depth of each joint (root = 0)
+        self.depth = np.zeros(num_joints, dtype=np.int32)
+        for j in range(num_joints):
+            parent = self.parent_index[j]
+            if parent >= 0:
+                if parent >= j:
+                    raise ValueError(f"Joint '{self.names[j]}' is listed before its parent")
+                self.depth[j] = self.depth[parent] + 1
+        self._levels = None
+
+    @property
+    def num_joints(self):
+        return len(self.names)
+
+    @property
+    def num_channels(self):
+        return int(self.channel_count.sum())
+
+    # joint indices grouped per depth level, root level first
+    def levels(self):
+        if self._levels is None:
+            self._levels = [np.flatnonzero(self.depth == d) for d in range(int(self.depth.max(initial=-1)) + 1)]
+        return self._levels
+
+    # hash of the topology (names, parents, channels), equal for clips that can share FK calls
+    # rest offsets are excluded, they differ between performers of the same rig
+    def signature(self):
+        topology = json.dumps([self.names, self.parent_index.tolist(), self.channels])
+        return hashlib.blake2b(topology.encode(), digest_size=8).hexdigest()
+
+    # index of the first joint with this name, -1 if missing
+    def find(self, name):
+        return self.names.index(name) if name in self.names else -1
+
+    # JSON serializable description (used by the binary motion cache)
+    def to_dict(self):
+        return {
+            "names": self.names,
+            "parents": self.parent_index.tolist(),
+            "offsets": self.offsets.tolist(),
+            "channels": self.channels,
+            "orders": [ROTATION_ORDERS[code] for code in self.rotation_order],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["names"], data["parents"], data["offsets"], data["channels"])
+
+# rotation order from the channel layout (e.g. "ZXY" from Zrotation Xrotation Yrotation)
+# axes without a channel are appended in XYZ order
+def get_rotation_order(channels):
+    order = "".join(ch[0] for ch in channels if ch.endswith("rotation"))
+    order += "".join(axis for axis in AXES if axis not in order)
+    return order if order in ROTATION_ORDERS else "XYZ"
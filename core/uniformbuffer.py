@@ -0,0 +1,98 @@
+from OpenGL.GL import *
+import numpy as np
+
+#####################################
+# UNIFORM BUFFER OBJECTS
+#####################################
+# per-frame data shared by every program (camera, lights), written once per frame.
+# every core.Shader connects the blocks below to their binding point at link time,
+# so a shader only has to declare the block to receive the data.
+
+CAMERA_BLOCK = "Camera"
+LIGHT_BLOCK = "Light"
+
+BLOCK_BINDINGS = {
+    CAMERA_BLOCK: 0,
+    LIGHT_BLOCK: 1,
+}
+
+# std140 members as (name, shape); matrices are declared row_major in GLSL, so
+# the engine's row-major arrays are copied as they are.
+# every member starts on a 16 byte boundary (floats are padded to a vec4 slot),
+# which matches std140 as long as a float is followed by a vec4/mat4 or ends the block.
+BLOCK_LAYOUTS = {
+    CAMERA_BLOCK: (
+        ("view_matrix", (4, 4)),
+        ("projection_matrix", (4, 4)),
+        ("view_projection_matrix", (4, 4)),
+        ("eye_position", (4,)),
+    ),
+    LIGHT_BLOCK: (
+        ("light_position", (4,)), # world space, xyz = pos, w=0: directional (cel/phong move it to view space)
+        ("light_color", (4,)),    # rgb
+        ("light_intensity", ()),
+    ),
+}
+
+# connect every known block of a linked program to its binding point
+def bind_uniform_blocks(program):
+    for name, binding in BLOCK_BINDINGS.items():
+        index = glGetUniformBlockIndex(program, name)
+        if index != GL_INVALID_INDEX:
+            glUniformBlockBinding(program, index, binding)
+
+class UniformBuffer:
+    """
+    CPU staging block + GL uniform buffer bound to a fixed binding point.
+    Members are numpy views into the staging block (ubo["view_matrix"][:] = ...);
+    upload() sends the block only if it changed since the last upload.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.binding = BLOCK_BINDINGS[name]
+
+        # member offsets in floats
+        self.fields = {}
+        offset = 0
+        for member, shape in BLOCK_LAYOUTS[name]:
+            size = int(np.prod(shape))
+            self.fields[member] = (offset, shape)
+            offset += -(-size // 4) * 4 # round up to a vec4 slot
+
+        self.data = np.zeros(offset, dtype=np.float32)
+        self._uploaded = np.full(offset, np.nan, dtype=np.float32) # last uploaded block, NaN = never
+        self.ubo = None
+
+    def __getitem__(self, member):
+        offset, shape = self.fields[member]
+        return self.data[offset:offset + int(np.prod(shape))].reshape(shape)
+
+    def __setitem__(self, member, value):
+        offset, shape = self.fields[member]
+        value = np.asarray(value, dtype=np.float32).ravel()
+        self.data[offset:offset + len(value)] = value
+
+    def create(self):
+        self.ubo = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferData(GL_UNIFORM_BUFFER, self.data.nbytes, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        glBindBufferBase(GL_UNIFORM_BUFFER, self.binding, self.ubo)
+
+    def upload(self):
+        if np.array_equal(self.data, self._uploaded):
+            return False
+        if self.ubo is None:
+            self.create()
+
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, self.data.nbytes, self.data)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        self._uploaded[:] = self.data
+        return True
+
+    def release(self):
+        if self.ubo is not None:
+            glDeleteBuffers(1, [self.ubo])
+            self.ubo = None
+        self._uploaded[:] = np.nan
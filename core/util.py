@@ -1,61 +1,77 @@
 import numpy as np
-import quaternion as qt
 
 #####################################
 # UTILITY FUNCTIONS
 #####################################
 
-def set_translate(v):
-    T = np.zeros((4, 4), dtype=np.float32)
-    T[0,3] = v[0]
-    T[1,3] = v[1]
-    T[2,3] = v[2]
-    return T
+def get_model_matrix(position, rotation, scale): # rotation is quaternion    
+    return compose_trs(position, rotation, scale)
 
-def set_scale(v):
-    S = np.zeros((4, 4), dtype=np.float32)
-    S[0,0] = v[0]
-    S[1,1] = v[1]
-    S[2,2] = v[2]
-    return S
+def compose_trs(position, rotation, scale, out=None):
+    """
+    Writes T * R * S directly into `out` (4x4 float32, allocated if None) from the quaternion
+    components, without intermediate matrices. rotation is a numpy-quaternion or (x, y, z, w).
+    """
+    if out is None:
+        out = np.empty((4, 4), dtype=np.float32)
 
-def set_rotate(q):
-    # convert to axis and angle
-    q_x, q_y, q_z, q_w = q
-    angle = 2 * np.arccos(q_w)
-    q_s = np.sqrt(1 - q_w * q_w)
-    if q_s < 1e-6:
-        axis = np.array([1, 0, 0], dtype=np.float32)
+    if rotation.shape == ():
+        # numpy-quaternion [w, x, y, z]
+        x = rotation.x; y = rotation.y; z = rotation.z; w = rotation.w
     else:
-        axis = np.array([q_x, q_y, q_z], dtype=np.float32) / q_s
-    
-    # build rotation matrix R
-    R = np.zeros((4, 4), dtype=np.float32)
-    c = np.cos(angle); s = np.sin(angle); x = axis[0]; y = axis[1]; z = axis[2]
-    R[0,0] = x * x * (1 - c) + c;     R[0,1] = x * y * (1 - c) - z * s; R[0,2] = x * z * (1 - c) + y * s; R[0,3] = 0
-    R[1,0] = x * y * (1 - c) + z * s; R[1,1] = y * y * (1 - c) + c;     R[1,2] = y * z * (1 - c) - x * s; R[1,3] = 0
-    R[2,0] = x * z * (1 - c) - y * s; R[2,1] = y * z * (1 - c) + x * s; R[2,2] = z * z * (1 - c) + c;     R[2,3] = 0
-    R[3,0] = 0;                       R[3,1] = 0;                       R[3,2] = 0;                       R[3,3] = 1
-    
-    return R
+        if rotation.shape[0] != 4:
+            raise ValueError("rotation must be passed as quaternions")
+        x = float(rotation[0]); y = float(rotation[1]); z = float(rotation[2]); w = float(rotation[3])
 
-def get_model_matrix(position, rotation, scale): # rotation is quaternion    
-    if rotation.shape == ():
-        # Convert numpy-quaternion [w, x, y, z] to float array
-        q_vec = qt.as_float_array(rotation)
-        # Reorder to [x, y, z, w] because set_rotate expects (x, y, z, w)
-        rotation = np.array([q_vec[1], q_vec[2], q_vec[3], q_vec[0]], dtype=np.float32)
+    # s = 2 / |q|^2 keeps the matrix a pure rotation for non-unit quaternions
+    n = x * x + y * y + z * z + w * w
+    s = 2.0 / n if n > 0.0 else 0.0
+    xx = x * x * s; yy = y * y * s; zz = z * z * s
+    xy = x * y * s; xz = x * z * s; yz = y * z * s
+    wx = w * x * s; wy = w * y * s; wz = w * z * s
+    sx = float(scale[0]); sy = float(scale[1]); sz = float(scale[2])
+
+    out[0, 0] = (1.0 - yy - zz) * sx; out[0, 1] = (xy - wz) * sy;       out[0, 2] = (xz + wy) * sz;       out[0, 3] = position[0]
+    out[1, 0] = (xy + wz) * sx;       out[1, 1] = (1.0 - xx - zz) * sy; out[1, 2] = (yz - wx) * sz;       out[1, 3] = position[1]
+    out[2, 0] = (xz - wy) * sx;       out[2, 1] = (yz + wx) * sy;       out[2, 2] = (1.0 - xx - yy) * sz; out[2, 3] = position[2]
+    out[3, 0] = 0.0;                  out[3, 1] = 0.0;                  out[3, 2] = 0.0;                  out[3, 3] = 1.0
+
+    return out # P @ V @ M @ local
+
+def compose_trs_batch(positions, rotations, scales, out=None):
+    """
+    Batched compose_trs: (N,3) positions, (N,4) quaternions (x, y, z, w) and (N,3) scales
+    -> (N,4,4) matrices, written into `out` if given.
+    """
+    positions = np.asarray(positions, dtype=np.float32)
+    rotations = np.asarray(rotations, dtype=np.float32)
+    scales = np.asarray(scales, dtype=np.float32)
+    if rotations.shape[-1] != 4:
+        raise ValueError("rotations must be passed as (N,4) quaternions")
+
+    if out is None:
+        out = np.empty((len(positions), 4, 4), dtype=np.float32)
+
+    x = rotations[:, 0]; y = rotations[:, 1]; z = rotations[:, 2]; w = rotations[:, 3]
+    n = np.einsum('ij,ij->i', rotations, rotations)
+    s = np.divide(2.0, n, out=np.zeros_like(n), where=n > 0.0)
+    xs = x * s; ys = y * s; zs = z * s
+    sx = scales[:, 0]; sy = scales[:, 1]; sz = scales[:, 2]
+
+    out[:, 0, 0] = (1.0 - y * ys - z * zs) * sx
+    out[:, 0, 1] = (x * ys - w * zs) * sy
+    out[:, 0, 2] = (x * zs + w * ys) * sz
+    out[:, 1, 0] = (x * ys + w * zs) * sx
+    out[:, 1, 1] = (1.0 - x * xs - z * zs) * sy
+    out[:, 1, 2] = (y * zs - w * xs) * sz
+    out[:, 2, 0] = (x * zs - w * ys) * sx
+    out[:, 2, 1] = (y * zs + w * xs) * sy
+    out[:, 2, 2] = (1.0 - x * xs - y * ys) * sz
+    out[:, :3, 3] = positions[:, :3]
+    out[:, 3, :3] = 0.0
+    out[:, 3, 3] = 1.0
 
-    if rotation.shape[0] != 4:
-        raise ValueError("rotation must be passed as quaternions")
-    
-    T = set_translate(position)
-    R = set_rotate(rotation)
-    S = set_scale(scale)
-    
-    M = T @ R @ S
-    
-    return M # P @ V @ M @ local
+    return out
 
 def normalize(v):
     norm = np.linalg.norm(v)
@@ -3,6 +3,7 @@ from OpenGL.GL import *
 from core import *
 from .config import *
 from .keyboard import *
+from .headless import HeadlessWindow
 
 class Window(Plugin):
     def __init__(self):
@@ -35,6 +36,9 @@ class Window(Plugin):
         # export window object
         SharedData.export_data("window", self)
 
+    def should_close(self):
+        return glfw.window_should_close(self.glfw_window)
+
     # assemble all configurations and files
     def assemble(self):
         # add ui
@@ -0,0 +1,128 @@
+import ctypes
+import os
+import struct
+import subprocess
+import zlib
+from collections import deque
+import numpy as np
+from OpenGL.GL import *
+
+#####################################
+# ASYNC FRAME READBACK
+#####################################
+
+class FrameReader:
+    """
+    Reads the bound framebuffer into a ring of pixel buffer objects.
+    capture() only queues glReadPixels into the next PBO; the frame is mapped and handed to
+    the writer once `num_buffers - 1` newer frames were queued, so the CPU never waits on the GPU.
+    """
+    def __init__(self, width, height, writer, num_buffers=2):
+        self.width = width
+        self.height = height
+        self.writer = writer
+        self.size = width * height * 4 # RGBA8
+
+        self.pbos = [int(pbo) for pbo in np.atleast_1d(glGenBuffers(num_buffers))]
+        for pbo in self.pbos:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self.size, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+        self.index = 0
+        self.pending = deque() # PBO indices holding a queued frame, oldest first
+        self.frames_written = 0
+
+    def capture(self):
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbos[self.index])
+        glReadPixels(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.pending.append(self.index)
+        self.index = (self.index + 1) % len(self.pbos)
+
+        # the oldest frame had a whole frame to finish its transfer
+        if len(self.pending) == len(self.pbos):
+            self._read(self.pending.popleft())
+
+    # write out every queued frame (end of a sequence)
+    def flush(self):
+        while self.pending:
+            self._read(self.pending.popleft())
+
+    def _read(self, index):
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbos[index])
+        address = glMapBufferRange(GL_PIXEL_PACK_BUFFER, 0, self.size, GL_MAP_READ_BIT)
+        if address:
+            pixels = np.ctypeslib.as_array((ctypes.c_ubyte * self.size).from_address(address))
+            # GL rows start at the bottom
+            frame = pixels.reshape(self.height, self.width, 4)[::-1].copy()
+            glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+            self.writer.write(frame)
+            self.frames_written += 1
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+    def release(self):
+        self.flush()
+        glDeleteBuffers(len(self.pbos), self.pbos)
+        self.pbos = []
+
+#####################################
+# FRAME WRITERS
+#####################################
+
+# minimal PNG encoder (zlib + struct), pixels is (H, W, 3) RGB or (H, W, 4) RGBA uint8
+def write_png(path, pixels, compression=6):
+    height, width, channels = pixels.shape
+    color_type = {3: 2, 4: 6}[channels]
+
+    # filter type 0 (none) in front of every row
+    raw = np.zeros((height, 1 + width * channels), dtype=np.uint8)
+    raw[:, 1:] = pixels.reshape(height, -1)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    with open(path, 'wb') as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), compression)))
+        f.write(chunk(b"IEND", b""))
+
+class PNGSequenceWriter:
+    def __init__(self, directory, prefix="frame_", compression=3, alpha=False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.compression = compression # speed over size, previews are overwritten often
+        self.alpha = alpha
+        self.count = 0
+
+    def write(self, frame):
+        pixels = frame if self.alpha else frame[..., :3]
+        write_png(os.path.join(self.directory, f"{self.prefix}{self.count:05d}.png"), pixels, self.compression)
+        self.count += 1
+
+    def close(self):
+        pass
+
+# raw RGBA frames piped to an encoder process (e.g. ffmpeg_command())
+class PipeWriter:
+    def __init__(self, command):
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        self.count = 0
+
+    def write(self, frame):
+        self.process.stdin.write(frame.tobytes())
+        self.count += 1
+
+    def close(self):
+        self.process.stdin.close()
+        return self.process.wait()
+
+def ffmpeg_command(path, width, height, fps=30, codec="libx264"):
+    return [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+        "-c:v", codec, "-pix_fmt", "yuv420p", path,
+    ]
@@ -0,0 +1,175 @@
+import ctypes
+from OpenGL.GL import *
+from core import *
+from .config import *
+from .capture import FrameReader
+
+#####################################
+# OFFSCREEN CONTEXTS
+#####################################
+# PyOpenGL binds its platform (PYOPENGL_PLATFORM=egl/osmesa) on the first OpenGL import,
+# so main.py / render.py set it before importing core.
+
+EGL_PLATFORM_SURFACELESS_MESA = 0x31DD
+
+def create_egl_context(major=4, minor=1):
+    from OpenGL import EGL
+
+    # surfaceless platform (no X/Wayland needed), then whatever the default display is
+    display = EGL.eglGetPlatformDisplayEXT(EGL_PLATFORM_SURFACELESS_MESA, EGL.EGL_DEFAULT_DISPLAY, None)
+    if not display:
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if not EGL.eglInitialize(display, None, None):
+        raise Exception("create_egl_context(): failed in eglInitialize()")
+
+    config_attribs = [EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT, EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE]
+    config = EGL.EGLConfig()
+    num_configs = EGL.EGLint()
+    EGL.eglChooseConfig(display, (EGL.EGLint * len(config_attribs))(*config_attribs), ctypes.pointer(config), 1, ctypes.pointer(num_configs))
+    if num_configs.value == 0:
+        raise Exception("create_egl_context(): no OpenGL capable EGL config")
+
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context_attribs = [
+        EGL.EGL_CONTEXT_MAJOR_VERSION, major,
+        EGL.EGL_CONTEXT_MINOR_VERSION, minor,
+        EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT,
+        EGL.EGL_NONE,
+    ]
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, (EGL.EGLint * len(context_attribs))(*context_attribs))
+    if not context or not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+        raise Exception("create_egl_context(): failed to make a surfaceless context current")
+
+    def destroy():
+        EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+        EGL.eglDestroyContext(display, context)
+        EGL.eglTerminate(display)
+    return destroy
+
+def create_osmesa_context(width, height, major=4, minor=1):
+    from OpenGL import osmesa, arrays
+
+    attribs = [
+        osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+        osmesa.OSMESA_DEPTH_BITS, 24,
+        osmesa.OSMESA_PROFILE, osmesa.OSMESA_CORE_PROFILE,
+        osmesa.OSMESA_CONTEXT_MAJOR_VERSION, major,
+        osmesa.OSMESA_CONTEXT_MINOR_VERSION, minor,
+        0,
+    ]
+    context = osmesa.OSMesaCreateContextAttribs(attribs, None)
+    if not context:
+        raise Exception("create_osmesa_context(): failed in OSMesaCreateContextAttribs()")
+
+    # OSMesa needs a client buffer to be current, rendering itself goes to the FBO
+    buffer = arrays.GLubyteArray.zeros((height, width, 4))
+    if not osmesa.OSMesaMakeCurrent(context, buffer, GL_UNSIGNED_BYTE, width, height):
+        raise Exception("create_osmesa_context(): failed in OSMesaMakeCurrent()")
+
+    def destroy():
+        osmesa.OSMesaDestroyContext(context)
+    destroy.buffer = buffer # keep the client buffer alive with the context
+    return destroy
+
+#####################################
+# HEADLESS WINDOW
+#####################################
+
+class HeadlessWindow(Plugin):
+    """
+    Drop-in for Window without a display: an EGL (surfaceless) or OSMesa context rendering
+    into an FBO. With a writer attached (attach_writer), every frame is read back
+    asynchronously through PBOs in post_update().
+    """
+    def __init__(self, backend="egl", width=WIDTH, height=HEIGHT, max_frames=None):
+        # special plugin where callbacks are handled manually
+        # super().__init__()
+
+        self.glfw_window = None
+        self.backend = backend
+        self.width = width
+        self.height = height
+        self.max_frames = max_frames # should_close() after this many frames, None = never
+        self.frame_count = 0
+        self.reader = None
+
+        # create context
+        if backend == "egl":
+            self._destroy_context = create_egl_context()
+        elif backend == "osmesa":
+            self._destroy_context = create_osmesa_context(width, height)
+        else:
+            raise ValueError(f"Unknown headless backend '{backend}', expected 'egl' or 'osmesa'")
+        print(f"{self.__class__.__name__}: {glGetString(GL_RENDERER).decode()} ({glGetString(GL_VERSION).decode()})")
+
+        # offscreen framebuffer (RGBA8 color + 24 bit depth)
+        self.fbo = glGenFramebuffers(1)
+        self.color_rbo, self.depth_rbo = glGenRenderbuffers(2)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.color_rbo)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth_rbo)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.color_rbo)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth_rbo)
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise Exception(f"{self.__class__.__name__}: incomplete framebuffer")
+        glViewport(0, 0, width, height)
+
+        # export window object
+        SharedData.export_data("window", self)
+
+    # stream frames to a writer (PNGSequenceWriter, PipeWriter ...), None to stop
+    def attach_writer(self, writer, num_buffers=2):
+        if self.reader is not None:
+            self.reader.release()
+            self.reader = None
+        if writer is not None:
+            self.reader = FrameReader(self.width, self.height, writer, num_buffers)
+
+    def should_close(self):
+        return self.max_frames is not None and self.frame_count >= self.max_frames
+
+    # assemble all configurations and files
+    def assemble(self):
+        return
+
+    # setup basic settings (window, gui, logs etc)
+    def init(self):
+        glClearColor(*BG_COLOR)
+        return
+
+    # executed every frame
+    def update(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, self.width, self.height)
+
+        # clear the screen
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+    # executed after drawing elements
+    def post_update(self):
+        # queue the readback of this frame (no swap offscreen)
+        if self.reader is not None:
+            self.reader.capture()
+        self.frame_count += 1
+        return
+
+    # reset any modified parameters or files
+    def reset(self):
+        return
+
+    # release runtime data
+    def release(self):
+        if self.fbo is None:
+            return
+
+        self.attach_writer(None)
+        glDeleteFramebuffers(1, [self.fbo])
+        glDeleteRenderbuffers(2, [self.color_rbo, self.depth_rbo])
+        self.fbo = None
+        self._destroy_context()
+
+        return
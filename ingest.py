@@ -0,0 +1,26 @@
+#####################################
+# Motion library ingestion (headless)
+#####################################
+# python ingest.py assets                 parse every .bvh under assets/, write sidecars + assets/library.json
+# python ingest.py /data/mocap -j 16      16 worker processes
+# python ingest.py assets --force         re-parse everything
+
+import argparse
+import time
+
+from plugins.bvh.library import ingest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse a BVH library in parallel and build its index.")
+    parser.add_argument("root", nargs="?", default="assets", help="directory scanned recursively for .bvh files")
+    parser.add_argument("--index", default=None, help="index path (default: <root>/library.json)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="ignore the existing index")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    clips, stats = ingest(args.root, args.index, args.workers, args.force, verbose=not args.quiet)
+    elapsed = time.perf_counter() - start
+    print(f"{stats['total']} clips: {stats['parsed']} parsed, {stats['unchanged']} unchanged, "
+          f"{stats['failed']} failed ({elapsed:.2f} s)")
@@ -3,6 +3,15 @@
 #####################################
 
 # library imports
+import os
+import sys
+import config
+
+# headless backends pick the PyOpenGL platform, before the first OpenGL import
+if config.BACKEND in ("egl", "osmesa"):
+    os.environ.setdefault("PYOPENGL_PLATFORM", config.BACKEND)
+    os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
 import glfw
 from OpenGL.GL import *
 from OpenGL.GLU import *
@@ -24,7 +33,12 @@ from projects.test import Test
 
 shaders = []
 
-mv_window = _window.Window() # create window
+# opt-in frame profiler: python main.py --profile
+if "--profile" in sys.argv:
+    core.Profiler.enable(report_interval=5.0)
+
+# create window (on screen or offscreen, see config.BACKEND)
+mv_window = _window.Window() if config.BACKEND == "glfw" else _window.HeadlessWindow(config.BACKEND)
 viewport_cam = _camera.Camera() # create camera
 
 #####################################
@@ -47,16 +61,18 @@ def mv_init():
     # init gl states
     glw.init()
 
+    # declare shaders and export
+    shader = core.Shader("shaders/std/std.vert", "shaders/std/std.frag")
+    core.SharedData.export_shader("std_shader", shader) # set the default shader (fallback)
+
     # set callbacks
+    if mv_window.glfw_window is None:
+        return
     glfw.set_window_size_callback(mv_window.glfw_window, core.resize)
     glfw.set_key_callback(mv_window.glfw_window, core.keyboard)
     glfw.set_mouse_button_callback(mv_window.glfw_window, core.mouse)
     glfw.set_cursor_pos_callback(mv_window.glfw_window, core.cursor)
 
-    # declare shaders and export
-    shader = core.Shader("shaders/std/std.vert", "shaders/std/std.frag")
-    core.SharedData.export_shader("std_shader", shader) # set the default shader (fallback)
-
 def mv_terminate():
     mv_window.release()
 
@@ -77,22 +93,38 @@ if __name__ == "__main__":
     # Plugin.init()
     ###############################################
     core.PluginQueue.call_plugins("init")
-    
-    # setup camera matrices
-    for shader in shaders:
-        glw.set_uniform(shader.program, viewport_cam.view, "view_matrix")
-        glw.set_uniform(shader.program, viewport_cam.projection, "projection_matrix")
+
+    # camera and light matrices reach every shader through uniform blocks (core.uniformbuffer)
+
+    # frame pacing (fixed simulation step, vsync, idle throttling when unfocused)
+    if mv_window.glfw_window is not None:
+        core.Scheduler.set_window(mv_window.glfw_window)
+    core.Scheduler.start()
 
     ###############################################
     # Plugin.update(), Plugin.post_update()
     ###############################################
-    while not glfw.window_should_close(mv_window.glfw_window):
+    while not mv_window.should_close():
+        core.Scheduler.begin_frame()
         mv_window.update()
-        glw.update() # update uniforms
+
+        # work handed over from loader threads (clip swaps, GL resource creation)
+        core.GLCommandQueue.flush()
+
+        # simulation at a fixed timestep, catching up on slow frames
+        for dt in core.Scheduler.fixed_steps():
+            core.PluginQueue.call_plugins("fixed_update", dt)
+
+        # plugins first (camera/light blocks, object transforms), then the registered draws see this frame's state
         core.PluginQueue.call_plugins("update")
+        with core.Profiler.section("GLWrapper", "update"):
+            glw.update() # update uniforms, draw instances
 
-        mv_window.post_update()
+        with core.Profiler.section("Window", "swap"):
+            mv_window.post_update()
         core.PluginQueue.call_plugins("post_update")
+        core.Scheduler.end_frame()
+        core.Profiler.maybe_report()
 
     ###############################################
     # Plugin.reset()
@@ -104,4 +136,9 @@ if __name__ == "__main__":
     ###############################################
     core.PluginQueue.call_plugins("release")
 
-    mv_terminate()
\ No newline at end of file
+    mv_terminate()
+
+    if core.Profiler.enabled:
+        core.Profiler.report()
+        core.Profiler.dump_json("profile.json")
+        core.Profiler.dump_chrome_trace("profile_trace.json")
\ No newline at end of file
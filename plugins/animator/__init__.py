@@ -1,9 +1,13 @@
-import time
-from OpenGL.GL import glUseProgram
-
 import core
+from core.curve import LineBatch
+from core.kinematics import (
+    forward_kinematics, forward_kinematics_quaternions, local_quaternions, blend_local, pack_matrices
+)
 from plugins.bvh import BVH
-from core.joint import Joint
+from .posecache import PoseCache
+from .renderer import SkeletonRenderer
+from .crowd import Crowd
+from .loader import ClipData, ClipLoader, load_clip
 
 class Animator(core.Plugin):
     def __init__(self):
@@ -11,17 +15,39 @@ class Animator(core.Plugin):
         
         # 1. Composition: The Animator owns the Loader
         self.loader = BVH()
+        self.clip_path = "assets/a_001_1_1.bvh"
+        
+        # optional cache of whole-frame world poses keyed by (clip, motion generation, frame), see enable_pose_cache()
+        self.pose_cache = None
+
+        # joint palette renderer (two instanced draws per frame)
+        # set use_joint_objects to pose scene-graph Joints instead (one object per joint)
+        self.renderer = SkeletonRenderer()
+        self.palette_base = 0
+        self.use_joint_objects = False
+        self.joint_shader = None # shader of the Joint objects, "standard_shader" or one of our own
         
         # 2. Playback State
         self.is_playing = True
         self.playback_speed = 1.0
         self.loop = True
+
+        # sub-frame sampling: blend the two nearest frames ("slerp" or "nlerp")
+        # local quaternion poses are precomputed once per clip
+        self.interpolate = True
+        self.interpolation = "slerp"
+        self.local_rotations = None
+        self.local_translations = None
         
-        # 3. Timekeeping
-        self.start_time = 0.0
+        # 3. Timekeeping (advanced by the core.Scheduler fixed step)
         self.current_frame_index = 0
+        self.current_frame = 0.0 # fractional frame position
         self.accumulated_time = 0.0
-        self.last_update_time = time.time()
+
+        # clips load on a worker thread and swap in between frames (see load_clip_async)
+        # the current clip keeps playing until the next one is complete
+        self.async_load = True
+        self.clip_loader = ClipLoader(self.set_clip)
 
     def assemble(self, import_data):
         # Allow main.py to inject a specific BVH file path if needed
@@ -30,70 +56,154 @@ class Animator(core.Plugin):
     def init(self):
         # 1. Load the BVH File
         # (Hardcoded for demo, but ideally passed via SharedData or UI)
+        if self.async_load:
+            print("Animator: Loading BVH in the background...")
+            self.load_clip_async(self.clip_path)
+            return
+
         try:
             print("Animator: Loading BVH...")
-            self.loader.load_from_path("assets/a_001_1_1.bvh")
-            self.start_time = time.time()
-            self.last_update_time = time.time()
+            self.loader.load_from_path(self.clip_path)
+            if not self.loader.is_streaming: # streamed takes convert the two sampled rows per frame
+                self.local_rotations, self.local_translations = local_quaternions(self.loader.skeleton, self.loader.frames)
+            if self.use_joint_objects:
+                self.loader.create_joints(self.get_joint_shader()) # scene-graph joints for display
+            else:
+                self.palette_base = self.renderer.add_skeleton(self.loader.skeleton)
             print("Animator: Ready.")
         except FileNotFoundError:
             print("Animator Error: 'assets/walk.bvh' not found.")
 
+    # non-blocking clip switch, playback continues on the current clip meanwhile
+    def load_clip_async(self, path):
+        return self.clip_loader.request(path)
+
+    # swap in a loaded clip (main thread, between frames)
+    def set_clip(self, clip):
+        self.loader.set_motion(clip.skeleton, clip.frames, clip.frame_time)
+        self.clip_path = clip.path
+        if self.pose_cache is not None:
+            self.pose_cache.clear() # poses of the previous motion can't be hit anymore
+        self.local_rotations, self.local_translations = clip.local_rotations, clip.local_translations
+        if self.local_rotations is None and not self.loader.is_streaming:
+            self.local_rotations, self.local_translations = local_quaternions(clip.skeleton, clip.frames)
+
+        # display resources (GL), created here on the main thread
+        if self.use_joint_objects:
+            self.loader.create_joints(self.get_joint_shader())
+        else:
+            self.renderer.clear()
+            self.palette_base = self.renderer.add_skeleton(clip.skeleton)
+
+        self.reset()
+        print(f"Animator: Ready ({clip.path}, {len(clip.frames)} frames).")
+
+    def fixed_update(self, dt):
+        # Accumulate time adjusted by speed
+        if self.is_playing:
+            self.accumulated_time += dt * self.playback_speed
+
     def update(self):
-        if not self.loader.root_object or not self.loader.frames:
+        if self.loader.skeleton is None or len(self.loader.frames) == 0:
             return
 
         # 1. Time Management
-        current_real_time = time.time()
-        delta_time = current_real_time - self.last_update_time
-        self.last_update_time = current_real_time
-
         if self.is_playing:
-            # Accumulate time adjusted by speed
-            self.accumulated_time += delta_time * self.playback_speed
+            # playback time of the last fixed step + the part of a step elapsed since
+            playback_time = self.accumulated_time + core.Scheduler.alpha * core.Scheduler.fixed_dt * self.playback_speed
             
             # Calculate frame index based on BVH's defined frame time
             # Frame = (Total Time / Time Per Frame)
-            raw_frame = self.accumulated_time / self.loader.frame_time
+            raw_frame = playback_time / self.loader.frame_time
+            num_frames = len(self.loader.frames)
             
             if self.loop:
-                self.current_frame_index = int(raw_frame) % len(self.loader.frames)
+                self.current_frame = raw_frame % num_frames
             else:
-                self.current_frame_index = min(int(raw_frame), len(self.loader.frames) - 1)
+                self.current_frame = min(raw_frame, num_frames - 1)
+            self.current_frame_index = int(self.current_frame)
 
         # 2. Pose Application
-        # We retrieve the specific frame of data
-        frame_data = self.loader.frames[self.current_frame_index]
-        data_ptr = 0
+        # World matrices (J, 4, 4) at the current (fractional) frame
+        world_matrices = self.sample_world_matrices(self.current_frame)
 
-        # Iterate through the flattened list of animated nodes (created by Loader)
-        for node in self.loader.animated_nodes:
-            joint = node['object']
-            
-            # The Joint class handles the specific matrix math
-            if isinstance(joint, Joint):
-                data_ptr = joint.set_pose_from_frame(frame_data, data_ptr)
+        if not self.use_joint_objects:
+            # whole palette in one upload, joints and bones in two instanced draws
+            self.renderer.set_pose(self.palette_base, world_matrices)
+            self.renderer.draw()
+            return
 
-        # 3. Rendering
-        # Fetch shared resources (Camera & Shader) from Core
-        shader = core.SharedData.import_data("standard_shader")
-        camera = core.SharedData.import_data("camera")
+        # Joints were created in skeleton order, so row j poses joint j (one scatter into the scene graph)
+        if len(self.loader.joints):
+            self.loader.root_object._graph.set_world_matrices(self.loader.joint_nodes, world_matrices)
 
-        if shader and camera:
-            glUseProgram(shader.program)
-            
-            # Update Camera Uniforms
-            shader.set_uniform_matrix4fv("view_matrix", camera.view)
-            shader.set_uniform_matrix4fv("projection_matrix", camera.projection)
-            
-            # Draw the Skeleton Hierarchy
-            # Calling draw() on the root automatically draws all children (Joints)
-            # and their components (Bones/Lines)
-            self.loader.root_object.draw(shader.program)
+        # Bones: segment from each parent joint to its child, updated in one call
+        bones = self.loader.bone_joints
+        if len(bones):
+            parents = self.loader.skeleton.parent_index[bones]
+            LineBatch.shared().set_segments(self.loader.bone_handles, world_matrices[parents, :3, 3], world_matrices[bones, :3, 3])
+
+        # 3. Rendering
+        # the Joints are registered with GLWrapper and drawn instanced from their rows by glw.update()
+        # all bones (and other batched lines) in one GL_LINES draw
+        LineBatch.shared().draw()
+
+    # packed world matrices (J, 4, 4) at a fractional frame position
+    # whole frames go through get_world_matrices (and the pose cache), others blend the two nearest frames
+    # blended poses are never cached: FK runs on the blended local rotations (world poses of the
+    # neighbours can't be blended into the same result) and fractional positions rarely repeat
+    def sample_world_matrices(self, frame):
+        index = int(frame)
+        alpha = frame - index
+        if not self.interpolate or alpha == 0.0:
+            return self.get_world_matrices(index)
+
+        num_frames = len(self.loader.frames)
+        next_index = (index + 1) % num_frames if self.loop else min(index + 1, num_frames - 1)
+        if self.local_rotations is not None:
+            local_rotations, local_translations, rows = self.local_rotations, self.local_translations, ([index], [next_index])
+        else:
+            local_rotations, local_translations = local_quaternions(self.loader.skeleton, self.loader.frames[[index, next_index]])
+            rows = ([0], [1])
+        rotations, translations = blend_local(
+            local_rotations, local_translations, rows[0], rows[1], [alpha], self.interpolation
+        )
+        positions, world_rotations = forward_kinematics_quaternions(self.loader.skeleton, rotations, translations)
+        return pack_matrices(world_rotations[0], positions[0])
+
+    # packed world matrices (J, 4, 4) of one frame
+    def get_world_matrices(self, frame_index):
+        # the generation changes on every load/swap, so a reloaded or edited clip at the same path misses
+        key = (self.clip_path, self.loader.generation, frame_index)
+        skeleton = self.loader.skeleton
+
+        if self.pose_cache is not None:
+            cached = self.pose_cache.get(key, skeleton.num_joints)
+            if cached is not None:
+                return cached
+
+        positions, rotations = forward_kinematics(skeleton, self.loader.frames, frame_index, frame_index + 1)
+        matrices = pack_matrices(rotations[0], positions[0])
+
+        if self.pose_cache is not None:
+            return self.pose_cache.put(key, matrices)
+        return matrices
+
+    # std shader for the Joint objects, the project's "standard_shader" if it exported one
+    def get_joint_shader(self):
+        if self.joint_shader is None:
+            self.joint_shader = core.SharedData.import_data("standard_shader")
+        if self.joint_shader is None:
+            self.joint_shader = core.Shader("shaders/std/std.vert", "shaders/std/std.frag")
+        return self.joint_shader
 
     def release(self):
+        self.clip_loader.shutdown()
+        self.renderer.release()
         self.loader.release()
         self.loader = None
+        self.local_rotations = None
+        self.local_translations = None
 
     # ---------------------------------------------
     # Controls (Can be hooked up to GUI or Keyboard)
@@ -101,7 +211,6 @@ class Animator(core.Plugin):
     
     def play(self):
         self.is_playing = True
-        self.last_update_time = time.time()
 
     def pause(self):
         self.is_playing = False
@@ -109,6 +218,21 @@ class Animator(core.Plugin):
     def set_speed(self, speed):
         self.playback_speed = speed
 
+    # cache world poses so looping/scrubbing over seen frames skips the FK work
+    # only whole frames are cached, i.e. with interpolate off (or when playback lands exactly on a frame)
+    def enable_pose_cache(self, budget_mb=64):
+        if self.interpolate:
+            print("Animator Warning: the pose cache only serves whole frames, set interpolate = False to use it.")
+        self.pose_cache = PoseCache(int(budget_mb * 1024 * 1024))
+
+    def disable_pose_cache(self):
+        self.pose_cache = None
+
+    # hit/miss counters for sizing the cache
+    def get_pose_cache_stats(self):
+        return self.pose_cache.stats() if self.pose_cache is not None else None
+
     def reset(self):
         self.accumulated_time = 0.0
-        self.current_frame_index = 0
\ No newline at end of file
+        self.current_frame_index = 0
+        self.current_frame = 0.0
\ No newline at end of file
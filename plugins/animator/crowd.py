@@ -0,0 +1,233 @@
+import glob
+import math
+import os
+import numpy as np
+
+import core
+from core.kinematics import forward_kinematics_quaternions, local_quaternions, blend_local, pack_matrices
+from plugins.bvh import read_motion, STREAM_THRESHOLD
+from plugins.bvh.stream import MotionStream
+from .renderer import SkeletonRenderer
+
+#####################################
+# CLIPS & CHARACTERS
+#####################################
+
+# motion of one BVH file, shared by every character playing it
+class Clip:
+    def __init__(self, path, skeleton, frames, frame_time):
+        # groups precompute the local poses of every frame, a stream would be decoded whole
+        if isinstance(frames, MotionStream):
+            raise TypeError(f"{path}: crowd clips need in-memory frames, not a MotionStream")
+        self.path = path
+        self.skeleton = skeleton
+        self.frames = frames # (F, C) float32
+        self.frame_time = frame_time
+
+    @property
+    def num_frames(self):
+        return len(self.frames)
+
+    @property
+    def duration(self):
+        return self.num_frames * self.frame_time
+
+class Character:
+    def __init__(self, clip, time_offset=0.0, speed=1.0, root_transform=None):
+        self.clip = clip
+        self.time_offset = time_offset # seconds into the clip at crowd time 0
+        self.speed = speed
+        self.root_transform = np.eye(4, dtype=np.float32) if root_transform is None else np.array(root_transform, dtype=np.float32)
+        self.palette_base = 0 # first joint in the renderer palette
+
+#####################################
+# SKELETON GROUP
+#####################################
+
+class SkeletonGroup:
+    """
+    Characters whose clips share one skeleton topology (Skeleton.signature()).
+    The clips' local poses (quaternions + translations, with each clip's rest offsets)
+    are precomputed into one block, so all characters' poses are one blend of the two
+    nearest frames + one FK call.
+    """
+    def __init__(self, skeleton, interpolation="slerp"):
+        self.skeleton = skeleton
+        self.interpolation = interpolation # "slerp", "nlerp" or None (nearest frame)
+        self.clips = []
+        self.characters = []
+        self._clip_start = {} # { id(Clip) : first row in local_rotations/local_translations }
+        self.local_rotations = None
+        self.local_translations = None
+        self._dirty = True
+
+    def add(self, character):
+        if character.clip not in self.clips:
+            self.clips.append(character.clip)
+        self.characters.append(character)
+        self._dirty = True
+
+    def rebuild(self):
+        num_joints = self.skeleton.num_joints
+
+        # local poses of all clips as one block; clips not seen before are converted and appended,
+        # the block is the only copy (rows of a clip are found through _clip_start)
+        new_clips = [clip for clip in self.clips if id(clip) not in self._clip_start]
+        if new_clips:
+            rows = 0 if self.local_rotations is None else len(self.local_rotations)
+            poses = [local_quaternions(clip.skeleton, clip.frames) for clip in new_clips]
+            for clip in new_clips:
+                self._clip_start[id(clip)] = rows
+                rows += clip.num_frames
+            if self.local_rotations is not None:
+                poses.insert(0, (self.local_rotations, self.local_translations))
+            self.local_rotations = np.concatenate([rotations for rotations, _ in poses])
+            self.local_translations = np.concatenate([translations for _, translations in poses])
+
+        # per character playback parameters
+        self.row_start = np.array([self._clip_start[id(c.clip)] for c in self.characters])
+        self.num_frames = np.array([c.clip.num_frames for c in self.characters])
+        self.frame_time = np.array([c.clip.frame_time for c in self.characters])
+        self.roots = np.stack([c.root_transform for c in self.characters])[:, None] # (N, 1, 4, 4)
+
+        # palette rows of every joint of every character, in character order
+        bases = np.array([c.palette_base for c in self.characters])
+        self.palette_rows = (bases[:, None] + np.arange(num_joints)[None, :]).reshape(-1)
+        self._dirty = False
+
+    # fractional frame position of every character at crowd time `clock` (looping)
+    def frame_positions(self, clock):
+        times = clock * np.array([c.speed for c in self.characters]) + np.array([c.time_offset for c in self.characters])
+        return np.mod(times / self.frame_time, self.num_frames)
+
+    # poses every character at crowd time `clock` and writes the world matrices into the palette
+    def evaluate(self, clock, palette):
+        if self._dirty:
+            self.rebuild()
+
+        frames = self.frame_positions(clock)
+        index = np.minimum(frames.astype(np.int64), self.num_frames - 1)
+        rows0 = self.row_start + index
+        rows1 = self.row_start + (index + 1) % self.num_frames
+        alpha = frames - index if self.interpolation else np.zeros(len(frames))
+
+        rotations, translations = blend_local(
+            self.local_rotations, self.local_translations, rows0, rows1, alpha, self.interpolation or "nlerp"
+        )
+        positions, world_rotations = forward_kinematics_quaternions(self.skeleton, rotations, translations)
+        world = self.roots @ pack_matrices(world_rotations, positions) # (N, J, 4, 4)
+        palette[self.palette_rows] = world.reshape(-1, 4, 4)
+
+#####################################
+# CROWD
+#####################################
+
+class Crowd(core.Plugin):
+    """
+    Plays many BVH characters at once: each with its own clip, time offset, speed and root transform.
+    Clips are loaded once per path; poses are one batched FK call per skeleton group per frame,
+    drawn with one SkeletonRenderer (two instanced draws for the whole crowd).
+    """
+    def __init__(self):
+        super().__init__()
+
+        self.clips = {} # { PATH : Clip }
+        self.groups = {} # { SKELETON_SIGNATURE : SkeletonGroup }
+        self.characters = []
+        self.renderer = SkeletonRenderer()
+
+        # Playback State
+        self.is_playing = True
+        self.playback_speed = 1.0
+        self.interpolation = "slerp" # sub-frame blending of new groups, None for nearest frame
+
+        # Timekeeping (advanced by the core.Scheduler fixed step)
+        self.clock = 0.0
+
+    # shared clip of a BVH file
+    # takes above STREAM_THRESHOLD are rejected, their local poses would not fit in the group block
+    def load_clip(self, path):
+        clip = self.clips.get(path)
+        if clip is None:
+            if os.path.getsize(path) > STREAM_THRESHOLD:
+                raise ValueError(f"{path}: too large for a crowd clip (> {STREAM_THRESHOLD // (1024 * 1024)} MB), play it with the Animator")
+            skeleton, frames, frame_time = read_motion(path)
+            clip = Clip(path, skeleton, frames, frame_time)
+            self.clips[path] = clip
+        return clip
+
+    def add_character(self, path, time_offset=0.0, speed=1.0, position=(0.0, 0.0, 0.0), root_transform=None):
+        clip = self.load_clip(path)
+        if root_transform is None:
+            root_transform = np.eye(4, dtype=np.float32)
+            root_transform[:3, 3] = position
+        character = Character(clip, time_offset, speed, root_transform)
+        character.palette_base = self.renderer.add_skeleton(clip.skeleton)
+
+        signature = clip.skeleton.signature()
+        if signature not in self.groups:
+            self.groups[signature] = SkeletonGroup(clip.skeleton, self.interpolation)
+        self.groups[signature].add(character)
+
+        self.characters.append(character)
+        return character
+
+    # one character per file, laid out on a grid on the XZ plane
+    def add_directory(self, directory="assets", pattern="*.bvh", spacing=200.0, columns=None):
+        paths = sorted(glob.glob(os.path.join(directory, pattern)))
+        columns = columns or max(1, math.ceil(math.sqrt(len(paths))))
+        for i, path in enumerate(paths):
+            row, column = divmod(i, columns)
+            self.add_character(path, position=(column * spacing, 0.0, row * spacing))
+        return len(paths)
+
+    #####################################
+    # CALLBACKS
+    #####################################
+
+    def assemble(self, import_data=None):
+        pass
+
+    def init(self):
+        print(f"Crowd: {len(self.characters)} characters, {len(self.clips)} clips, {len(self.groups)} skeleton groups.")
+
+    def fixed_update(self, dt):
+        if self.is_playing:
+            self.clock += dt * self.playback_speed
+
+    def update(self):
+        if not self.characters:
+            return
+
+        # crowd time of the last fixed step + the part of a step elapsed since
+        clock = self.clock
+        if self.is_playing:
+            clock += core.Scheduler.alpha * core.Scheduler.fixed_dt * self.playback_speed
+
+        # one FK call per skeleton group, all poses land in the shared palette
+        for group in self.groups.values():
+            group.evaluate(clock, self.renderer.palette)
+
+        self.renderer.draw()
+
+    def release(self):
+        self.renderer.release()
+        self.clips = {}
+        self.groups = {}
+        self.characters = []
+
+    # ---------------------------------------------
+    # Controls
+    # ---------------------------------------------
+
+    def play(self):
+        self.is_playing = True
+
+    def pause(self):
+        self.is_playing = False
+
+    def set_speed(self, speed):
+        self.playback_speed = speed
+
+    def reset(self):
+        self.clock = 0.0
@@ -0,0 +1,101 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import core
+from core.kinematics import local_quaternions
+from plugins.bvh import read_motion, STREAM_THRESHOLD
+from plugins.bvh.stream import MotionStream
+
+#####################################
+# BACKGROUND CLIP LOADING
+#####################################
+
+class ClipData:
+    # everything playback needs from one clip, built off the main thread and never modified after
+    def __init__(self, path, skeleton, frames, frame_time, local_rotations=None, local_translations=None):
+        self.path = path
+        self.skeleton = skeleton
+        self.frames = frames
+        self.frame_time = frame_time
+        self.local_rotations = local_rotations # None for streamed takes
+        self.local_translations = local_translations
+
+def load_clip(path, precompute=True):
+    # long takes are streamed, their local poses are converted per sampled frame instead
+    if os.path.getsize(path) > STREAM_THRESHOLD:
+        frames = MotionStream(path)
+        return ClipData(path, frames.skeleton, frames, frames.frame_time)
+
+    skeleton, frames, frame_time = read_motion(path)
+    rotations = translations = None
+    if precompute:
+        rotations, translations = local_quaternions(skeleton, frames)
+    return ClipData(path, skeleton, frames, frame_time, rotations, translations)
+
+class ClipLoader:
+    """
+    Loads clips (parse or sidecar, plus the local pose precompute) on a worker thread.
+    A finished clip is handed to `on_ready(clip)` through core.GLCommandQueue, i.e. on the
+    main thread between frames; only the newest request is delivered, older ones are dropped.
+    """
+    def __init__(self, on_ready, on_error=None):
+        self.on_ready = on_ready
+        self.on_error = on_error
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ClipLoader")
+        self._lock = threading.Lock()
+        self._generation = 0 # id of the newest request
+        self.pending_path = None
+
+    @property
+    def busy(self):
+        return self.pending_path is not None
+
+    def request(self, path, precompute=True):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        self.pending_path = path
+        return self._executor.submit(self._load, path, precompute, generation)
+
+    def cancel(self):
+        # results of earlier requests are ignored from now on
+        with self._lock:
+            self._generation += 1
+        self.pending_path = None
+
+    def _load(self, path, precompute, generation):
+        clip = error = None
+        try:
+            clip = load_clip(path, precompute)
+        except Exception as e: # any failure (e.g. a KeyError from a bad sidecar) is reported, not lost in the future
+            error = e
+        finally:
+            # always answer on the main thread, otherwise pending_path (busy) is never cleared
+            if clip is not None:
+                core.GLCommandQueue.submit(self._deliver, clip, generation)
+            else:
+                core.GLCommandQueue.submit(self._fail, path, error, generation)
+        return clip
+
+    # main thread
+    def _deliver(self, clip, generation):
+        if generation != self._generation:
+            if isinstance(clip.frames, MotionStream):
+                clip.frames.close()
+            return
+        self.pending_path = None
+        self.on_ready(clip)
+
+    def _fail(self, path, error, generation):
+        if generation != self._generation:
+            return
+        self.pending_path = None
+        if self.on_error is not None:
+            self.on_error(path, error)
+        else:
+            print(f"ClipLoader Error: could not load '{path}'. {type(error).__name__}: {error}")
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+import numpy as np
+
+class PoseCache:
+    """
+    LRU cache of packed world matrices (J, 4, 4) of whole frames, keyed by (clip, motion generation, frame index).
+    All entries live in one preallocated block sized from a memory budget.
+    """
+    def __init__(self, budget_bytes=64 * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self.num_joints = 0
+        self.capacity = 0
+        self.block = None
+
+        self._slots = OrderedDict() # key -> slot, least recently used first
+        self._free = []
+
+        # counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # (re)allocate the block for skeletons of up to num_joints joints
+    def reserve(self, num_joints):
+        if num_joints <= self.num_joints:
+            return
+
+        entry_bytes = num_joints * 16 * np.dtype(np.float32).itemsize
+        self.num_joints = num_joints
+        self.capacity = max(1, self.budget_bytes // entry_bytes)
+        self.block = np.empty((self.capacity, num_joints, 4, 4), dtype=np.float32)
+        self._slots.clear()
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+    # cached (J, 4, 4) view or None; the view is only valid until the next put()
+    def get(self, key, num_joints):
+        slot = self._slots.get(key)
+        if slot is None:
+            self.misses += 1
+            return None
+
+        self._slots.move_to_end(key)
+        self.hits += 1
+        return self.block[slot, :num_joints]
+
+    # copy matrices into the block, evicting the least recently used entry if full
+    def put(self, key, matrices):
+        num_joints = len(matrices)
+        self.reserve(num_joints)
+
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                _, slot = self._slots.popitem(last=False)
+                self.evictions += 1
+
+        self._slots[key] = slot
+        self.block[slot, :num_joints] = matrices
+        return self.block[slot, :num_joints]
+
+    def contains(self, key):
+        return key in self._slots
+
+    def clear(self):
+        self._slots.clear()
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._slots),
+            'capacity': self.capacity,
+            'bytes': self.block.nbytes if self.block is not None else 0,
+        }
+
+    def __len__(self):
+        return len(self._slots)
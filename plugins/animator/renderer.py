@@ -0,0 +1,183 @@
+from ctypes import c_void_p
+import numpy as np
+from OpenGL.GL import *
+
+import core
+from core.mesh import GeometryCache, sphere_geometry
+
+# texture unit the palette is bound to while drawing
+PALETTE_TEXTURE_UNIT = 0
+
+class SkeletonRenderer:
+    """
+    Draws any number of skeletons from one joint palette: the world matrices (J, 4, 4)
+    of every skeleton live in one row-major block, uploaded once per frame to a texture buffer.
+    All joint spheres are one instanced draw and all bones a second one;
+    the shaders read the matrices by instance (joint) index.
+    """
+    def __init__(self, capacity=1024, joint_radius=1.0, joint_tessellation=(16, 16)):
+        self.palette = np.zeros((capacity, 4, 4), dtype=np.float32)
+        self.palette[:] = np.eye(4, dtype=np.float32)
+        self.count = 0 # palette entries in use
+
+        # (parent, child) palette indices of every bone
+        self.bones = np.zeros((0, 2), dtype=np.int32)
+        self._bones_dirty = False
+
+        self.joint_radius = joint_radius
+        self.joint_color = (1.0, 1.0, 1.0)
+        self.bone_color = (0.7, 0.7, 0.7)
+        self.joint_tessellation = joint_tessellation
+
+        # gl related variables, created on first draw
+        self.joint_shader = None
+        self.bone_shader = None
+        self.sphere = None
+        self.tbo = None
+        self.texture = None
+        self.bone_vao = None
+        self.endpoint_vbo = None
+        self.bone_vbo = None
+        self._gpu_capacity = 0
+
+    @property
+    def capacity(self):
+        return len(self.palette)
+
+    #####################################
+    # SKELETONS
+    #####################################
+
+    # reserve palette entries for a skeleton, returns the index of its first joint
+    def add_skeleton(self, skeleton):
+        base = self.count
+        num_joints = skeleton.num_joints
+        if base + num_joints > self.capacity:
+            self._grow(max(base + num_joints, 2 * self.capacity))
+        self.count += num_joints
+
+        # one bone per non-root joint
+        children = np.flatnonzero(skeleton.parent_index >= 0)
+        bones = np.stack([skeleton.parent_index[children] + base, children + base], axis=-1)
+        self.bones = np.concatenate([self.bones, bones.astype(np.int32)])
+        self._bones_dirty = True
+        return base
+
+    # palette rows of one skeleton, FK results can be written here directly
+    def get_pose(self, base, num_joints):
+        return self.palette[base:base + num_joints]
+
+    def set_pose(self, base, matrices):
+        self.palette[base:base + len(matrices)] = matrices
+
+    def clear(self):
+        self.count = 0
+        self.bones = np.zeros((0, 2), dtype=np.int32)
+        self._bones_dirty = True
+
+    def _grow(self, capacity):
+        palette = np.zeros((capacity, 4, 4), dtype=np.float32)
+        palette[:] = np.eye(4, dtype=np.float32)
+        palette[:self.count] = self.palette[:self.count]
+        self.palette = palette
+
+    #####################################
+    # GL
+    #####################################
+
+    def init(self):
+        self.joint_shader = core.Shader("shaders/skeleton/joint.vert", "shaders/skeleton/skeleton.frag")
+        self.bone_shader = core.Shader("shaders/skeleton/bone.vert", "shaders/skeleton/skeleton.frag")
+
+        # shared sphere mesh, one instance per joint
+        lat, lon = self.joint_tessellation
+        self.sphere = GeometryCache.acquire(("sphere", lat, lon), lambda: sphere_geometry(lat, lon))
+
+        # palette texture buffer (4 RGBA32F texels = one row-major matrix)
+        self.tbo = glGenBuffers(1)
+        self.texture = glGenTextures(1)
+        glBindBuffer(GL_TEXTURE_BUFFER, self.tbo)
+        glBindTexture(GL_TEXTURE_BUFFER, self.texture)
+        glTexBuffer(GL_TEXTURE_BUFFER, GL_RGBA32F, self.tbo)
+        glBindTexture(GL_TEXTURE_BUFFER, 0)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+
+        # bones: a 2 vertex line (endpoint 0/1) instanced per (parent, child) pair
+        self.bone_vao = glGenVertexArrays(1)
+        glBindVertexArray(self.bone_vao)
+
+        self.endpoint_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.endpoint_vbo)
+        endpoints = np.array([0.0, 1.0], dtype=np.float32)
+        glBufferData(GL_ARRAY_BUFFER, endpoints.nbytes, endpoints, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 1, GL_FLOAT, GL_FALSE, 0, None)
+
+        self.bone_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.bone_vbo)
+        glEnableVertexAttribArray(1)
+        glVertexAttribIPointer(1, 2, GL_INT, 8, c_void_p(0))
+        glVertexAttribDivisor(1, 1)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(0)
+
+    def upload(self):
+        # palette, every frame
+        glBindBuffer(GL_TEXTURE_BUFFER, self.tbo)
+        if self._gpu_capacity != self.capacity:
+            glBufferData(GL_TEXTURE_BUFFER, self.palette.nbytes, self.palette, GL_STREAM_DRAW)
+            self._gpu_capacity = self.capacity
+        else:
+            used = self.palette[:self.count]
+            glBufferSubData(GL_TEXTURE_BUFFER, 0, used.nbytes, used)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+
+        # bone index pairs, only when skeletons were added
+        if self._bones_dirty:
+            glBindBuffer(GL_ARRAY_BUFFER, self.bone_vbo)
+            glBufferData(GL_ARRAY_BUFFER, self.bones.nbytes, self.bones, GL_STATIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            self._bones_dirty = False
+
+    def draw(self):
+        if self.count == 0:
+            return
+        if self.tbo is None:
+            self.init()
+        self.upload()
+
+        glActiveTexture(GL_TEXTURE0 + PALETTE_TEXTURE_UNIT)
+        glBindTexture(GL_TEXTURE_BUFFER, self.texture)
+
+        # 1. all joint spheres
+        glUseProgram(self.joint_shader.program)
+        self.joint_shader.set_uniform("palette", PALETTE_TEXTURE_UNIT)
+        self.joint_shader.set_uniform("joint_radius", float(self.joint_radius))
+        self.joint_shader.set_uniform("color", self.joint_color)
+        self.joint_shader.set_uniform("lit", True)
+        glBindVertexArray(self.sphere.vao)
+        glDrawElementsInstanced(GL_TRIANGLES, len(self.sphere.indices), GL_UNSIGNED_INT, None, self.count)
+
+        # 2. all bones
+        if len(self.bones):
+            glUseProgram(self.bone_shader.program)
+            self.bone_shader.set_uniform("palette", PALETTE_TEXTURE_UNIT)
+            self.bone_shader.set_uniform("color", self.bone_color)
+            self.bone_shader.set_uniform("lit", False)
+            glBindVertexArray(self.bone_vao)
+            glDrawArraysInstanced(GL_LINES, 0, 2, len(self.bones))
+
+        glBindVertexArray(0)
+        glBindTexture(GL_TEXTURE_BUFFER, 0)
+
+    def release(self):
+        if self.tbo is not None:
+            glDeleteBuffers(3, [self.tbo, self.endpoint_vbo, self.bone_vbo])
+            glDeleteTextures(1, [self.texture])
+            glDeleteVertexArrays(1, [self.bone_vao])
+            GeometryCache.release(self.sphere)
+            self.tbo = self.texture = self.bone_vao = self.endpoint_vbo = self.bone_vbo = None
+            self.sphere = None
+            self._gpu_capacity = 0
+        self.clear()
@@ -1,25 +1,64 @@
+import os
 import time
 import numpy as np
-import quaternion as qt # Assuming numpy-quaternion is available as per your core imports
 
 import core
-from core.mesh import Sphere
+from core.curve import LineBatch
+from core.kinematics import forward_kinematics
+from core.skeleton import Skeleton, ROTATION_ORDERS
 from core.joint import Joint
+from . import cache
+from . import parser
+from .stream import MotionStream
+
+# files above this size are streamed (MotionStream) instead of parsed into memory
+STREAM_THRESHOLD = 64 * 1024 * 1024
+
+# (skeleton, frames, frame_time) of a BVH file without creating a loader (no plugin, no GL)
+# used to share one motion array between many characters
+def read_motion(path, use_cache=True):
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if use_cache:
+        cached = cache.load(path, data)
+        if cached is not None:
+            header, frames = cached
+            return Skeleton.from_dict(header), frames, header["frame_time"]
+
+    skeleton, frames, frame_time = parser.parse(data.decode('utf-8'))
+    if skeleton is None or frames is None:
+        raise ValueError(f"{path}: BVH file needs a HIERARCHY and a MOTION section")
+
+    if use_cache:
+        cache.save(path, data, skeleton.to_dict(), frames, frame_time)
+    return skeleton, frames, frame_time
 
 class BVH(core.Plugin):
     def __init__(self):
         super().__init__()
         
+        # scene-graph Joints, only built on demand by create_joints() (for display)
         self.root_object = None 
-        self.file_content = ""
-        self.lines = []
-        self._line_idx = 0
+        self.joints = [] # in skeleton order
+        self.joint_nodes = np.zeros(0, dtype=np.int64) # scene graph node of each joint
+
+        # bones as segments of the shared LineBatch, one per non-root joint
+        self.bone_handles = np.zeros(0, dtype=np.int64)
+        self.bone_joints = np.zeros(0, dtype=np.int64) # child joint of each bone
+        self.file_content = "" # BVH text to load in init(), dropped once parsed
+
+        # array-backed hierarchy (core.skeleton.Skeleton), no GL resources
+        self.skeleton = None
         
         # Animation Data
-        self.frames = []
+        # frames is one contiguous (num_frames, num_channels) float32 matrix
+        self.frames = np.zeros((0, 0), dtype=np.float32)
+        self.num_channels = 0
         self.frame_time = 0.033
         self.start_time = 0
         self.is_playing = False
+        self.generation = 0 # bumped whenever the motion is replaced (keys caches of derived data)
         
         # Mapping for animation: List of dicts
         # [{'object': core.Object, 'channels': ['Xposition', 'Zrotation', ...], 'order': 'ZXY'}]
@@ -31,194 +70,167 @@ class BVH(core.Plugin):
 
     def init(self):
         # Example initialization if file_content is set externally
+        # the text is not kept: the parsed frames hold the motion, long takes should use load_stream()
         if self.file_content:
-            self.load_from_string(self.file_content)
-
-    def load_from_path(self, path):
-        with open(path, 'r') as f:
-            self.load_from_string(f.read())
+            content, self.file_content = self.file_content, ""
+            self.load_from_string(content)
+
+    def load_from_path(self, path, use_cache=True, stream=None):
+        # long takes: hierarchy now, motion rows decoded on access (stream=None decides by file size)
+        if stream is None:
+            stream = os.path.getsize(path) > STREAM_THRESHOLD
+        if stream:
+            self.load_stream(path)
+            return
+
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        # reuse the binary sidecar if it matches this exact file
+        if use_cache:
+            cached = cache.load(path, data)
+            if cached is not None:
+                self.load_from_cache(*cached)
+                return
+
+        self.load_from_string(data.decode('utf-8'))
+
+        if use_cache and self.skeleton is not None:
+            cache.save(path, data, self.skeleton.to_dict(), self.frames, self.frame_time)
+
+    def load_from_cache(self, header, frames):
+        self.release()
+        self.skeleton = Skeleton.from_dict(header)
+        self.frame_time = header["frame_time"]
+        self.frames = frames
+        self.num_channels = frames.shape[1]
+
+        self.is_playing = True
+        self.start_time = time.time()
+        print(f"BVH Loaded (cached): {len(self.frames)} frames, {self.skeleton.num_joints} joints.")
+
+    # adopt motion loaded elsewhere (e.g. by a background loader)
+    def set_motion(self, skeleton, frames, frame_time):
+        self.release()
+        self.skeleton = skeleton
+        self.frame_time = frame_time
+        self.frames = frames
+        self.num_channels = skeleton.num_channels
+
+        self.is_playing = True
+        self.start_time = time.time()
+
+    def load_stream(self, path, chunk_frames=256, cache_chunks=8):
+        self.release()
+        self.file_content = "" # a pending text load is replaced by the stream
+        motion = MotionStream(path, chunk_frames, cache_chunks)
+        self.skeleton = motion.skeleton
+        self.frame_time = motion.frame_time
+        self.frames = motion
+        self.num_channels = motion.num_channels
+
+        self.is_playing = True
+        self.start_time = time.time()
+        print(f"BVH Opened (streaming): {len(self.frames)} frames, {self.skeleton.num_joints} joints.")
+
+    @property
+    def is_streaming(self):
+        return isinstance(self.frames, MotionStream)
 
     def load_from_string(self, content):
-        self.lines = [l.strip() for l in content.split('\n') if l.strip()]
-        self.frames = []
-        self.animated_nodes = []
-        self._line_idx = 0
-        
-        # 1. Parse Hierarchy
-        if self.lines and self.lines[0] == "HIERARCHY":
-            self._line_idx = 1
-            self.root_object = self.parse_hierarchy(None)
+        self.release()
+        skeleton, frames, frame_time = parser.parse(content)
+
+        # 1. Hierarchy
+        self.skeleton = skeleton
+        self.num_channels = skeleton.num_channels if skeleton else 0
         
-        # 2. Parse Motion
-        try:
-            motion_idx = self.lines.index("MOTION")
-            self._line_idx = motion_idx + 1
-            self.parse_motion()
-            self.is_playing = True
-            self.start_time = time.time()
-            print(f"BVH Loaded: {len(self.frames)} frames, {len(self.animated_nodes)} animated joints.")
-        except ValueError:
+        # 2. Motion
+        if frames is None:
             print("BVH Error: No MOTION section found.")
+            return
+
+        self.frames = frames
+        self.frame_time = frame_time
+        self.is_playing = True
+        self.start_time = time.time()
+        print(f"BVH Loaded: {len(self.frames)} frames, {skeleton.num_joints if skeleton else 0} joints.")
+
+    # world-space joint positions (F, J, 3) and rotations (F, J, 3, 3) for frames[start:stop]
+    def compute_world_poses(self, start=0, stop=None):
+        if self.skeleton is None:
+            raise ValueError("No skeleton loaded")
+        return forward_kinematics(self.skeleton, self.frames, start, stop)
+
+    # build the scene-graph Joints from the skeleton (for display), returns the root
+    # shader: when given, every joint is registered with GLWrapper (Object.init) and drawn
+    # instanced from its scene graph row by glw.update()
+    def create_joints(self, shader=None):
+        # joints and bones of a previous call give back their nodes and segments
+        if self.root_object is not None:
+            self.root_object.release()
+        LineBatch.shared().remove_segments(self.bone_handles)
+        self.bone_handles = np.zeros(0, dtype=np.int64)
 
-    def update(self):
-        # if not self.is_playing or not self.frames or not self.root_object:
-        #     return
+        self.animated_nodes = []
+        self.joints = []
+        self.root_object = None
+        if self.skeleton is None:
+            return None
+
+        skeleton = self.skeleton
+        objects = []
+        for j in range(skeleton.num_joints):
+            # --- CREATE CORE OBJECT ---
+            obj = Joint(skeleton.names[j], position=skeleton.offsets[j])
+
+            parent_idx = skeleton.parent_index[j]
+            if parent_idx >= 0:
+                objects[parent_idx].add_child(obj)
+            objects.append(obj)
+
+            # Register for animation updates if this joint has channels
+            channels = skeleton.channels[j]
+            if channels:
+                obj.channels = channels
+                obj.channel_order = ROTATION_ORDERS[skeleton.rotation_order[j]]
+                self.animated_nodes.append({
+                    'object': obj,
+                    'channels': channels,
+                    'channel_order': obj.channel_order
+                })
+
+        self.joints = objects
+        self.joint_nodes = np.array([obj._node for obj in objects], dtype=np.int64)
+        if shader is not None:
+            for obj in objects:
+                obj.shader = shader
+                obj.init()
+
+        # bones from each joint's parent to the joint, posed by the Animator every frame
+        self.bone_joints = np.flatnonzero(skeleton.parent_index >= 0)
+        zeros = np.zeros((len(self.bone_joints), 3), dtype=np.float32)
+        self.bone_handles = LineBatch.shared().add_segments(zeros, zeros, color=(0.7, 0.7, 0.7))
+        self.root_object = objects[0] if objects else None
+        return self.root_object
 
-        # # 1. Calculate Frame Index
-        # elapsed = time.time() - self.start_time
-        # frame_idx = int(elapsed / self.frame_time) % len(self.frames)
-        # current_frame_data = self.frames[frame_idx]
-        
-        # data_ptr = 0
-
-        # # 2. Apply Motion to Objects
-        # for node in self.animated_nodes:
-        #     obj = node['object']
-        #     channels = node['channels']
-            
-        #     # Start with the Rest Pose Position (OFFSET)
-        #     # We copy it so we don't mutate the original rest offset
-        #     pos = np.array(obj.rest_offset, dtype=np.float32)
-            
-        #     # Dictionary to temporarily hold rotation values for this frame
-        #     rot_vals = {'X': 0.0, 'Y': 0.0, 'Z': 0.0}
-            
-        #     for channel in channels:
-        #         val = current_frame_data[data_ptr]
-        #         data_ptr += 1
-                
-        #         if channel == "Xposition": pos[0] = val
-        #         elif channel == "Yposition": pos[1] = val
-        #         elif channel == "Zposition": pos[2] = val
-        #         elif channel == "Xrotation": rot_vals['X'] = val
-        #         elif channel == "Yrotation": rot_vals['Y'] = val
-        #         elif channel == "Zrotation": rot_vals['Z'] = val
-
-        #     # Apply Position
-        #     # Note: BVH motion data for Root position is usually absolute, 
-        #     # while children rely on their parent's transform + their offset.
-        #     # If channels had position, we use the parsed 'pos'. 
-        #     # If not, 'pos' remains the 'rest_offset'.
-        #     obj.set_position(pos)
-
-        #     # Apply Rotation
-        #     # We must respect the channel order (e.g. Zrotation, then X, then Y)
-        #     # The node['channel_order'] stores e.g. "ZXY"
-            
-        #     # Start with Identity Quaternion
-        #     final_quat = np.quaternion(1, 0, 0, 0) 
-            
-        #     # Apply rotations in the specific order defined by BVH
-        #     for axis in node['channel_order']:
-        #         angle_rad = np.radians(rot_vals[axis])
-                
-        #         if axis == 'X':
-        #             q = qt.from_euler_angles(angle_rad, 0, 0)
-        #         elif axis == 'Y':
-        #             q = qt.from_euler_angles(0, angle_rad, 0)
-        #         elif axis == 'Z':
-        #             q = qt.from_euler_angles(0, 0, angle_rad)
-                
-        #         # Multiply current rotation by new axis rotation
-        #         final_quat = final_quat * q
-
-        #     obj.transform.set_rotation_quat(qt.as_float_array(final_quat))
+    def update(self):
+        # posing and drawing are done by the Animator (joint palette or scene-graph Joints)
         return
 
     def release(self):
+        self.generation += 1
+        LineBatch.shared().remove_segments(self.bone_handles)
+        if self.root_object is not None:
+            self.root_object.release() # frees the joints' scene graph nodes
+        self.bone_handles = np.zeros(0, dtype=np.int64)
+        self.bone_joints = np.zeros(0, dtype=np.int64)
         self.root_object = None
-        self.frames = []
+        self.joints = []
+        self.joint_nodes = np.zeros(0, dtype=np.int64)
+        self.skeleton = None
+        if isinstance(self.frames, MotionStream):
+            self.frames.close()
+        self.frames = np.zeros((0, 0), dtype=np.float32)
+        self.num_channels = 0
         self.animated_nodes = []
-
-    # -----------------------------------------------------------
-    # Parsing Logic
-    # -----------------------------------------------------------
-
-    def parse_hierarchy(self, parent_obj):
-        line = self.lines[self._line_idx]
-        self._line_idx += 1
-        
-        parts = line.split()
-        is_end_site = line.startswith("End Site")
-        name = "EndSite" if is_end_site else (parts[1] if len(parts) > 1 else "Unknown")
-        
-        # --- CREATE CORE OBJECT ---
-        obj = Joint(name)
-        
-        # Add visual component (Sphere)
-        # Make joints smaller (0.2) so they look like nodes
-        obj.add_component("mesh", Sphere(scale=(0.2, 0.2, 0.2)))
-
-        if parent_obj:
-            parent_obj.add_child(obj)
-            
-        if self.lines[self._line_idx] != "{": raise ValueError("Expected '{'")
-        self._line_idx += 1
-
-        channels = []
-        channel_order = "XYZ" # Default
-        
-        while self._line_idx < len(self.lines):
-            line = self.lines[self._line_idx]
-            
-            if line.startswith("OFFSET"):
-                parts = line.split()
-                # Parse Offset
-                offset = [float(parts[1]), float(parts[2]), float(parts[3])]
-                
-                # Store as Rest Offset (custom property on the object)
-                obj.rest_offset = offset
-                
-                # Set initial position
-                obj.set_position(offset)
-                self._line_idx += 1
-
-            elif line.startswith("CHANNELS"):
-                parts = line.split()
-                channels = parts[2:] # Skip "CHANNELS" and count
-                
-                # Determine Rotation Order (e.g., extracts "Z" from "Zrotation")
-                rot_channels = [ch[0] for ch in channels if "rotation" in ch]
-                if rot_channels:
-                    channel_order = "".join(rot_channels)
-                
-                self._line_idx += 1
-
-            elif line.startswith("JOINT") or line.startswith("End Site"):
-                self.parse_hierarchy(obj) # Recurse
-
-            elif line == "}":
-                self._line_idx += 1
-                break
-            else:
-                self._line_idx += 1
-
-        # Register for animation updates if this joint has channels
-        if channels:
-            self.animated_nodes.append({
-                'object': obj,
-                'channels': channels,
-                'channel_order': channel_order
-            })
-            
-        return obj
-
-    def parse_motion(self):
-        # Parse Frame Count
-        line = self.lines[self._line_idx]
-        if "Frames:" in line:
-            # self.frame_count = int(line.split()[1]) # Not strictly needed, we just count the array
-            self._line_idx += 1
-            
-        # Parse Frame Time
-        line = self.lines[self._line_idx]
-        if "Frame Time:" in line:
-            self.frame_time = float(line.split()[-1])
-            self._line_idx += 1
-            
-        # Parse Data
-        while self._line_idx < len(self.lines):
-            line = self.lines[self._line_idx]
-            vals = [float(x) for x in line.split()]
-            self.frames.append(vals)
-            self._line_idx += 1
\ No newline at end of file
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import struct
+import numpy as np
+
+#####################################
+# BINARY MOTION CACHE
+#####################################
+# sidecar layout (little endian):
+#   MAGIC (8 bytes) | header length (uint32) | JSON header | zero padding | float32 motion block
+# the motion block starts on a DATA_ALIGN boundary so it can be memory-mapped in place.
+
+MAGIC = b"MVBVHC\x00\x01"
+VERSION = 1
+EXTENSION = ".bvhcache"
+DATA_ALIGN = 64
+
+def cache_path(path):
+    return path + EXTENSION
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def source_key(path, data):
+    # a sidecar is only valid for this exact size, mtime and content
+    stat = os.stat(path)
+    return {
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_hash": content_hash(data),
+    }
+
+def read_header(sidecar):
+    with open(sidecar, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None, 0
+        size = f.read(4)
+        if len(size) != 4:
+            return None, 0
+        (header_len,) = struct.unpack("<I", size)
+        header = json.loads(f.read(header_len).decode('utf-8'))
+
+    data_offset = _align(len(MAGIC) + 4 + header_len)
+    return header, data_offset
+
+def load(path, data):
+    """
+    Returns the cached header and a read-only memory-mapped motion matrix,
+    or None if there is no valid sidecar for `path` (whose raw bytes are `data`).
+    """
+    sidecar = cache_path(path)
+    if not os.path.exists(sidecar):
+        return None
+
+    try:
+        header, data_offset = read_header(sidecar)
+    except (OSError, ValueError):
+        return None
+    if header is None or header.get("version") != VERSION:
+        return None
+
+    # cheap checks first, hash last
+    stat = os.stat(path)
+    if header["source_size"] != stat.st_size or header["source_mtime_ns"] != stat.st_mtime_ns:
+        return None
+    if header["source_hash"] != content_hash(data):
+        return None
+
+    rows, cols = header["shape"]
+    if rows * cols == 0:
+        frames = np.zeros((rows, cols), dtype=np.float32)
+    else:
+        # a truncated sidecar is stale, the caller re-parses and rewrites it
+        if os.path.getsize(sidecar) < data_offset + rows * cols * 4:
+            return None
+        try:
+            frames = np.memmap(sidecar, dtype='<f4', mode='r', offset=data_offset, shape=(rows, cols))
+        except (OSError, ValueError):
+            return None
+
+    return header, frames
+
+def save(path, data, hierarchy, frames, frame_time):
+    """
+    Writes the sidecar for `path`. `hierarchy` is a dict of JSON serializable
+    per-joint lists (names, parents, offsets, channels, ...).
+    """
+    frames = np.ascontiguousarray(frames, dtype='<f4')
+    header = {
+        "version": VERSION,
+        **source_key(path, data),
+        "frame_time": frame_time,
+        "shape": list(frames.shape),
+        **hierarchy,
+    }
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    data_offset = _align(len(MAGIC) + 4 + len(header_bytes))
+    padding = data_offset - (len(MAGIC) + 4 + len(header_bytes))
+
+    # write to a temporary file and swap it in, so readers never see a partial sidecar
+    sidecar = cache_path(path)
+    tmp = f"{sidecar}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header_bytes)))
+            f.write(header_bytes)
+            f.write(b"\x00" * padding)
+            f.write(frames.tobytes())
+        os.replace(tmp, sidecar)
+    except OSError as e:
+        print(f"BVH Cache Warning: could not write '{sidecar}'. {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+
+    return True
+
+def _align(n):
+    return (n + DATA_ALIGN - 1) // DATA_ALIGN * DATA_ALIGN
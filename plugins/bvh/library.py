@@ -0,0 +1,138 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from core.kinematics import pad_frames, local_translations
+from core.skeleton import Skeleton
+from . import cache
+from . import parser
+
+#####################################
+# MOTION LIBRARY INGESTION
+#####################################
+# Parses directory trees of BVH files in worker processes (parser + cache only, no GL),
+# writes each file's binary sidecar (cache.save) and one JSON index of the whole library.
+# Re-runs only process new files and files whose size/mtime changed since the last run.
+
+INDEX_VERSION = 1
+INDEX_NAME = "library.json"
+
+def scan(root, pattern=".bvh"):
+    paths = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(pattern):
+                paths.append(os.path.join(directory, name))
+    return sorted(paths)
+
+# index entry of one parsed clip
+def describe(path, skeleton, frames, frame_time, source):
+    entry = {
+        "name": os.path.splitext(os.path.basename(path))[0],
+        "signature": skeleton.signature(),
+        "num_joints": skeleton.num_joints,
+        "num_frames": len(frames),
+        "frame_time": frame_time,
+        "duration": len(frames) * frame_time,
+        **source,
+    }
+
+    # root joint trajectory bounds (rest offset + its position channels)
+    if len(frames):
+        root = local_translations(skeleton, pad_frames(skeleton, frames))[:, 0]
+        entry["root_bounds"] = [root.min(axis=0).tolist(), root.max(axis=0).tolist()]
+    else:
+        entry["root_bounds"] = None
+    return entry
+
+# worker: parse one file (or reuse its valid sidecar), returns (path, entry or None, error or None)
+def ingest_file(path):
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        source = cache.source_key(path, data)
+
+        cached = cache.load(path, data)
+        if cached is not None:
+            header, frames = cached
+            skeleton, frame_time = Skeleton.from_dict(header), header["frame_time"]
+        else:
+            skeleton, frames, frame_time = parser.parse(data.decode('utf-8'))
+            if skeleton is None or frames is None:
+                return path, None, "needs a HIERARCHY and a MOTION section"
+            cache.save(path, data, skeleton.to_dict(), frames, frame_time)
+
+        return path, describe(path, skeleton, np.asarray(frames), frame_time, source), None
+    except (OSError, ValueError, UnicodeDecodeError) as e:
+        return path, None, str(e)
+
+def load_index(index_path):
+    if not os.path.exists(index_path):
+        return {}
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        print(f"Library Warning: unreadable index '{index_path}', rebuilding.")
+        return {}
+    if index.get("version") != INDEX_VERSION:
+        return {}
+    return index.get("clips", {})
+
+def save_index(index_path, clips):
+    tmp = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({"version": INDEX_VERSION, "clips": clips}, f, indent=1, sort_keys=True)
+    os.replace(tmp, index_path)
+
+# entries still valid for the file on disk (same size and mtime, sidecar present)
+def is_current(path, entry):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return (
+        entry.get("source_size") == stat.st_size
+        and entry.get("source_mtime_ns") == stat.st_mtime_ns
+        and os.path.exists(cache.cache_path(path))
+    )
+
+def ingest(root, index_path=None, workers=None, force=False, verbose=True):
+    """
+    Ingests every BVH file under `root` into the library index (default <root>/library.json).
+    Index keys are paths relative to `root`. Returns (clips, stats).
+    """
+    index_path = index_path or os.path.join(root, INDEX_NAME)
+    previous = {} if force else load_index(index_path)
+
+    clips = {}
+    todo = []
+    for path in scan(root):
+        key = os.path.relpath(path, root).replace(os.sep, "/")
+        entry = previous.get(key)
+        if entry is not None and is_current(path, entry):
+            clips[key] = entry
+        else:
+            todo.append((key, path))
+
+    stats = {"total": len(clips) + len(todo), "unchanged": len(clips), "parsed": 0, "failed": 0}
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(ingest_file, path): key for key, path in todo}
+            for future in as_completed(futures):
+                key = futures[future]
+                path, entry, error = future.result()
+                if entry is None:
+                    stats["failed"] += 1
+                    print(f"Library Warning: skipped '{path}'. {error}")
+                    continue
+                clips[key] = entry
+                stats["parsed"] += 1
+                if verbose:
+                    print(f"  {key}: {entry['num_frames']} frames, {entry['duration']:.1f} s")
+
+    # removed files drop out of the index, unchanged runs don't rewrite it
+    if todo or set(clips) != set(previous) or force:
+        save_index(index_path, clips)
+    return clips, stats
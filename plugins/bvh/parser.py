@@ -0,0 +1,144 @@
+import re
+import warnings
+import numpy as np
+
+from core.skeleton import Skeleton
+
+#####################################
+# BVH PARSING (no GL side effects)
+#####################################
+
+MOTION_PATTERN = re.compile(r"^\s*MOTION\s*$", re.MULTILINE)
+
+def parse(content):
+    """
+    Parses a whole BVH file.
+    Returns (skeleton, frames, frame_time); skeleton is None if there is no HIERARCHY
+    and frames is None if there is no MOTION section.
+    """
+    motion_match = MOTION_PATTERN.search(content)
+    hierarchy = content[:motion_match.start()] if motion_match else content
+
+    lines = [l.strip() for l in hierarchy.split('\n') if l.strip()]
+    skeleton = None
+    if lines and lines[0] == "HIERARCHY":
+        skeleton = parse_hierarchy(lines, 1)
+
+    if motion_match is None:
+        return skeleton, None, None
+
+    num_channels = skeleton.num_channels if skeleton else 0
+    motion_line = content.count('\n', 0, motion_match.start()) + 1
+    frames, frame_time = parse_motion(content[motion_match.end():], num_channels, motion_line)
+    return skeleton, frames, frame_time
+
+def parse_hierarchy(lines, start=0):
+    """
+    Builds a Skeleton from stripped HIERARCHY lines, beginning at the ROOT line `lines[start]`.
+    Iterative (explicit stack) so deep hierarchies don't hit the recursion limit.
+    """
+    names = []
+    parents = []
+    offsets = []
+    channels = []
+
+    stack = [] # indices of the joints whose '{' is still open
+    idx = start
+    while idx < len(lines):
+        line = lines[idx]
+        idx += 1
+
+        if line.startswith("ROOT") or line.startswith("JOINT") or line.startswith("End Site"):
+            parts = line.split()
+            is_end_site = line.startswith("End Site")
+            name = "EndSite" if is_end_site else (parts[1] if len(parts) > 1 else "Unknown")
+
+            # joints are recorded before their children so indices follow the MOTION channel order
+            parents.append(stack[-1] if stack else -1)
+            names.append(name)
+            offsets.append((0.0, 0.0, 0.0))
+            channels.append([])
+
+            if idx >= len(lines) or lines[idx] != "{": raise ValueError("Expected '{'")
+            idx += 1
+            stack.append(len(names) - 1)
+
+        elif line.startswith("OFFSET"):
+            if not stack: raise ValueError("OFFSET outside of a joint")
+            parts = line.split()
+            offsets[stack[-1]] = (float(parts[1]), float(parts[2]), float(parts[3]))
+
+        elif line.startswith("CHANNELS"):
+            if not stack: raise ValueError("CHANNELS outside of a joint")
+            parts = line.split()
+            channels[stack[-1]] = parts[2:] # Skip "CHANNELS" and count
+
+        elif line == "}":
+            if not stack: raise ValueError("Unexpected '}'")
+            stack.pop()
+            if not stack:
+                break # end of the ROOT block
+
+    if stack:
+        raise ValueError("Unterminated HIERARCHY block")
+
+    return Skeleton(names, parents, offsets, channels)
+
+def parse_motion(block, num_channels, first_line=1):
+    """
+    Parses the text after the MOTION keyword into a (num_frames, num_channels) float32 matrix.
+    Returns (frames, frame_time). first_line is the line number of the MOTION keyword (for errors).
+    """
+    # header: "Frames: N" and "Frame Time: t", then one row per frame
+    header = block.lstrip().split('\n', 2)
+    if len(header) < 2 or not header[0].strip().startswith("Frames:"):
+        raise ValueError("Expected 'Frames:' after MOTION")
+    if not header[1].strip().startswith("Frame Time:"):
+        raise ValueError("Expected 'Frame Time:' after 'Frames:'")
+
+    num_frames = int(header[0].split()[-1])
+    frame_time = float(header[1].split()[-1])
+    data = header[2] if len(header) > 2 else ""
+
+    # parse the whole block in one call instead of float() per token
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning) # raised on malformed tokens
+        try:
+            values = np.fromstring(data, dtype=np.float32, sep=' ')
+        except (DeprecationWarning, ValueError) as e:
+            raise ValueError(f"Malformed MOTION data: {e}") from None
+
+    if num_channels == 0:
+        if values.size:
+            raise ValueError("MOTION data found but the hierarchy declares no channels")
+        return np.zeros((0, 0), dtype=np.float32), frame_time
+
+    # every frame line must hold exactly num_channels values (a short line and a long one
+    # would otherwise shift the rows without changing the total)
+    lines, counts = count_tokens(data)
+    bad = np.flatnonzero(counts != num_channels)
+    if len(bad):
+        line = first_line + block.count('\n', 0, len(block) - len(data)) + int(lines[bad[0]])
+        raise ValueError(f"MOTION line {line}: expected {num_channels} values, found {counts[bad[0]]}")
+    if len(counts) != num_frames:
+        raise ValueError(f"'Frames:' declares {num_frames} frames but {len(counts)} were parsed")
+
+    return values.reshape(-1, num_channels), frame_time
+
+def count_tokens(text):
+    """
+    Whitespace separated tokens per line, vectorized over the raw bytes.
+    Returns (line indices, token counts) of the non-blank lines.
+    """
+    raw = np.frombuffer(text.encode('ascii', 'replace'), dtype=np.uint8)
+    space = raw <= 32 # space, tabs, CR/LF (and other control bytes)
+
+    # a token starts at a non-space byte that follows a space (or the start of the text)
+    starts = np.flatnonzero(~space[1:] & space[:-1]) + 1
+    if len(raw) and not space[0]:
+        starts = np.concatenate(([0], starts))
+    newlines = np.flatnonzero(raw == 10)
+    counts = np.bincount(np.searchsorted(newlines, starts), minlength=len(newlines) + 1)
+
+    lines = np.flatnonzero(counts)
+    return lines, counts[lines]
@@ -0,0 +1,200 @@
+import mmap
+import re
+import warnings
+from collections import OrderedDict
+import numpy as np
+
+from . import parser
+
+#####################################
+# STREAMING MOTION ACCESS
+#####################################
+# Opening a take only parses the hierarchy and indexes where each MOTION row starts and ends
+# (a vectorized newline scan of the memory-mapped file, SCAN_BYTES at a time).
+# Rows are decoded in chunks on first access and kept in a small LRU window, so memory
+# stays bounded by cache_chunks * chunk_frames rows however long the take is.
+
+MOTION_PATTERN = re.compile(rb"^[ \t]*MOTION[ \t]*\r?$", re.MULTILINE)
+HEADER_PATTERN = re.compile(rb"\s*Frames:\s*(\d+)\s*\r?\n\s*Frame Time:\s*(\S+)[ \t]*\r?\n")
+SCAN_BYTES = 16 * 1024 * 1024
+HIERARCHY_BYTES = 16 * 1024 * 1024 # the MOTION keyword must appear within this many bytes
+
+class MotionStream:
+    """
+    Lazy (num_frames, num_channels) float32 motion matrix of a BVH file.
+    Supports len(), shape, stream[i], stream[start:stop] and stream[[i, j, ...]] like the
+    in-memory frames array; iter_chunks() walks the whole take in decoded blocks.
+    """
+    dtype = np.dtype(np.float32)
+    ndim = 2
+
+    def __init__(self, path, chunk_frames=256, cache_chunks=8):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.cache_chunks = cache_chunks
+        self._chunks = OrderedDict() # { CHUNK_INDEX : (rows, C) float32 }
+
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # empty file
+            self._file.close()
+            raise ValueError(f"{path}: empty BVH file") from None
+
+        try:
+            self._open()
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self):
+        data = self._map
+
+        # 1. hierarchy, eagerly (small), only the header is searched so a bad file isn't scanned whole
+        motion = MOTION_PATTERN.search(data, 0, HIERARCHY_BYTES)
+        if motion is None:
+            raise ValueError(f"{self.path}: BVH file needs a HIERARCHY and a MOTION section "
+                             f"(within the first {HIERARCHY_BYTES // (1024 * 1024)} MB)")
+        hierarchy = data[:motion.start()].decode('utf-8')
+        lines = [l.strip() for l in hierarchy.split('\n') if l.strip()]
+        if not lines or lines[0] != "HIERARCHY":
+            raise ValueError(f"{self.path}: BVH file needs a HIERARCHY and a MOTION section")
+        self.skeleton = parser.parse_hierarchy(lines, 1)
+        self.num_channels = self.skeleton.num_channels
+
+        # 2. motion header
+        header = HEADER_PATTERN.match(data, motion.end())
+        if header is None:
+            raise ValueError(f"{self.path}: expected 'Frames:' and 'Frame Time:' after MOTION")
+        declared = int(header.group(1))
+        self.frame_time = float(header.group(2))
+
+        # 3. row index
+        self.row_start, self.row_end = self._index_rows(header.end())
+        if len(self.row_start) != declared:
+            print(f"BVH Warning: '{self.path}' declares {declared} frames, {len(self.row_start)} rows found.")
+
+    # byte ranges [start, end) of every non-empty line from `offset` to the end of the file
+    def _index_rows(self, offset):
+        data = self._map
+        size = len(data)
+        newlines = []
+        for begin in range(offset, size, SCAN_BYTES):
+            block = np.frombuffer(data, dtype=np.uint8, count=min(SCAN_BYTES, size - begin), offset=begin)
+            newlines.append(np.flatnonzero(block == 10) + begin)
+        newlines = np.concatenate(newlines) if newlines else np.zeros(0, dtype=np.int64)
+
+        starts = np.concatenate([[offset], newlines + 1]).astype(np.int64)
+        ends = np.concatenate([newlines, [size]]).astype(np.int64)
+
+        # drop "\r" line endings and whitespace-only lines (blank lines, trailing newline)
+        if len(ends):
+            has_cr = ends > starts
+            has_cr[has_cr] = np.frombuffer(data, dtype=np.uint8)[ends[has_cr] - 1] == 13
+            ends = ends - has_cr
+        keep = ends > starts
+
+        # whitespace-only lines are shorter than any real row, only those are checked one by one
+        for i in np.flatnonzero(keep & (ends - starts < max(self.num_channels, 1))):
+            if not data[starts[i]:ends[i]].strip():
+                keep[i] = False
+        return starts[keep], ends[keep]
+
+    #####################################
+    # ARRAY ACCESS
+    #####################################
+
+    def __len__(self):
+        return len(self.row_start)
+
+    @property
+    def shape(self):
+        return (len(self), self.num_channels)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple): # frames[rows, channels]
+            rows = self[key[0]]
+            return rows[key[1:]] if rows.ndim == 1 else rows[(slice(None),) + key[1:]]
+
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                return self._read_range(start, stop)
+            key = np.arange(start, stop, step)
+
+        if np.isscalar(key) or (isinstance(key, np.ndarray) and key.ndim == 0):
+            index = int(key)
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError(f"frame {key} out of range for {len(self)} frames")
+            chunk, row = divmod(index, self.chunk_frames)
+            return self._chunk(chunk)[row].copy()
+
+        # list / array of frame indices
+        indices = np.asarray(key, dtype=np.int64)
+        indices = np.where(indices < 0, indices + len(self), indices)
+        if len(indices) and (indices.min() < 0 or indices.max() >= len(self)):
+            raise IndexError(f"frame index out of range for {len(self)} frames")
+        result = np.empty((len(indices), self.num_channels), dtype=np.float32)
+        for i, index in enumerate(indices):
+            chunk, row = divmod(int(index), self.chunk_frames)
+            result[i] = self._chunk(chunk)[row]
+        return result
+
+    # materializes the whole take (np.asarray(stream)), avoid on long takes
+    def __array__(self, dtype=None, copy=None):
+        frames = self._read_range(0, len(self))
+        return frames if dtype is None else frames.astype(dtype)
+
+    # (first frame index, (rows, C) block) over the whole take, one chunk in memory at a time
+    def iter_chunks(self, chunk_frames=None):
+        step = chunk_frames or self.chunk_frames
+        for start in range(0, len(self), step):
+            yield start, self._read_range(start, min(start + step, len(self)))
+
+    def _read_range(self, start, stop):
+        if stop <= start:
+            return np.zeros((0, self.num_channels), dtype=np.float32)
+        # whole chunks come from (and go to) the window, other ranges are decoded directly
+        first, last = start // self.chunk_frames, (stop - 1) // self.chunk_frames
+        if last - first < self.cache_chunks:
+            blocks = [self._chunk(c) for c in range(first, last + 1)]
+            frames = np.concatenate(blocks) if len(blocks) > 1 else blocks[0]
+            offset = first * self.chunk_frames
+            return frames[start - offset:stop - offset].copy()
+        return self._decode(start, stop)
+
+    def _chunk(self, chunk):
+        frames = self._chunks.get(chunk)
+        if frames is not None:
+            self._chunks.move_to_end(chunk)
+            return frames
+
+        start = chunk * self.chunk_frames
+        frames = self._decode(start, min(start + self.chunk_frames, len(self)))
+        self._chunks[chunk] = frames
+        if len(self._chunks) > self.cache_chunks:
+            self._chunks.popitem(last=False) # least recently used
+        return frames
+
+    def _decode(self, start, stop):
+        text = self._map[self.row_start[start]:self.row_end[stop - 1]]
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning) # raised on malformed tokens
+            try:
+                values = np.fromstring(text, dtype=np.float32, sep=' ')
+            except (DeprecationWarning, ValueError) as e:
+                raise ValueError(f"Malformed MOTION data in frames {start}-{stop}: {e}") from None
+
+        if values.size != (stop - start) * self.num_channels:
+            raise ValueError(f"MOTION rows {start}-{stop} have {values.size} values, expected {(stop - start) * self.num_channels}")
+        return values.reshape(stop - start, self.num_channels)
+
+    def close(self):
+        self._chunks.clear()
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        if not self._file.closed:
+            self._file.close()
@@ -29,6 +29,9 @@ class Camera(core.Plugin):
         self.near = 0.1
         self.far = 100.0
         self.projection = self.perspective()
+
+        # per-frame camera block shared by every program (see core.uniformbuffer)
+        self.ubo = core.UniformBuffer(core.CAMERA_BLOCK)
         
         # export after creation
         core.SharedData.export_data("camera", self)
@@ -82,7 +85,8 @@ class Camera(core.Plugin):
 
     # setup basic settings (window, gui, logs etc)
     def init(self):      
-        # set uniforms
+        # initial camera block
+        self.write_uniform_block()
         return
 
     # executed every frame
@@ -94,8 +98,18 @@ class Camera(core.Plugin):
         self.view[:] = self.look_at()
         self.projection[:] = self.perspective()
 
+        # one upload per frame for all programs
+        self.write_uniform_block()
         return
 
+    def write_uniform_block(self):
+        self.ubo["view_matrix"][:] = self.view
+        self.ubo["projection_matrix"][:] = self.projection
+        np.matmul(self.projection, self.view, out=self.ubo["view_projection_matrix"])
+        self.ubo["eye_position"][:3] = self.eye
+        self.ubo["eye_position"][3] = 1.0
+        self.ubo.upload()
+
     # reset any modified parameters or files
     def reset(self):
         # eye, at, up vector (lookAt)
@@ -115,4 +129,5 @@ class Camera(core.Plugin):
 
     # release runtime data
     def release(self):
+        self.ubo.release()
         return
\ No newline at end of file
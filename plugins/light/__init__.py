@@ -1,7 +1,6 @@
 from OpenGL.GL import *
 
 import core
-from core.glwrapper import GLWrapper as glw
 
 class Light(core.Plugin):
     def __init__(self, position=(1.0, -5.0, 1.0, 0.0)):
@@ -11,12 +10,12 @@ class Light(core.Plugin):
         self.color = (1,1,1)
         self.intensity = 1.0
         
-        self.shader = None
+        # light block shared by every program (see core.uniformbuffer)
+        self.ubo = core.UniformBuffer(core.LIGHT_BLOCK)
     
     # assemble all configurations and files
     def assemble(self):
         # imports
-        self.shader = core.SharedData.import_shader("std_shader")
         
         # exports
 
@@ -24,17 +23,23 @@ class Light(core.Plugin):
 
     # setup basic settings before update loop
     def init(self):
-        # init uniforms
-        glw.set_uniform(self.shader.program, self.transform.position,   "light_position")
-        glw.set_uniform(self.shader.program, self.color,                "light_color")
-        glw.set_uniform(self.shader.program, self.intensity,            "light_intensity")
+        # initial light block
+        self.write_uniform_block()
         return
 
     # executed every frame
     def update(self):
         self.transform.update()
+        self.write_uniform_block() # uploaded only if something changed
         return
 
+    def write_uniform_block(self):
+        position = self.transform.position
+        self.ubo["light_position"][:len(position)] = position
+        self.ubo["light_color"][:3] = self.color
+        self.ubo["light_intensity"] = self.intensity
+        self.ubo.upload()
+
     # reset any modified parameters or files
     def reset(self):
         # self.position = (1.0, -1.0, 1.0, 0.0)
@@ -43,4 +48,5 @@ class Light(core.Plugin):
     # release runtime data
     def release(self):
         # self.position = None
+        self.ubo.release()
         return
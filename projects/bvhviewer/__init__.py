@@ -4,7 +4,6 @@ from OpenGL.GL import *
 
 # Import your specific plugins
 import core
-from core.mesh import Cube
 from core.glwrapper import GLWrapper as glw
 from plugins.animator import Animator
 from plugins.light import Light
@@ -49,21 +48,14 @@ class BVHViewer(core.Plugin):
         self.animator.init()
         
         # 2. Create Floor
+        # the default Object mesh is a Cube, init() registers its world matrix for instanced drawing
         self.floor = core.Object("Floor", position=(0, 0, 0), scale=(50, 0.1, 50))
-        self.floor.add_component("mesh", Cube())
-        self.floor.add_component("shader", self.shader)
-        glw.set_instance_uniform(
-            self.shader.program, 
-            self.floor.components["mesh"].vao, 
-            self.floor.components["mesh"].model,
-            len(self.floor.components["mesh"].indices),
-            name="model_matrix"
-        )
+        self.floor.shader = self.shader
+        self.floor.init()
         
+        # light data reaches every shader through the Light uniform block
         self.light = Light()
-        glw.set_uniform(self.shader.program, self.light.position,  "light_position")
-        glw.set_uniform(self.shader.program, self.light.color,     "light_color")
-        glw.set_uniform(self.shader.program, self.light.intensity, "light_intensity")
+        self.light.write_uniform_block()
         
         print("BVHViewer: Initialized.")
 
@@ -91,4 +83,6 @@ class BVHViewer(core.Plugin):
         if self.animator:
             self.animator.release()
         # Note: We do not release self.camera because we do not own it (it's shared)
+        if self.floor:
+            self.floor.release()
         self.floor = None
\ No newline at end of file
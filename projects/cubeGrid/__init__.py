@@ -47,12 +47,10 @@ class CubeGrid(core.Plugin):
         print(f"Created {len(self.objects)} objects in grid")
         return
     
-    def update(self):
-        """Draw all objects"""
-        if not self.shader or not self.camera:
-            return
-        
-        self.time += 0.01
+    def fixed_update(self, dt):
+        """Animate at the scheduler's fixed timestep"""
+        # 0.6 keeps the speed of the old 0.01 per frame at 60 fps
+        self.time += 0.6 * dt
         
         # Animate objects - each has independent movement
         for i, obj in enumerate(self.objects):
@@ -64,16 +62,17 @@ class CubeGrid(core.Plugin):
             pos = obj.transform.position
             obj.set_position((pos[0], y, pos[2]))
             
-            # Rotate each object
-            obj.rotate_euler((0.5, 1, 0))
+            # Rotate each object (30 and 60 degrees per second)
+            obj.rotate_euler((30 * dt, 60 * dt, 0))
+    
+    def update(self):
+        """Draw all objects"""
+        if not self.shader or not self.camera:
+            return
         
         # Render
         glUseProgram(self.shader.program)
         
-        # Set camera matrices
-        self.shader.set_uniform_matrix4fv("view_matrix", self.camera.view)
-        self.shader.set_uniform_matrix4fv("projection_matrix", self.camera.projection)
-        
         # Draw all objects
         for obj in self.objects:
             obj.draw(self.shader.program)
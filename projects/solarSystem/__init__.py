@@ -75,13 +75,13 @@ class SolarSystem(core.Plugin):
         
         return
     
-    def update(self):
-        """Animate the solar system"""
-        if not self.shader or not self.camera or not self.sun:
+    def fixed_update(self, dt):
+        """Animate the solar system at the scheduler's fixed timestep"""
+        if not self.sun:
             return
         
-        # Increment time
-        self.time += 0.01
+        # Increment time (0.6 keeps the speed of the old 0.01 per frame at 60 fps)
+        self.time += 0.6 * dt
         
         # Animate celestial bodies
         # Sun rotates on its axis
@@ -97,14 +97,15 @@ class SolarSystem(core.Plugin):
         
         # Mars orbits slower
         self.mars.set_rotation_euler((0, self.time * 30, 0))
+    
+    def update(self):
+        """Draw the solar system"""
+        if not self.shader or not self.camera or not self.sun:
+            return
         
         # Render
         glUseProgram(self.shader.program)
         
-        # Set camera matrices once
-        self.shader.set_uniform_matrix4fv("view_matrix", self.camera.view)
-        self.shader.set_uniform_matrix4fv("projection_matrix", self.camera.projection)
-        
         # Draw entire hierarchy with one call
         # This automatically:
         # 1. Draws Sun with its world matrix
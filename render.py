@@ -0,0 +1,124 @@
+#####################################
+# Batch preview rendering (headless)
+#####################################
+# python render.py                       every assets/*.bvh -> previews/<take>/frame_00000.png ...
+# python render.py --ffmpeg              previews/<take>.mp4 (raw frames piped to ffmpeg)
+# python render.py assets/a_001_1_1.bvh --backend osmesa --width 640 --height 360
+
+import argparse
+import glob
+import os
+import sys
+
+parser = argparse.ArgumentParser(description="Render preview videos of BVH takes without a display.")
+parser.add_argument("clips", nargs="*", help="BVH files (default: assets/*.bvh)")
+parser.add_argument("--backend", default=os.environ.get("MV_BACKEND", "egl"), choices=("egl", "osmesa"))
+parser.add_argument("--out", default="previews", help="output directory")
+parser.add_argument("--fps", type=float, default=30.0)
+parser.add_argument("--width", type=int, default=1280)
+parser.add_argument("--height", type=int, default=720)
+parser.add_argument("--max-frames", type=int, default=None, help="limit frames per take")
+parser.add_argument("--ffmpeg", action="store_true", help="encode to <take>.mp4 instead of PNG sequences")
+args = parser.parse_args()
+
+# the PyOpenGL platform is fixed on the first OpenGL import
+os.environ["PYOPENGL_PLATFORM"] = args.backend
+os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+import numpy as np
+
+import core
+import core.window as _window
+from core.glwrapper import GLWrapper as glw
+from core.kinematics import forward_kinematics
+from core.window.capture import PNGSequenceWriter, PipeWriter, ffmpeg_command
+import plugins.camera as _camera
+from plugins.light import Light
+from plugins.animator import Animator
+
+# place the camera so the whole take (all joints, all frames) stays in view
+def frame_camera(camera, skeleton, frames):
+    # at most ~1000 sampled frames, long (streamed) takes are never fully decoded
+    positions, _ = forward_kinematics(skeleton, frames[::max(1, len(frames) // 1000)])
+    points = positions.reshape(-1, 3)
+    lo, hi = points.min(axis=0), points.max(axis=0)
+    center = (lo + hi) * 0.5
+    radius = max(float(np.linalg.norm(hi - lo)) * 0.5, 1e-3)
+
+    distance = radius / np.sin(camera.fovy * 0.5) * 1.1
+    direction = np.array([1.0, 0.5, 1.0], dtype=np.float32)
+    camera.at = center.astype(np.float32)
+    camera.eye = (center + direction / np.linalg.norm(direction) * distance).astype(np.float32)
+    camera.near = distance * 0.01
+    camera.far = distance + radius * 2.0
+
+def render_clip(path, window, camera, light):
+    name = os.path.splitext(os.path.basename(path))[0]
+    if args.ffmpeg:
+        writer = PipeWriter(ffmpeg_command(os.path.join(args.out, f"{name}.mp4"), window.width, window.height, args.fps))
+    else:
+        writer = PNGSequenceWriter(os.path.join(args.out, name))
+
+    animator = Animator()
+    animator.clip_path = path
+    animator.async_load = False # frames are rendered right away
+    animator.init()
+    if animator.loader.skeleton is None:
+        core.PluginQueue.unregister(animator)
+        core.PluginQueue.unregister(animator.loader)
+        animator.release()
+        writer.close()
+        return 0
+
+    # one output frame per 1/fps of the take, at its own frame rate
+    skeleton, frames = animator.loader.skeleton, animator.loader.frames
+    num_frames = int(len(frames) * animator.loader.frame_time * args.fps)
+    if args.max_frames is not None:
+        num_frames = min(num_frames, args.max_frames)
+    animator.loop = False
+    frame_camera(camera, skeleton, frames)
+
+    window.attach_writer(writer)
+    for _ in range(num_frames):
+        window.update()
+        camera.update()
+        light.update()
+        animator.update()
+        glw.update()
+        window.post_update()
+        animator.fixed_update(1.0 / args.fps)
+    window.attach_writer(None) # flushes the frames still in flight
+    writer.close()
+
+    # the BVH loader registered itself as a plugin too, unregister it before release() drops it
+    core.PluginQueue.unregister(animator)
+    core.PluginQueue.unregister(animator.loader)
+    animator.release()
+    return num_frames
+
+if __name__ == "__main__":
+    clips = args.clips or sorted(glob.glob("assets/*.bvh"))
+    if not clips:
+        sys.exit("render.py: no BVH files")
+    os.makedirs(args.out, exist_ok=True)
+
+    window = _window.HeadlessWindow(args.backend, args.width, args.height)
+    camera = _camera.Camera()
+    light = Light()
+    camera.assemble()
+    window.init()
+    glw.init()
+    camera.init()
+    light.init()
+
+    # render time is driven by the loop below, not the wall clock
+    core.Scheduler.alpha = 0.0
+
+    for i, path in enumerate(clips):
+        print(f"[{i + 1}/{len(clips)}] {path}")
+        count = render_clip(path, window, camera, light)
+        print(f"    {count} frames")
+
+    light.release()
+    camera.release()
+    window.release()
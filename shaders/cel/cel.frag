@@ -4,14 +4,24 @@ in vec3 fragNormal;
 
 out vec4 FragColor;
 
-uniform mat4 view;
-uniform vec4 lightPos;
-uniform vec4 lightColor;
+layout(std140, row_major) uniform Camera {
+    mat4 view_matrix;
+    mat4 projection_matrix;
+    mat4 view_projection_matrix;
+    vec4 eye_position;
+};
+
+layout(std140) uniform Light {
+    vec4 light_position;   // xyz = pos, w=0: directional
+    vec4 light_color;      // rgb
+    float light_intensity;
+};
+
 uniform vec4 objectColor;
 
 void main() {
     vec3 norm = normalize(fragNormal);
-    vec4 lightDir = normalize(view * lightPos - fragPos);
+    vec4 lightDir = normalize(view_matrix * light_position - fragPos); // light in view space, as before the Light block
     float diff = pow(max(dot(norm, lightDir.xyz), 0.0), 0.7);
 
     // --- 2-level cel shading ---
@@ -23,6 +33,6 @@ void main() {
     else
         shade = 0.1;      // dark
 
-    vec3 result = shade * lightColor.rgb * objectColor.rgb;
+    vec3 result = shade * light_color.rgb * light_intensity * objectColor.rgb;
     FragColor = vec4(result, 1.0);
 }
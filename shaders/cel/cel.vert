@@ -2,15 +2,20 @@
 layout(location = 0) in vec3 position;
 layout(location = 1) in vec3 normal;
 
+layout(std140, row_major) uniform Camera {
+    mat4 view_matrix;
+    mat4 projection_matrix;
+    mat4 view_projection_matrix;
+    vec4 eye_position;
+};
+
 uniform mat4 model_matrix;
-uniform mat4 view_matrix;
-uniform mat4 projection_matrix;
 
 out vec4 fragPos;
 out vec3 fragNormal;
 
 void main() {
-    fragPos = model * vec4(position, 1.0);
-    fragNormal = mat3(transpose(inverse(model))) * normal;
-    gl_Position = projection * view * fragPos;
+    fragPos = model_matrix * vec4(position, 1.0);
+    fragNormal = mat3(transpose(inverse(model_matrix))) * normal;
+    gl_Position = view_projection_matrix * fragPos;
 }
\ No newline at end of file
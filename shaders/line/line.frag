@@ -0,0 +1,12 @@
+#version 330 core
+
+// Inputs from vertex shader
+in vec3 v_color;
+
+// Outputs to framebuffer
+out vec4 frag_color;
+
+void main()
+{
+    frag_color = vec4(v_color, 1.0);
+}
@@ -0,0 +1,22 @@
+#version 330 core
+
+// Inputs — per-vertex attributes
+layout(location = 0) in vec3 position;   // world space position
+layout(location = 1) in vec3 color;      // per-vertex color
+
+// Outputs — passed to fragment shader
+out vec3 v_color;
+
+// Uniforms
+layout(std140, row_major) uniform Camera {
+    mat4 view_matrix;
+    mat4 projection_matrix;
+    mat4 view_projection_matrix;
+    vec4 eye_position;
+};
+
+void main()
+{
+    v_color = color;
+    gl_Position = view_projection_matrix * vec4(position, 1.0);
+}
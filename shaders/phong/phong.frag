@@ -1,3 +1,5 @@
+#version 330 core
+
 #ifdef GL_ES
 	#ifndef GL_FRAGMENT_PRECISION_HIGH	// highp may not be defined
 		#define highp mediump
@@ -14,10 +16,22 @@ in vec2 tc;
 out vec4 fragColor;
 
 // uniform variables
+layout(std140, row_major) uniform Camera {
+    mat4 view_matrix;
+    mat4 projection_matrix;
+    mat4 view_projection_matrix;
+    vec4 eye_position;
+};
+
+layout(std140) uniform Light {
+    vec4 light_position;   // xyz = pos, w=0: directional
+    vec4 light_color;      // rgb
+    float light_intensity;
+};
+
 uniform bool	b_shade;
-uniform mat4	view_matrix;
 uniform float	shininess;
-uniform vec4	light_position, Ia, Id, Is;	// light
+uniform vec4	Ia, Id, Is;					// light
 uniform vec4	Ka, Kd, Ks;					// material properties
 
 vec4 phong( vec3 l, vec3 n, vec3 h, vec4 Kd )
@@ -1,3 +1,5 @@
+#version 330 core
+
 // vertex attributes
 layout(location=0) in vec3 position;
 layout(location=1) in vec3 normal;
@@ -9,9 +11,14 @@ out vec3 norm;	// per-vertex normal before interpolation
 out vec2 tc;	// texture coordinate
 
 // matrices
+layout(std140, row_major) uniform Camera {
+    mat4 view_matrix;
+    mat4 projection_matrix;
+    mat4 view_projection_matrix;
+    vec4 eye_position;
+};
+
 uniform mat4 model_matrix;
-uniform mat4 view_matrix;
-uniform mat4 projection_matrix;
 
 void main()
 {
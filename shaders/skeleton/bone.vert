@@ -0,0 +1,33 @@
+#version 330 core
+
+// Inputs
+layout(location = 0) in float endpoint;  // 0 = parent joint, 1 = child joint
+layout(location = 1) in ivec2 bone;      // per instance: palette index of the parent and the child joint
+
+// Outputs — passed to fragment shader
+out vec3 v_normal;
+out vec3 v_world_pos;
+
+// Uniforms
+layout(std140, row_major) uniform Camera {
+    mat4 view_matrix;
+    mat4 projection_matrix;
+    mat4 view_projection_matrix;
+    vec4 eye_position;
+};
+
+uniform samplerBuffer palette;   // joint world matrices, row-major, one row per texel
+
+void main()
+{
+    // translation column of the joint's world matrix
+    int base = 4 * (endpoint < 0.5 ? bone.x : bone.y);
+    vec3 world_pos = vec3(texelFetch(palette, base).w,
+                          texelFetch(palette, base + 1).w,
+                          texelFetch(palette, base + 2).w);
+
+    v_world_pos = world_pos;
+    v_normal = vec3(0.0);
+
+    gl_Position = view_projection_matrix * vec4(world_pos, 1.0);
+}
@@ -0,0 +1,42 @@
+#version 330 core
+
+// Inputs — per-vertex attributes (shared sphere mesh)
+layout(location = 0) in vec3 position;   // local vertex position
+layout(location = 1) in vec3 normal;     // local vertex normal
+
+// Outputs — passed to fragment shader
+out vec3 v_normal;       // normal in world space
+out vec3 v_world_pos;    // vertex world position
+
+// Uniforms
+layout(std140, row_major) uniform Camera {
+    mat4 view_matrix;
+    mat4 projection_matrix;
+    mat4 view_projection_matrix;
+    vec4 eye_position;
+};
+
+uniform samplerBuffer palette;   // joint world matrices, row-major, one row per texel
+uniform float joint_radius;
+
+// world matrix of one palette entry
+mat4 fetch_matrix(int index)
+{
+    int base = 4 * index;
+    return transpose(mat4(texelFetch(palette, base),
+                          texelFetch(palette, base + 1),
+                          texelFetch(palette, base + 2),
+                          texelFetch(palette, base + 3)));
+}
+
+void main()
+{
+    // one instance per joint
+    mat4 model = fetch_matrix(gl_InstanceID);
+
+    vec4 world_pos = model * vec4(position * joint_radius, 1.0);
+    v_world_pos = world_pos.xyz;
+    v_normal = mat3(model) * normal;
+
+    gl_Position = view_projection_matrix * world_pos;
+}
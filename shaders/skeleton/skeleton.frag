@@ -0,0 +1,33 @@
+#version 330 core
+
+// Inputs from vertex shader
+in vec3 v_normal;
+in vec3 v_world_pos;
+
+// Outputs to framebuffer
+out vec4 frag_color;
+
+// Uniforms
+layout(std140) uniform Light {
+    vec4 light_position;   // xyz = pos, w=0: directional
+    vec4 light_color;      // rgb
+    float light_intensity;
+};
+
+uniform vec3 color;
+uniform bool lit;        // false for bones (flat color)
+
+void main()
+{
+    if (!lit) {
+        frag_color = vec4(color, 1.0);
+        return;
+    }
+
+    // Lambertian diffuse, same as the std shader
+    vec3 N = normalize(v_normal);
+    vec3 L = normalize(light_position.xyz - v_world_pos);
+    float NdotL = max(dot(N, L), 0.0);
+
+    frag_color = vec4(color * light_color.rgb * (light_intensity * NdotL), 1.0);
+}
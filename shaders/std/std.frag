@@ -8,9 +8,11 @@ in vec3 v_world_pos;
 out vec4 frag_color;
 
 // Uniforms
-uniform vec4 light_position;   // xyz = pos, w=0: directional
-uniform vec3 light_color;
-uniform float light_intensity;
+layout(std140) uniform Light {
+    vec4 light_position;   // xyz = pos, w=0: directional
+    vec4 light_color;      // rgb
+    float light_intensity;
+};
 
 void main()
 {
@@ -27,7 +29,7 @@ void main()
     vec3 base_color = vec3(1.0);
 
     // Diffuse lighting
-    vec3 diffuse = base_color * light_color * (light_intensity * NdotL);
+    vec3 diffuse = base_color * light_color.rgb * (light_intensity * NdotL);
 
     frag_color = vec4(diffuse, 1.0);
 }
@@ -3,25 +3,34 @@
 // Inputs — per-vertex attributes
 layout(location = 0) in vec3 position;   // local vertex position
 layout(location = 1) in vec3 normal;     // local vertex normal
+layout(location = 2) in mat4 instance_matrix; // per-instance model matrix (locations 2-5)
 
 // Outputs — passed to fragment shader
 out vec3 v_normal;       // normal in world space
 out vec3 v_world_pos;    // vertex world position
 
 // Uniforms
+layout(std140, row_major) uniform Camera {
+    mat4 view_matrix;
+    mat4 projection_matrix;
+    mat4 view_projection_matrix;
+    vec4 eye_position;
+};
+
 uniform mat4 model_matrix;
-uniform mat4 view_matrix;
-uniform mat4 projection_matrix;
+uniform bool instanced;          // true: model matrix comes from instance_matrix
 
 void main()
 {
+    mat4 model = instanced ? instance_matrix : model_matrix;
+
     // Transform vertex into world space
-    vec4 world_pos = model_matrix * vec4(position, 1.0);
+    vec4 world_pos = model * vec4(position, 1.0);
     v_world_pos = world_pos.xyz;
 
     // Transform normal (no translation, keep only rotation+scale)
-    v_normal = mat3(model_matrix) * normal;
+    v_normal = mat3(model) * normal;
 
     // Final clip space position
-    gl_Position = projection_matrix * view_matrix * world_pos;
+    gl_Position = view_projection_matrix * world_pos;
 }